@@ -1,28 +1,58 @@
 # advanced_strategy.py
 from kis_api import KISApi
+from market_data import MarketDataCache
+from bar_store import BarStore
+from indicators import IndicatorMemo, row
+from indicator_stream import StreamingSMA
+from eval_context import EvalContext, PortfolioView
+from portfolio import Portfolio
+from position_sizing import size_position
+from rate_limiter import request_priority, current_priority, PRIORITY_EXIT
 from discord.discord_notifier import DiscordNotifier
 import pandas as pd
-import ta
-import requests
 from trading_journal import TradingJournal
 import traceback
+import threading
 import time
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 
 class AdvancedTradingStrategy:
+    SIGNAL_WEIGHTS = {
+        'MA': 2.0,         # 추세
+        'RSI': 1.0,        # 모멘텀
+        'MACD': 1.5,       # 추세 변화
+        'Volume': 2.0,     # 거래량
+        'BB': 1.0,         # 변동성
+        'MinuteMomentum': 1.5,  # 🆕 분봉 단기 모멘텀
+        'InstitutionalFlow': 1.0  # 🆕 기관 매매 흐름
+    }
+
+    # 🔎 1차 선별 (일괄 시세 + 저장된 일봉만 사용)
+    SCREEN_TOP_N = 20        # 전체 분석할 최대 후보 수 (보유 종목은 별도로 항상 포함)
+    SCREEN_MIN_SCORE = 0.75  # 일봉 점수가 이보다 낮으면 분봉/수급 만점(3.25)이어도 매수 기준(2/5 = 4.0점) 미달
+    SCREEN_STALE_DAYS = 7    # 저장된 일봉이 이보다 오래됐거나 없으면 선별 때도 증분 업데이트 (후보가 못 돼도 1주 1회)
+
     def __init__(self):
         self.api = KISApi()
         self.api.get_access_token()
         self.notifier = DiscordNotifier(market='domestic')
         self.journal = TradingJournal()
         self.current_buy_id = {}
-        self.pyramid_tracker = {}
+        self.pyramid_tracker = self._load_pyramid_tracker()  # ✅ 영구 저장 (분할 매수 + 1차 익절 여부)
         self.max_holdings = 15  # ✅ 최대 보유 종목 수 (분산 투자 최적화)
         self.sold_today = self._load_sold_today()  # ✅ 영구 저장에서 불러오기
         self.peak_profit = {}
         self.sector_rotation = None  # 🆕 섹터 로테이션 (필요 시 초기화)
+        self.price_codes = []  # 🆕 현재가 일괄 조회 대상
+        self._price_lock = threading.Lock()  # 🆕 현재가 일괄 재조회는 한 스레드만 (나머지는 결과 재사용)
+        self.market_data = MarketDataCache()  # 🆕 시세 메모 (종목당 일봉/현재가 1회 조회)
+        self.bar_store = BarStore(self.api)  # 🆕 일봉 로컬 저장소 (PVC, 증분 업데이트)
+        self.indicators = IndicatorMemo()  # 🆕 NumPy 지표 (같은 봉이면 재사용)
+        self.minute_ma = {}  # 🆕 종목별 분봉 5분 이평 (스트리밍, 새 분봉만 반영)
+        self.portfolio = Portfolio(self.api.get_balance, PortfolioView.from_domestic)  # 🆕 계좌 스냅샷 (실행당 1회 조회 + 체결 로컬 반영)
+        self.trade_lock = threading.RLock()  # 🆕 매매 결정/주문 직렬화 (스캐너 주문 단계 + 실시간 청산 엔진)
 
     def _load_sold_today(self):
         """당일 익절 종목 로드 (영구 저장)"""
@@ -53,42 +83,175 @@ class AdvancedTradingStrategy:
         except Exception as e:
             print(f"⚠️ sold_today 저장 실패: {e}")
 
-    def get_current_holdings_count(self):
-        """현재 보유 종목 수 조회"""
+    def _load_pyramid_tracker(self):
+        """보유 종목별 분할 매수/익절 상태 로드 (영구 저장)"""
+        tracker_file = '/app/data/pyramid_tracker.json'
         try:
-            balance = self.api.get_balance()
-            if balance and 'output1' in balance:
-                holdings = [s for s in balance['output1'] if int(s.get('hldg_qty', 0)) > 0]
-                return len(holdings)
-        except:
-            pass
-        return 0
+            if os.path.exists(tracker_file):
+                with open(tracker_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"⚠️ pyramid_tracker 로드 실패: {e}")
+        return {}
+
+    def _save_pyramid_tracker(self):
+        """보유 종목별 분할 매수/익절 상태 저장 (영구 저장)"""
+        tracker_file = '/app/data/pyramid_tracker.json'
+        try:
+            with open(tracker_file, 'w', encoding='utf-8') as f:
+                json.dump(self.pyramid_tracker, f, ensure_ascii=False, indent=2, default=float)
+        except Exception as e:
+            print(f"⚠️ pyramid_tracker 저장 실패: {e}")
+
+    def _clear_tracker(self, stock_code):
+        """전량 청산 → 분할 매수/1차 익절 상태 삭제"""
+        if self.pyramid_tracker.pop(stock_code, None) is not None:
+            self._save_pyramid_tracker()
+
+    def prefetch_prices(self, stock_codes):
+        """감시 종목 현재가 일괄 조회 (멀티 시세) → 이후 현재가 조회에 재사용
+
+        Args:
+            stock_codes: 종목 코드 리스트
+        """
+        with self._price_lock:
+            return self._fetch_prices(list(stock_codes))
+
+    def _fetch_prices(self, stock_codes):
+        """현재가 일괄 조회 → 시세 메모 (_price_lock 안에서 호출)"""
+        self.price_codes = stock_codes
+        quotes = self.api.get_current_prices(stock_codes)
+        self.market_data.put_quotes("price", {code: quote['price'] for code, quote in quotes.items()})
+        self.market_data.put_quotes("quote", quotes)  # 🆕 시가/고가/저가/거래량 (1차 선별 오늘 봉)
+        print(f"💰 현재가 일괄 조회: {len(quotes)}/{len(stock_codes)}개")
+        return quotes
+
+    def prefetch_indicators(self, stock_codes, count=30, screen=False):
+        """감시 종목 지표 일괄 계산 (종목 x 봉 2차원 배열 한 번에)
+
+        이후 check_buy_signals / detect_market_regime / 포지션 사이징은 메모에서 바로 조회
+
+        Args:
+            stock_codes: 종목 코드 리스트
+            count: 일봉 개수 (check_buy_signals와 같은 30개)
+            screen: True면 1차 선별용 일봉 (저장된 일봉 + 일괄 시세, 종목별 API 호출 없음)
+
+        Returns:
+            dict: {종목코드: 지표 dict}
+        """
+        bars_by_code = {}
+        for code in stock_codes:
+            bars = self.screen_bars(code, count) if screen else self.get_bars(code, count)
+            if bars is not None and len(bars) > 0:
+                bars_by_code[code] = bars
+
+        results = self.indicators.get_many(bars_by_code)
+        print(f"🧮 지표 일괄 계산: {len(results)}/{len(stock_codes)}개")
+        return results
+
+    def _get_current_price(self, stock_code):
+        """현재가 조회 (1분 이내 조회 결과 재사용, 일괄 조회 대상이면 일괄 재조회)"""
+        price = self.market_data.quote("price", stock_code)
+        if price is not None:
+            return price
+
+        if stock_code in self.price_codes:
+            with self._price_lock:
+                # 기다리는 동안 다른 스레드가 재조회했으면 그 결과 사용 (만료 시 일괄 조회 1회)
+                price = self.market_data.quote("price", stock_code)
+                if price is None:
+                    self._fetch_prices(self.price_codes)
+                    price = self.market_data.quote("price", stock_code)
+            return price
+
+        return self.market_data.quote("price", stock_code, lambda: self.api.get_current_price(stock_code))
+
+    def get_portfolio(self):
+        """계좌 스냅샷 (실행 시작 시 1회 조회, 이후 내 주문 체결로 로컬 갱신)"""
+        return self.portfolio.snapshot()
+
+    def _place_order(self, side, stock_code, quantity, price):
+        """주문 + 계좌 스냅샷 갱신 (성공 시 체결 반영, 예외 시 다음 조회에서 재동기화)
+
+        Args:
+            side: 'buy' 또는 'sell'
+            price: 체결 추정가 (주문 시점 현재가)
+        """
+        order_fn = self.api.buy_stock if side == 'buy' else self.api.sell_stock
+        priority = PRIORITY_EXIT if side == 'sell' else current_priority()  # 매도(청산)는 스캔 호출보다 먼저
+        try:
+            with request_priority(priority):
+                result = order_fn(stock_code, quantity)
+        except Exception:
+            self.portfolio.mark_stale()
+            raise
+        if result:
+            self.portfolio.apply_fill(stock_code, quantity if side == 'buy' else -quantity, price)
+        return result
+
+    def build_context(self, stock_code, portfolio=None):
+        """종목 평가 스냅샷 생성 - 일봉/지표/현재가/분봉/수급을 한 번씩만 조회
+
+        Args:
+            stock_code: 종목 코드
+            portfolio: PortfolioView (매매 판단 시 전달, 조회만 할 때는 None)
+
+        Returns:
+            EvalContext
+        """
+        bars = self.get_bars(stock_code, count=30)
+        values = self.indicators.get(stock_code, bars) if bars is not None and len(bars) > 0 else None
+
+        price = self._get_current_price(stock_code)
+        try:
+            price = int(price) if price is not None else None
+        except (TypeError, ValueError):
+            price = None
+
+        # 분봉 (최근 30분) - 시각 기준 조회
+        current_time = datetime.now().strftime('%H%M%S')
+        minute_df = self.market_data.quote(
+            "minute", stock_code, lambda: self.api.get_minute_ohlcv(stock_code, time_end=current_time)
+        )
 
-    def get_sector_exposure(self, sector_name):
-        """✅ 특정 섹터의 현재 노출도 계산 (하드코딩 제거)"""
+        try:
+            investor = self.market_data.quote(
+                "investor", stock_code, lambda: self.api.get_investor_trading(stock_code)
+            )
+        except Exception as e:
+            print(f"⚠️ 기관 데이터 조회 실패: {e}")
+            investor = None
+
+        return EvalContext(stock_code, bars, values, price, minute_df, investor, portfolio)
+
+    def build_tick_context(self, stock_code, price):
+        """실시간 체결가 기준 평가 스냅샷 (exit_engine 청산용)
+
+        일봉/지표는 메모 재사용, 현재가는 틱 가격 → 현재가/분봉/수급 API 호출 없음
+        """
+        self.market_data.put_quotes("price", {stock_code: price})  # 이후 스캔도 최신 체결가 사용
+        bars = self.get_bars(stock_code, count=30)
+        values = self.indicators.get(stock_code, bars) if bars is not None and len(bars) > 0 else None
+        return EvalContext(stock_code, bars, values, price, portfolio=self.get_portfolio())
+
+    def get_current_holdings_count(self, portfolio=None):
+        """현재 보유 종목 수 (계좌 스냅샷 기준)"""
+        if portfolio is None:
+            portfolio = self.get_portfolio()
+        return portfolio.holdings_count
+
+    def get_sector_exposure(self, sector_name, portfolio=None):
+        """✅ 특정 섹터의 현재 노출도 계산 (계좌 스냅샷 기준, 실제 총평가금액 사용)"""
         try:
             from watchlist import WATCHLIST
             sector_stocks = WATCHLIST.get(sector_name, [])
             sector_codes = [code for code, name in sector_stocks]
 
-            balance = self.api.get_balance()
-            if not balance or 'output1' not in balance or 'output2' not in balance:
-                return 0.0
-
-            # ✅ 실제 총평가금액 사용 (하드코딩 제거)
-            total_assets = int(balance['output2'][0].get('tot_evlu_amt', 0))
-            if total_assets == 0:
+            if portfolio is None:
+                portfolio = self.get_portfolio()
+            if not portfolio.loaded or portfolio.total_assets == 0:
                 return 0.0
-
-            total_sector_value = 0
-            for stock in balance['output1']:
-                stock_code = stock.get('pdno')
-                if stock_code in sector_codes:
-                    qty = int(stock.get('hldg_qty', 0))
-                    price = int(stock.get('prpr', 0))
-                    total_sector_value += qty * price
-
-            return total_sector_value / total_assets
+            return portfolio.value_of(sector_codes) / portfolio.total_assets
         except Exception as e:
             print(f"⚠️ 섹터 노출도 계산 실패: {e}")
             return 0.0
@@ -105,117 +268,69 @@ class AdvancedTradingStrategy:
             pass
         return None
 
-    def get_ohlcv(self, stock_code, count=100):
-        """일봉 데이터 조회"""
-        url = f"{self.api.config.BASE_URL}/uapi/domestic-stock/v1/quotations/inquire-daily-price"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.api.access_token}",
-            "appkey": self.api.config.APP_KEY,
-            "appsecret": self.api.config.APP_SECRET,
-            "tr_id": "FHKST01010400"
-        }
-
-        params = {
-            "fid_cond_mrkt_div_code": "J",
-            "fid_input_iscd": stock_code,
-            "fid_org_adj_prc": "0",
-            "fid_period_div_code": "D"
-        }
-
-        self.api._rate_limit()
-        res = requests.get(url, headers=headers, params=params)
-
-        if res.status_code == 200:
-            result = res.json()
-
-            # 디버깅: 응답 확인
-            if 'output' not in result:
-                print(f"❌ output 키가 없습니다: {result}")
-                return None
-
-            data = result['output']
-
-            if not data or len(data) == 0:
-                print(f"❌ 데이터가 비어있습니다")
-                return None
-
-            print(f"✅ {len(data)}개의 일봉 데이터 수신")
-
-            # 최신 데이터가 먼저 오므로 역순으로 정렬
-            df = pd.DataFrame(data)
-            df = df.iloc[:count][::-1].reset_index(drop=True)
-
-            # 컬럼명 변경 및 타입 변환
-            df['date'] = pd.to_datetime(df['stck_bsop_date'])
-            df['open'] = df['stck_oprc'].astype(int)
-            df['high'] = df['stck_hgpr'].astype(int)
-            df['low'] = df['stck_lwpr'].astype(int)
-            df['close'] = df['stck_clpr'].astype(int)
-            df['volume'] = df['acml_vol'].astype(int)
-
-            return df[['date', 'open', 'high', 'low', 'close', 'volume']]
-        else:
-            print("❌ 데이터 조회 실패:", res.text)
-            return None
-
-    def check_buy_signals(self, stock_code):
-        """✅ 매수 신호 체크 (분봉 + 일봉 혼합, 가중치 개선)"""
-        WEIGHTS = {
-            'MA': 2.0,         # 추세
-            'RSI': 1.0,        # 모멘텀
-            'MACD': 1.5,       # 추세 변화
-            'Volume': 2.0,     # 거래량
-            'BB': 1.0,         # 변동성
-            'MinuteMomentum': 1.5,  # 🆕 분봉 단기 모멘텀
-            'InstitutionalFlow': 1.0  # 🆕 기관 매매 흐름
-        }
-        MAX_WEIGHTED_SCORE = sum(WEIGHTS.values())  # 10.0
+    def get_bars(self, stock_code, count=100):
+        """일봉 데이터 조회 (OHLCVBars, 로컬 저장소 + 같은 실행 중에는 메모 재사용)"""
+        def fetch(n):
+            bars = self.bar_store.get(stock_code, count=n)
+            if bars is not None:
+                print(f"✅ {len(bars)}개의 일봉 데이터 로드")
+            return bars
+
+        return self.market_data.bars("daily", stock_code, count, fetch)
+
+    def screen_bars(self, stock_code, count=30):
+        """1차 선별용 일봉 - 저장된 일봉 + 일괄 시세로 만든 오늘 봉 (일봉 API 호출 없음)
+
+        저장된 일봉이 없거나 SCREEN_STALE_DAYS보다 오래됐으면 증분 업데이트 1회
+        (후보/보유 종목은 전체 분석 단계의 get_bars에서 갱신)
+        """
+        bars = self.bar_store.get(stock_code, count=count, update=False)
+        today = datetime.now()
+        stale = int((today - timedelta(days=self.SCREEN_STALE_DAYS)).strftime('%Y%m%d'))
+        if bars is None or len(bars) < count or bars.date[-1] < stale:
+            bars = self.bar_store.get(stock_code, count=count)
+        quote = self.market_data.quote("quote", stock_code)
+        if bars is None or quote is None or not quote['open']:
+            return bars  # 장 시작 전 (오늘 시가 없음) → 저장된 일봉만
+
+        # 오늘 봉 추가 (장중에 저장된 오늘 봉이 있으면 교체)
+        # 주말에는 시세 = 마지막 거래일 → 마지막 저장 봉이 그 전일(종가 = 시세 전일 종가)일 때만 추가
+        date = int(today.strftime('%Y%m%d'))
+        if bars.date[-1] == date or (today.weekday() >= 5 and bars.close[-1] != quote['prev_close']):
+            date = int(bars.date[-1])
+        return bars.with_bar(date, quote['open'], quote['high'], quote['low'],
+                             quote['price'], quote['volume']).tail(count)
 
+    def get_ohlcv(self, stock_code, count=100):
+        """일봉 데이터 조회 (DataFrame)"""
+        bars = self.get_bars(stock_code, count)
+        return bars.to_frame() if bars is not None else None
+
+    def _minute_ma5(self, stock_code, minute_df):
+        """분봉 5분 이평 (지난 호출 이후 새로 들어온 분봉 + 진행 중인 분봉만 반영)"""
+        minutes = minute_df['datetime'].to_numpy().astype('datetime64[m]').astype('int64').tolist()
+        closes = minute_df['close'].tolist()
+
+        stream = self.minute_ma.get(stock_code)
+        if stream is None or stream.key < minutes[0]:
+            # 처음이거나 마지막 반영 이후 빠진 분봉이 있을 수 있음 → 새로 시작
+            stream = self.minute_ma[stock_code] = StreamingSMA(5)
+
+        for minute, close in zip(minutes, closes):
+            if stream.key is None or minute >= stream.key:
+                stream.push(minute, float(close))
+        return stream.value
+
+    def _daily_signals(self, latest, prev):
+        """일봉 지표 신호 (추세/RSI/MACD/거래량/볼린저) - check_buy_signals와 1차 선별이 함께 사용
+
+        Returns:
+            tuple: (가중치 점수, 상세 내역)
+        """
+        WEIGHTS = self.SIGNAL_WEIGHTS
         weighted_score = 0.0
         signal_details = []
 
-        # ✅ 분봉 데이터로 단기 추세 확인 (최근 30분)
-        from datetime import datetime
-        now = datetime.now()
-        current_time = now.strftime('%H%M%S')
-
-        minute_df = self.api.get_minute_ohlcv(stock_code, time_end=current_time)
-
-        # 일봉 데이터로 중장기 추세 확인
-        df = self.get_ohlcv(stock_code, count=30)
-
-        if df is None:
-            return 0, ["❌ 일봉 데이터 조회 실패"]
-
-        if len(df) < 20:
-            return 0, [f"❌ 데이터 부족 (필요: 20개, 실제: {len(df)}개)"]
-
-        print(f"✅ 일봉 데이터: {len(df)}개, 분봉 데이터: {len(minute_df) if minute_df is not None else 0}개")
-
-        # 이동평균 계산
-        df['MA5'] = df['close'].rolling(5).mean()
-        df['MA20'] = df['close'].rolling(20).mean()
-
-        # RSI 계산
-        df['RSI'] = ta.momentum.rsi(df['close'], window=14)
-
-        # MACD 계산
-        macd = ta.trend.MACD(df['close'])
-        df['MACD'] = macd.macd()
-        df['MACD_signal'] = macd.macd_signal()
-        df['MACD_hist'] = macd.macd_diff()
-
-        # 볼린저 밴드
-        bb = ta.volatility.BollingerBands(df['close'])
-        df['BB_upper'] = bb.bollinger_hband()
-        df['BB_middle'] = bb.bollinger_mavg()
-        df['BB_lower'] = bb.bollinger_lband()
-
-        latest = df.iloc[-1]
-        prev = df.iloc[-2]
-
         # 1. 추세 확인 (MA5 > MA20만 체크, MA60 제외) - 가중치 2.0
         if pd.notna(latest['MA5']) and pd.notna(latest['MA20']):
             if latest['MA5'] > latest['MA20']:
@@ -252,8 +367,7 @@ class AdvancedTradingStrategy:
             signal_details.append("❌ MACD 계산 불가")
 
         # 4. ✅ 거래량 확인 - 기준 상향 (1.5배 기준)
-        avg_volume = df['volume'].tail(20).mean()
-        volume_ratio = latest['volume'] / avg_volume
+        volume_ratio = latest['VOL_RATIO']  # 거래량 / 20일 평균 (지표 일괄 계산 결과)
 
         if volume_ratio > 2.0:
             # 2.0배 이상 - 매우 강한 신호
@@ -285,14 +399,104 @@ class AdvancedTradingStrategy:
         else:
             signal_details.append("❌ 볼린저밴드 계산 불가")
 
+        return weighted_score, signal_details
+
+    def screen_score(self, stock_code):
+        """1차 선별 점수 - 일괄 시세 + 저장된 일봉만 사용 (분봉/수급/개별 시세 조회 없음)
+
+        Returns:
+            float: 일봉 가중치 점수 (일봉 부족/시세 없음이면 None)
+        """
+        if self.market_data.quote("price", stock_code) is None:
+            return None  # 일괄 시세에 없음 (거래정지 등)
+
+        bars = self.screen_bars(stock_code, count=30)
+        if bars is None or len(bars) < 20:
+            return None
+
+        values = self.indicators.get(stock_code, bars)
+        score, _ = self._daily_signals(row(values, -1), row(values, -2))
+        return score
+
+    def exit_thresholds(self, stock_code):
+        """손절선, 1차/2차 익절 목표 (%) - 매수 시 pyramid_tracker에 저장된 값, 없으면 기본값"""
+        tracker = self.pyramid_tracker.get(stock_code)
+        if tracker:
+            return (-tracker.get('stop_loss_pct', 0.05) * 100,
+                    tracker.get('profit_target_1', 12.0),
+                    tracker.get('profit_target_2', 20.0))
+        return -5.0, 12.0, 20.0
+
+    def poll_profile(self, stock_code):
+        """적응형 스캔 주기 재료 (poll_scheduler) - 저장된 일봉 + 지표 메모 + 계좌 스냅샷만 사용
+
+        Returns:
+            dict: atr_pct, volume_ratio, held, level_distance (일봉 부족이면 None)
+        """
+        bars = self.get_bars(stock_code, count=30)
+        if bars is None or len(bars) < 21:
+            return None
+
+        latest = row(self.indicators.get(stock_code, bars), -1)
+        close = bars.close[-1]
+        avg_volume = bars.volume[-21:-1].mean()
+        quantity, profit_rate = self.get_portfolio().position(stock_code)
+
+        level_distance = None
+        if quantity:
+            levels = list(self.exit_thresholds(stock_code))
+            if self.peak_profit.get(stock_code, 0) >= 10.0:
+                levels.append(self.peak_profit[stock_code] - 3.0)  # 트레일링 스탑선
+            level_distance = min(abs(profit_rate - level) for level in levels)
+
+        return {
+            'atr_pct': latest['ATR'] / close * 100 if pd.notna(latest['ATR']) and close else 0.0,
+            'volume_ratio': bars.volume[-1] / avg_volume if avg_volume else 0.0,
+            'held': quantity > 0,
+            'level_distance': level_distance
+        }
+
+    def check_buy_signals(self, stock_code, ctx=None):
+        """✅ 매수 신호 체크 (분봉 + 일봉 혼합, 가중치 개선)
+
+        Args:
+            stock_code: 종목 코드
+            ctx: EvalContext (없으면 새로 조회)
+        """
+        WEIGHTS = self.SIGNAL_WEIGHTS
+        MAX_WEIGHTED_SCORE = sum(WEIGHTS.values())  # 10.0
+
+        if ctx is None:
+            ctx = self.build_context(stock_code)
+
+        # ✅ 분봉 데이터로 단기 추세 확인 (최근 30분)
+        minute_df = ctx.minute_df
+
+        # 일봉 데이터로 중장기 추세 확인
+        bars = ctx.bars
+
+        if bars is None:
+            return 0, ["❌ 일봉 데이터 조회 실패"]
+
+        if len(bars) < 20:
+            return 0, [f"❌ 데이터 부족 (필요: 20개, 실제: {len(bars)}개)"]
+
+        print(f"✅ 일봉 데이터: {len(bars)}개, 분봉 데이터: {len(minute_df) if minute_df is not None else 0}개")
+
+        # 지표 (스냅샷에서 조회 - MA, RSI, MACD, 볼린저 밴드 등)
+        latest = ctx.latest
+        prev = ctx.prev
+
+        # 1~5. 일봉 신호 (추세/RSI/MACD/거래량/볼린저)
+        weighted_score, signal_details = self._daily_signals(latest, prev)
+
         # 🆕 6. 분봉 단기 모멘텀 - 가중치 1.5
         if minute_df is not None and len(minute_df) >= 10:
-            minute_df['MA5'] = minute_df['close'].rolling(5).mean()
+            minute_ma5 = self._minute_ma5(stock_code, minute_df)
             minute_latest = minute_df.iloc[-1]
-            minute_prev = minute_df.iloc[-2]
 
             # 분봉 5분 이평 상승 체크
-            if pd.notna(minute_latest['MA5']) and minute_latest['close'] > minute_latest['MA5']:
+            if pd.notna(minute_ma5) and minute_latest['close'] > minute_ma5:
                 # 최근 10분봉 대비 현재가 상승률
                 price_change_10m = (minute_latest['close'] - minute_df['close'].iloc[-10]) / minute_df['close'].iloc[-10] * 100
 
@@ -313,7 +517,7 @@ class AdvancedTradingStrategy:
 
         # 🆕 7. 기관 매매 흐름 (기관/외인 순매수) - 가중치 1.0
         try:
-            investor_data = self.api.get_investor_trading(stock_code)
+            investor_data = ctx.investor
             if investor_data:
                 # 기관 + 외인 순매수 합계
                 institution_net = investor_data.get('institution_net', 0)
@@ -340,38 +544,31 @@ class AdvancedTradingStrategy:
 
         return signals, signal_details
 
-    def detect_market_regime(self, stock_code):
+    def detect_market_regime(self, stock_code, ctx=None):
         """시장 상태 감지: trending, sideways, crash"""
-        df = self.get_ohlcv(stock_code, count=30)
-        if df is None or len(df) < 20:
-            return "unknown", {}
-
-        # ADX (Average Directional Index) 계산 - 추세 강도 측정
-        adx_indicator = ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=14)
-        df['ADX'] = adx_indicator.adx()
+        if ctx is None:
+            ctx = self.build_context(stock_code)
 
-        # ATR 계산
-        df['ATR'] = ta.volatility.average_true_range(df['high'], df['low'], df['close'], window=14)
-
-        # 이동평균 계산
-        df['MA5'] = df['close'].rolling(5).mean()
-        df['MA20'] = df['close'].rolling(20).mean()
+        bars = ctx.bars
+        if not ctx.has_bars(20):
+            return "unknown", {}
 
-        latest = df.iloc[-1]
-        prev_5 = df.iloc[-5:] if len(df) >= 5 else df
+        # ADX(추세 강도), ATR, 이동평균 - 스냅샷에서 조회
+        latest = ctx.latest
 
         # 최근 5일 가격 변화율 (일봉 종가 기준)
-        price_change_5d = (latest['close'] - prev_5['close'].iloc[0]) / prev_5['close'].iloc[0] * 100
+        close_5d_ago = bars.close[-5]
+        price_change_5d = (latest['close'] - close_5d_ago) / close_5d_ago * 100
 
         # 변동성 계산 (최근 20일 표준편차) - 먼저 계산
-        volatility = df['close'].tail(20).std() / df['close'].tail(20).mean() * 100
+        recent = bars.close[-20:]
+        volatility = recent.std(ddof=1) / recent.mean() * 100
 
         # ✅ 장중 현재가 기반 변화율 추가 (None 체크 강화)
         try:
-            current_price_str = self.api.get_current_price(stock_code)
-            if current_price_str is None:
+            current_price = ctx.price
+            if current_price is None:
                 raise ValueError("현재가 조회 결과 None")
-            current_price = int(current_price_str)
             # 전날 종가 대비 오늘 현재가 변화율
             intraday_change = (current_price - latest['close']) / latest['close'] * 100
         except Exception as e:
@@ -421,80 +618,63 @@ class AdvancedTradingStrategy:
 
         return "unknown", regime_info
 
-    def calculate_position_size(self, stock_code, account_balance, regime="unknown"):
+    def calculate_position_size(self, stock_code, account_balance, regime="unknown", ctx=None):
         """✅ 포지션 사이징 (변동성 기반 손절 + ATR 동적 목표가)"""
-        df = self.get_ohlcv(stock_code, count=30)
-        if df is None or len(df) < 14:
+        if ctx is None:
+            ctx = self.build_context(stock_code)
+
+        if not ctx.has_bars(14):
             return 0, 0, 0, 0.05, 12.0, 20.0  # ✅ 기본 목표가 추가
 
-        # ATR 계산
-        atr = ta.volatility.average_true_range(
-            df['high'], df['low'], df['close'], window=14
-        ).iloc[-1]
+        # ATR (스냅샷 지표)
+        atr = ctx.latest['ATR']
 
-        current_price_str = self.api.get_current_price(stock_code)
-        if current_price_str is None:
+        current_price = ctx.price
+        if current_price is None:
             print("❌ 현재가 조회 실패 - 기본 손절가 사용")
             return 0, 0, 0, 0.05, 12.0, 20.0
-        current_price = int(current_price_str)
-
-        # ATR을 퍼센트로 변환
-        atr_pct = (atr / current_price) * 100
 
-        # 기본 손절 퍼센트 설정
-        base_stop_loss_pct = 0.03 if regime == "crash" else 0.05
-
-        # 변동성에 따라 손절 퍼센트 조정
-        if atr_pct < 2.0:
-            adjusted_stop_loss_pct = base_stop_loss_pct * 0.8
-        elif atr_pct > 5.0:
-            adjusted_stop_loss_pct = base_stop_loss_pct * 1.5
-        else:
-            adjusted_stop_loss_pct = base_stop_loss_pct
-
-        adjusted_stop_loss_pct = max(0.03, min(adjusted_stop_loss_pct, 0.08))
-
-        # ✅ ATR 기반 동적 목표가 설정
-        if atr_pct < 2.0:
-            # 낮은 변동성: 보수적 목표가
-            profit_target_1 = 10.0
-            profit_target_2 = 18.0
-        elif atr_pct > 5.0:
-            # 높은 변동성: 공격적 목표가
-            profit_target_1 = 15.0
-            profit_target_2 = 25.0
-        else:
-            # 보통 변동성: 기본 목표가
-            profit_target_1 = 12.0
-            profit_target_2 = 20.0
-
-        # 2% 리스크 기준 수량 계산
-        risk_amount = account_balance * 0.02
-        stop_loss_amount = current_price * adjusted_stop_loss_pct
-        shares = int(risk_amount / stop_loss_amount)
+        # 변동성 기반 손절 / ATR 동적 목표가 / 2% 리스크 수량 (백테스트와 같은 순수 함수)
+        shares, stop_loss_pct, profit_target_1, profit_target_2 = size_position(
+            account_balance, current_price, atr, regime
+        )
 
-        # 횡보장 포지션 축소
-        if regime == "sideways":
-            shares = int(shares * 0.5)
+        return shares, current_price, atr, stop_loss_pct, profit_target_1, profit_target_2
 
-        # 한 종목 최대 10% 제한
-        max_position_pct = 0.05 if regime == "sideways" else 0.10
-        max_position = account_balance * max_position_pct
-        max_shares = int(max_position / current_price)
+    def evaluate(self, stock_code, ctx):
+        """시장 상태 + 매수 신호 계산 (주문/잔고 없음 - 스캐너 분석 단계에서 병렬 실행)
 
-        shares = min(shares, max_shares)
+        Returns:
+            tuple: (regime, regime_info, signals, details)
+        """
+        regime, regime_info = self.detect_market_regime(stock_code, ctx)
+        signals, details = self.check_buy_signals(stock_code, ctx)
+        return regime, regime_info, signals, details
 
-        return shares, current_price, atr, adjusted_stop_loss_pct, profit_target_1, profit_target_2
+    def execute_strategy(self, stock_code, stock_name, portfolio=None, ctx=None, evaluation=None):
+        """전략 실행
 
-    def execute_strategy(self, stock_code, stock_name):
-        """전략 실행"""
+        Args:
+            stock_code: 종목 코드
+            stock_name: 종목명
+            portfolio: PortfolioView (없으면 잔고 1회 조회)
+            ctx: 미리 만든 EvalContext (스캐너에서 전달, 계좌는 실행 시점 스냅샷으로 교체)
+            evaluation: 미리 계산한 evaluate() 결과
+        """
         print(f"\n{'=' * 60}")
         print(f"🎯 3단 로켓 전략 실행: {stock_name} ({stock_code})")
         print(f"{'=' * 60}\n")
 
         try:
-            # 0단계: 시장 상태 감지
-            regime, regime_info = self.detect_market_regime(stock_code)
+            # 평가 스냅샷 (일봉/지표/현재가/분봉/수급/잔고 한 번씩 조회 → 모든 단계가 같은 값 사용)
+            portfolio = portfolio if portfolio is not None else self.get_portfolio()
+            if ctx is None:
+                ctx = self.build_context(stock_code, portfolio)
+            else:
+                ctx = ctx.with_portfolio(portfolio)
+
+            # 0단계: 시장 상태 감지 + 1단계: 매수 신호 확인
+            regime, regime_info, signals, details = evaluation or self.evaluate(stock_code, ctx)
             print(f"🌐 시장 상태: {regime.upper()}")
             if regime_info:
                 adx = regime_info.get('adx', 0) or 0
@@ -514,20 +694,16 @@ class AdvancedTradingStrategy:
                 if regime == "crash":
                     self.notifier.notify_market_regime(stock_name, stock_code, regime, regime_info)
 
-            # 1단계: 매수 신호 확인
-            signals, details = self.check_buy_signals(stock_code)
-
             print("📊 매수 신호 체크:")
             for detail in details:
                 print(f"  {detail}")
             print(f"\n신호 점수: {signals}/5")
 
-            # 현재가 조회 (None 체크)
-            current_price_str = self.api.get_current_price(stock_code)
-            if current_price_str is None:
+            # 현재가 (None 체크)
+            current_price = ctx.price
+            if current_price is None:
                 print("❌ 현재가 조회 실패 - 종목 스킵")
                 return
-            current_price = int(current_price_str)
 
             # 🔔 강한 신호면 디스코드 알림
             if signals >= 4:
@@ -537,21 +713,9 @@ class AdvancedTradingStrategy:
             elif signals == 3:
                 self.notifier.notify_signal_weak(stock_name, stock_code, signals)
 
-            # 2단계: 잔고 확인
-            balance = self.api.get_balance()
-            cash = 0
-            holding_qty = 0
-            profit_rate = 0
-
-            if balance and 'output2' in balance:
-                cash = int(balance['output2'][0]['dnca_tot_amt'])
-
-            if balance and 'output1' in balance:
-                for stock in balance['output1']:
-                    if stock.get('pdno') == stock_code and int(stock.get('hldg_qty', 0)) > 0:
-                        holding_qty = int(stock.get('hldg_qty', 0))
-                        profit_rate = float(stock.get('evlu_pfls_rt', 0))
-                        break
+            # 2단계: 잔고 확인 (스냅샷)
+            cash = ctx.portfolio.cash
+            holding_qty, profit_rate = ctx.portfolio.position(stock_code, ctx.price)
 
             print(f"\n💰 계좌 상태:")
             print(f"  예수금: {cash:,}원")
@@ -567,7 +731,7 @@ class AdvancedTradingStrategy:
 
             # 3단계: 매매 결정 (시장 상태에 따라 분기)
             if holding_qty > 0:
-                self._manage_position(stock_code, stock_name, holding_qty, profit_rate, regime)
+                self._manage_position(stock_code, stock_name, holding_qty, profit_rate, regime, ctx, signals)
             else:
                 # 🚨 급락장: 신호가 강해도 매수 금지
                 if regime == "crash":
@@ -575,7 +739,7 @@ class AdvancedTradingStrategy:
                     return
 
                 # 🆕 보유 종목 수 제한 체크
-                current_holdings = self.get_current_holdings_count()
+                current_holdings = self.get_current_holdings_count(ctx.portfolio)
                 if current_holdings >= self.max_holdings:
                     print(f"\n⚠️ 보유 종목 한도 초과 ({current_holdings}/{self.max_holdings}) - 매수 보류")
                     return
@@ -583,7 +747,7 @@ class AdvancedTradingStrategy:
                 # ✅ 섹터 분산 한도 체크 (섹터당 30%, 하드코딩 제거)
                 stock_sector = self.get_stock_sector(stock_code)
                 if stock_sector:
-                    sector_exposure = self.get_sector_exposure(stock_sector)
+                    sector_exposure = self.get_sector_exposure(stock_sector, ctx.portfolio)
                     if sector_exposure >= 0.30:
                         print(f"\n⚠️ 섹터 한도 초과 ({stock_sector}: {sector_exposure*100:.1f}% / 30%) - 매수 보류")
                         return
@@ -617,7 +781,7 @@ class AdvancedTradingStrategy:
                     if signals >= 2:
                         print(f"\n📊 횡보장 - 신호 확인! ({signals}/5)")
                         print(f"  ⚠️ 횡보장이므로 포지션 크기 50% 축소")
-                        self._execute_buy(stock_code, stock_name, cash, signals, regime)
+                        self._execute_buy(stock_code, stock_name, cash, signals, regime, ctx)
                     else:
                         print(f"\n❌ 횡보장 - 신호 부족 ({signals}/5, 필요: 2+) - 대기")
 
@@ -625,7 +789,7 @@ class AdvancedTradingStrategy:
                 elif regime == "trending":
                     if signals >= 2:
                         print(f"\n📈 추세장 - 신호 확인! ({signals}/5)")
-                        self._execute_buy(stock_code, stock_name, cash, signals, regime)
+                        self._execute_buy(stock_code, stock_name, cash, signals, regime, ctx)
                     else:
                         print(f"\n❌ 매수 신호 부족 ({signals}/5, 필요: 2+) - 대기")
 
@@ -633,7 +797,7 @@ class AdvancedTradingStrategy:
                 else:
                     if signals >= 3:
                         print(f"\n❓ 시장 상태 불명확 - 신호 확인! ({signals}/5)")
-                        self._execute_buy(stock_code, stock_name, cash, signals, regime)
+                        self._execute_buy(stock_code, stock_name, cash, signals, regime, ctx)
                     else:
                         print(f"\n❌ 시장 상태 불명확 - 신호 부족 ({signals}/5, 필요: 3+) - 대기")
 
@@ -653,24 +817,25 @@ class AdvancedTradingStrategy:
             # 에러는 기록하되 프로그램은 계속 진행
             pass
 
-    def _execute_buy(self, stock_code, stock_name, cash, signals, regime="unknown"):
+    def _execute_buy(self, stock_code, stock_name, cash, signals, regime="unknown", ctx=None):
         """✅ 매수 실행 (분할 매수 + ATR 동적 목표가)"""
         print(f"\n🎯 강한 매수 신호! ({signals}/5)")
 
+        if ctx is None:
+            ctx = self.build_context(stock_code, self.get_portfolio())
+
         # ✅ 실제 총평가액 사용 (하드코딩 제거)
-        balance = self.api.get_balance()
-        if balance and 'output2' in balance:
-            total_balance = int(balance['output2'][0].get('tot_evlu_amt', 0))
-            if total_balance == 0:
-                print("❌ 계좌 잔고 조회 실패 - 매수 중단")
-                return
-        else:
+        if not ctx.portfolio.loaded:
             print("❌ 계좌 정보 조회 실패 - 매수 중단")
             return
+        total_balance = ctx.portfolio.total_assets
+        if total_balance == 0:
+            print("❌ 계좌 잔고 조회 실패 - 매수 중단")
+            return
 
         # ✅ ATR 동적 목표가 포함
         shares, current_price, atr, stop_loss_pct, target_1, target_2 = self.calculate_position_size(
-            stock_code, total_balance, regime
+            stock_code, total_balance, regime, ctx
         )
 
         if shares == 0:
@@ -693,7 +858,7 @@ class AdvancedTradingStrategy:
 
         if first_buy > 0:
             print(f"\n💰 1차 매수 실행: {first_buy}주 (40%)")
-            result = self.api.buy_stock(stock_code, first_buy)
+            result = self._place_order('buy', stock_code, first_buy, current_price)
 
             if result:
                 print("✅ 매수 성공!")
@@ -709,8 +874,10 @@ class AdvancedTradingStrategy:
                     'atr': atr,
                     'regime': regime,
                     'profit_target_1': target_1,  # ✅ 추가
-                    'profit_target_2': target_2   # ✅ 추가
+                    'profit_target_2': target_2,  # ✅ 추가
+                    'partial_taken': False        # 🆕 1차 익절 완료 여부 (보유 중 1회)
                 }
+                self._save_pyramid_tracker()
 
                 # 📝 일지 기록
                 strategy_note = f"신호 {signals}/5 | 시장: {regime} | 손절가: {stop_loss_price:,}원 (-{stop_loss_pct*100:.0f}%) | 분할: 1/2"
@@ -739,18 +906,30 @@ class AdvancedTradingStrategy:
                 # 매수 실패 알림
                 self.notifier.notify_buy_failed(stock_name, stock_code, "주문 실패 (장 마감 또는 예수금 부족)")
 
-    def _manage_position(self, stock_code, stock_name, quantity, profit_rate, regime="unknown"):
-        """포지션 관리 (익절/손절/추가매수)"""
+    def _manage_position(self, stock_code, stock_name, quantity, profit_rate, regime="unknown", ctx=None, signals=None):
+        """포지션 관리 (익절/손절/추가매수)
+
+        Args:
+            ctx: EvalContext (없으면 새로 조회)
+            signals: execute_strategy에서 계산한 신호 점수 (없으면 ctx로 계산)
+        """
         print(f"\n📊 포지션 관리 중...")
 
-        current_price_str = self.api.get_current_price(stock_code)
-        if current_price_str is None:
+        if ctx is None:
+            ctx = self.build_context(stock_code)
+        if signals is None:
+            signals, _ = self.check_buy_signals(stock_code, ctx)
+
+        current_price = ctx.price
+        if current_price is None:
             print("❌ 현재가 조회 실패 - 포지션 관리 스킵")
             return
-        current_price = int(current_price_str)
 
-        # 🚨 급락장 감지 시 차등 청산
-        if regime == "crash":
+        # 🚨 급락장 감지 시 차등 청산 (부분 청산은 보유 중 1회 → 이후 남은 물량은 손절/트레일링/익절 기준)
+        crash_taken = self.pyramid_tracker.get(stock_code, {}).get('crash_taken', False)
+        if regime == "crash" and crash_taken:
+            print(f"\n🚨 급락장 - 부분 청산 완료 종목 (남은 {quantity}주는 일반 기준으로 관리)")
+        elif regime == "crash":
             print(f"\n🚨 급락장 감지! 보유 포지션 차등 청산")
 
             # 수익 중이면 50%만 청산 (이익 확보)
@@ -764,7 +943,7 @@ class AdvancedTradingStrategy:
                 print(f"  손실/소폭 수익 ({profit_rate:.2f}%) → 전량 청산")
                 sell_reason = "🚨 급락장 긴급 전량 청산"
 
-            result = self.api.sell_stock(stock_code, sell_qty)
+            result = self._place_order('sell', stock_code, sell_qty, current_price)
             if result:
                 print("✅ 청산 완료")
 
@@ -792,9 +971,12 @@ class AdvancedTradingStrategy:
                 else:
                     print(f"⚠️ 매수 기록을 찾을 수 없어 매도 기록 실패: {stock_code}")
 
-                # 피라미드 추적 삭제
-                if stock_code in self.pyramid_tracker:
-                    del self.pyramid_tracker[stock_code]
+                if sell_qty < quantity:
+                    # 부분 청산 기록 (스캔 주기/실시간 청산 공통, 전량 청산 시 초기화)
+                    self.pyramid_tracker.setdefault(stock_code, {'remaining_qty': 0})['crash_taken'] = True
+                    self._save_pyramid_tracker()
+                else:
+                    self._clear_tracker(stock_code)
 
                 # ✅ 급락장 청산 기록 (재진입 방지)
                 self.sold_today[stock_code] = {
@@ -810,12 +992,8 @@ class AdvancedTradingStrategy:
             return
 
         # 🆕 추세 반전 감지 (데드크로스 + 수익 중 → 익절)
-        signals, details = self.check_buy_signals(stock_code)
-        df = self.get_ohlcv(stock_code, count=30)
-        if df is not None and len(df) >= 20:
-            df['MA5'] = df['close'].rolling(5).mean()
-            df['MA20'] = df['close'].rolling(20).mean()
-            latest = df.iloc[-1]
+        if ctx.has_bars(20):
+            latest = ctx.latest
 
             # 데드크로스 + 수익 중 → 익절
             if pd.notna(latest['MA5']) and pd.notna(latest['MA20']):
@@ -823,7 +1001,7 @@ class AdvancedTradingStrategy:
                     print(f"\n⚠️ 추세 반전 감지! (MA5 < MA20, 수익률 {profit_rate:.2f}%)")
                     print(f"  데드크로스 발생 → 수익 확보 익절")
 
-                    result = self.api.sell_stock(stock_code, quantity)
+                    result = self._place_order('sell', stock_code, quantity, current_price)
                     if result:
                         print("✅ 추세 반전 익절 완료")
 
@@ -847,8 +1025,7 @@ class AdvancedTradingStrategy:
                         else:
                             print(f"⚠️ 매수 기록을 찾을 수 없어 매도 기록 실패: {stock_code}")
 
-                        if stock_code in self.pyramid_tracker:
-                            del self.pyramid_tracker[stock_code]
+                        self._clear_tracker(stock_code)
 
                         self.notifier.notify_sell(stock_name, stock_code, quantity, current_price, profit_rate)
                     else:
@@ -872,7 +1049,7 @@ class AdvancedTradingStrategy:
                 print(f"  현재 수익률: {profit_rate:.2f}%")
                 print(f"  하락폭: {drawdown_from_peak:.2f}%")
 
-                result = self.api.sell_stock(stock_code, quantity)
+                result = self._place_order('sell', stock_code, quantity, current_price)
                 if result:
                     print("✅ 트레일링 스탑 매도 완료")
 
@@ -896,8 +1073,7 @@ class AdvancedTradingStrategy:
                     else:
                         print(f"⚠️ 매수 기록을 찾을 수 없어 매도 기록 실패: {stock_code}")
 
-                    if stock_code in self.pyramid_tracker:
-                        del self.pyramid_tracker[stock_code]
+                    self._clear_tracker(stock_code)
                     if stock_code in self.peak_profit:
                         del self.peak_profit[stock_code]
 
@@ -917,19 +1093,18 @@ class AdvancedTradingStrategy:
         # ✅ 피라미드 매수 체크 - 익절과 충돌 방지 (+5~8% 구간으로 조정)
         if stock_code in self.pyramid_tracker:
             tracker = self.pyramid_tracker[stock_code]
-            remaining_qty = tracker['remaining_qty']
+            remaining_qty = tracker.get('remaining_qty', 0)
 
             # ✅ 조건: +5~8% 구간 (1차 익절 +12% 전에 완료)
             if 5.0 <= profit_rate < 8.0 and remaining_qty > 0:
                 print(f"\n📈 피라미드 매수 조건 충족! (수익률 {profit_rate:.2f}%)")
 
-                # 추가 신호 확인
-                signals, _ = self.check_buy_signals(stock_code)
+                # 추가 신호 확인 (이번 평가 신호 재사용)
                 if signals >= 3:
                     second_buy = int(remaining_qty)
                     print(f"💰 2차 추가 매수 실행: {second_buy}주 (60%)")
 
-                    result = self.api.buy_stock(stock_code, second_buy)
+                    result = self._place_order('buy', stock_code, second_buy, current_price)
                     if result:
                         print("✅ 추가 매수 성공!")
 
@@ -945,7 +1120,8 @@ class AdvancedTradingStrategy:
                                 strategy_note=strategy_note
                             )
 
-                        del self.pyramid_tracker[stock_code]
+                        tracker['remaining_qty'] = 0  # 분할 매수 완료 (익절 상태는 유지)
+                        self._save_pyramid_tracker()
                         self.notifier.notify_pyramid_buy(stock_name, stock_code, second_buy, current_price, phase="2차")
                     else:
                         self.notifier.notify_buy_failed(stock_name, stock_code, "2차 추가매수 실패")
@@ -954,12 +1130,13 @@ class AdvancedTradingStrategy:
             elif profit_rate >= 8.0 and remaining_qty > 0:
                 # 8% 넘으면 피라미드 기회 소멸
                 print(f"⚠️ 피라미드 매수 기간 만료 (+8% 초과)")
-                del self.pyramid_tracker[stock_code]
+                tracker['remaining_qty'] = 0
+                self._save_pyramid_tracker()
 
         # 🆕 변동성 기반 손절 (매수 시 설정된 stop_loss_pct 사용)
         # pyramid_tracker에 저장된 손절 퍼센트 사용
-        if stock_code in self.pyramid_tracker:
-            stop_loss_pct = self.pyramid_tracker[stock_code].get('stop_loss_pct', 0.05)
+        if 'stop_loss_pct' in self.pyramid_tracker.get(stock_code, {}):
+            stop_loss_pct = self.pyramid_tracker[stock_code]['stop_loss_pct']
             stop_loss_threshold = -stop_loss_pct * 100
         else:
             # 기본값: 변동성 기반 동적 계산
@@ -969,7 +1146,7 @@ class AdvancedTradingStrategy:
 
         if profit_rate <= stop_loss_threshold:
             print(f"\n🚨 손절 라인! ({profit_rate}% <= {stop_loss_threshold}%)")
-            result = self.api.sell_stock(stock_code, quantity)
+            result = self._place_order('sell', stock_code, quantity, current_price)
             if result:
                 print("✅ 손절 매도 완료")
 
@@ -999,8 +1176,7 @@ class AdvancedTradingStrategy:
                     print(f"⚠️ 매수 기록을 찾을 수 없어 매도 기록 실패: {stock_code}")
 
                 # 피라미드 추적 삭제
-                if stock_code in self.pyramid_tracker:
-                    del self.pyramid_tracker[stock_code]
+                self._clear_tracker(stock_code)
 
                 # ✅ 손절 기록 (재진입 방지)
                 self.sold_today[stock_code] = {
@@ -1022,13 +1198,16 @@ class AdvancedTradingStrategy:
         else:
             target_1, target_2 = 12.0, 20.0  # 기본값
 
-        # 1차 익절 (50% 매도)
-        if profit_rate >= target_1 and quantity > 1:
+        # 1차 익절 (50% 매도) - 보유 중 1회만 (스캔 주기/실시간 청산 공통, 전량 청산 시 초기화)
+        partial_taken = self.pyramid_tracker.get(stock_code, {}).get('partial_taken', False)
+        if profit_rate >= target_1 and quantity > 1 and not partial_taken:
             sell_qty = int(quantity * 0.5)
             print(f"\n🎯 1차 익절! (+{target_1:.0f}%) - {sell_qty}주 매도")
-            result = self.api.sell_stock(stock_code, sell_qty)
+            result = self._place_order('sell', stock_code, sell_qty, current_price)
             if result:
                 print("✅ 부분 익절 완료")
+                self.pyramid_tracker.setdefault(stock_code, {'remaining_qty': 0})['partial_taken'] = True
+                self._save_pyramid_tracker()
 
                 buy_id = self.current_buy_id.get(stock_code)
                 if not buy_id:
@@ -1055,7 +1234,7 @@ class AdvancedTradingStrategy:
         # 2차 익절 (전량 매도)
         elif profit_rate >= target_2:
             print(f"\n🚀 2차 익절! (+{target_2:.0f}%) - 전량 매도")
-            result = self.api.sell_stock(stock_code, quantity)
+            result = self._place_order('sell', stock_code, quantity, current_price)
             if result:
                 print("✅ 익절 매도 완료")
 
@@ -1079,8 +1258,7 @@ class AdvancedTradingStrategy:
                 else:
                     print(f"⚠️ 매수 기록을 찾을 수 없어 매도 기록 실패: {stock_code}")
 
-                if stock_code in self.pyramid_tracker:
-                    del self.pyramid_tracker[stock_code]
+                self._clear_tracker(stock_code)
                 if stock_code in self.peak_profit:
                     del self.peak_profit[stock_code]
 
@@ -1101,8 +1279,10 @@ class AdvancedTradingStrategy:
             print(f"  ✅ 목표: +{target_1:.0f}% (1차), +{target_2:.0f}% (2차)")
             print(f"  손절: {stop_loss_threshold}%")
 
-            if stock_code in self.pyramid_tracker:
-                tracker = self.pyramid_tracker[stock_code]
+            tracker = self.pyramid_tracker.get(stock_code, {})
+            if tracker.get('partial_taken'):
+                print(f"  🎯 1차 익절 완료 → 2차 목표 대기")
+            elif tracker.get('remaining_qty', 0) > 0:
                 print(f"  📈 2차 추가매수 대기: {tracker['remaining_qty']}주 (조건: +5~8% 구간)")
 
 
@@ -1113,6 +1293,8 @@ if __name__ == "__main__":
     strategy = AdvancedTradingStrategy()
 
     watchlist = get_all_stocks()
+    strategy.prefetch_prices([code for code, _ in watchlist])
+    strategy.prefetch_indicators([code for code, _ in watchlist])
 
     for code, name in watchlist:
         strategy.execute_strategy(code, name)
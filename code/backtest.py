@@ -3,74 +3,115 @@
 백테스팅 시스템
 - 과거 데이터로 전략 성과 테스트
 - 수익률, 승률, MDD, 샤프 비율 계산
+- 오프라인 실행: 일봉은 데이터 공급자(bar_source), 수량은 순수 함수(position_sizing)
+  → KIS 토큰/API 호출 없음, 같은 데이터면 같은 결과
+- 규칙 상수(신호 기준/가중치, 손절/익절, 포지션 수)는 params로 변경 가능 (sweep.py에서 사용)
+- 워크포워드 모드: 학습 구간 최적화 → 다음 검증 구간 평가 → 표본 외 자산 곡선 연결
+- 몬테카를로: 일별 수익률/거래 손익 재표본으로 수익률/MDD/샤프 비율 분포 (monte_carlo.py)
 """
 
-from advanced_strategy import AdvancedTradingStrategy
-from kis_api import KISApi
-import pandas as pd
+from bar_source import StoreBarSource, FileBarSource
+import monte_carlo
+import position_sizing
+from position_sizing import size_position
+import indicators
 import numpy as np
 from datetime import datetime, timedelta
 import json
 from typing import Dict, List, Tuple
-import time
 
 
 class Backtester:
-    def __init__(self, initial_cash=30000000):
+    DEFAULT_PARAMS = {
+        # 매수 신호 (가중치 합 >= buy_signals)
+        'ma_weight': 1.0,           # MA5 > MA20
+        'rsi_weight': 1.0,          # rsi_low < RSI < rsi_high
+        'volume_weight': 1.0,       # 거래량 > 20일 평균 x volume_ratio
+        'rsi_low': 30.0,
+        'rsi_high': 70.0,
+        'volume_ratio': 1.2,
+        'buy_signals': 3.0,
+        'max_positions': 10,        # 동시 보유 종목 수 상한
+
+        # 청산
+        'partial_target': 10.0,     # 50% 매도 수익률 (%)
+        'final_target': 20.0,       # 전량 매도 수익률 (%)
+
+        # 포지션 사이징 (position_sizing.size_position)
+        'risk_per_trade': position_sizing.RISK_PER_TRADE,
+        'low_volatility': position_sizing.LOW_VOLATILITY,
+        'high_volatility': position_sizing.HIGH_VOLATILITY,
+        'base_stop_loss': position_sizing.BASE_STOP_LOSS,
+        'min_stop_loss': position_sizing.MIN_STOP_LOSS,
+        'max_stop_loss': position_sizing.MAX_STOP_LOSS,
+        'max_position': position_sizing.MAX_POSITION
+    }
+    SIZING_PARAMS = ('risk_per_trade', 'low_volatility', 'high_volatility',
+                     'base_stop_loss', 'min_stop_loss', 'max_stop_loss', 'max_position')
+    ARRAY_KEYS = ('dates', 'close', 'atr', 'rsi', 'vol_ratio', 'ma_up', 'ready')  # prepare() 날짜축 배열
+
+    def __init__(self, initial_cash=30000000, source=None, params=None, verbose=True):
         """
         초기 자본금으로 백테스트 초기화
 
         Args:
             initial_cash: 초기 자본 (기본 3천만원)
+            source: 일봉 공급자 (BarSource, 기본: 로컬 일봉 저장소 읽기 전용)
+            params: DEFAULT_PARAMS 중 바꿀 값 {이름: 값}
+            verbose: False면 매매/진행 로그 생략 (파라미터 스윕용)
         """
+        unknown = set(params or {}) - set(self.DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"알 수 없는 백테스트 파라미터: {sorted(unknown)}")
+
         self.initial_cash = initial_cash
         self.cash = initial_cash
         self.positions = {}  # {stock_code: {'qty': int, 'avg_price': float, 'buy_date': str}}
         self.trade_history = []  # 매매 기록
         self.equity_curve = []  # 일별 자산 변화
 
-        self.strategy = AdvancedTradingStrategy()
-        self.api = self.strategy.api
+        self.source = source
+        self.params = {**self.DEFAULT_PARAMS, **(params or {})}
+        self.sizing = {key: self.params[key] for key in self.SIZING_PARAMS}
+        self.verbose = verbose
 
-    def get_historical_data(self, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+    def get_historical_data(self, stock_code: str, start_date: str, end_date: str):
         """
         과거 데이터 조회
 
         Args:
             stock_code: 종목 코드
-            start_date: 시작일 (YYYYMMDD) - 참고용
-            end_date: 종료일 (YYYYMMDD) - 참고용
+            start_date: 시작일 (YYYYMMDD)
+            end_date: 종료일 (YYYYMMDD)
 
         Returns:
-            DataFrame with OHLCV data
+            OHLCVBars 또는 None
         """
-        print(f"  데이터 조회 중: {stock_code}")
-
-        # KIS API로 과거 데이터 조회 (최근 30일만 가능)
-        df = self.strategy.get_ohlcv(stock_code, count=100)  # 최대한 많이
+        # 데이터 공급자에서 기간 조회 (API 호출 없음)
+        if self.source is None:
+            self.source = StoreBarSource()
+        bars = self.source.get_range(stock_code, start_date=start_date, end_date=end_date)
 
-        if df is None or len(df) == 0:
-            return pd.DataFrame()
+        if bars is None or len(bars) == 0:
+            return None
 
-        # 날짜 문자열 추가
-        df['date_str'] = df['date'].dt.strftime('%Y%m%d')
-
-        print(f"    ✅ {len(df)}일 데이터 수집")
-
-        return df
+        return bars
 
     def simulate_buy(self, stock_code: str, stock_name: str, price: float,
-                     date: str, signals: int, regime: str) -> bool:
+                     date: str, signals: int, regime: str, atr: float) -> bool:
         """
         매수 시뮬레이션
 
+        Args:
+            atr: 매수일 ATR (과거 일봉 기준)
+
         Returns:
             매수 성공 여부
         """
         # 포지션 사이징 (현재가로 포트폴리오 평가)
         current_prices = {stock_code: price}
-        shares, _, _, stop_loss_pct, _, _ = self.strategy.calculate_position_size(
-            stock_code, self.cash + self._get_portfolio_value(current_prices), regime
+        shares, stop_loss_pct, _, _ = size_position(
+            self.cash + self._get_portfolio_value(current_prices), price, atr, regime, **self.sizing
         )
 
         if shares == 0:
@@ -111,7 +152,8 @@ class Backtester:
             'cash_after': self.cash
         })
 
-        print(f"    ✅ 매수: {stock_name} {first_buy}주 @ {price:,.0f}원 (신호 {signals}/5)")
+        if self.verbose:
+            print(f"    ✅ 매수: {stock_name} {first_buy}주 @ {price:,.0f}원 (신호 {signals:g})")
         return True
 
     def simulate_sell(self, stock_code: str, price: float, date: str,
@@ -166,10 +208,12 @@ class Backtester:
         # 포지션 업데이트
         if partial:
             position['qty'] -= sell_qty
-            print(f"    🔵 부분 매도: {position['name']} {sell_qty}주 @ {price:,.0f}원 ({profit_rate:+.2f}%) - {reason}")
+            if self.verbose:
+                print(f"    🔵 부분 매도: {position['name']} {sell_qty}주 @ {price:,.0f}원 ({profit_rate:+.2f}%) - {reason}")
         else:
             del self.positions[stock_code]
-            print(f"    {'🟢' if profit_rate > 0 else '🔴'} 전량 매도: {position['name']} {sell_qty}주 @ {price:,.0f}원 ({profit_rate:+.2f}%) - {reason}")
+            if self.verbose:
+                print(f"    {'🟢' if profit_rate > 0 else '🔴'} 전량 매도: {position['name']} {sell_qty}주 @ {price:,.0f}원 ({profit_rate:+.2f}%) - {reason}")
 
         return True
 
@@ -185,10 +229,57 @@ class Backtester:
 
         return total
 
+    def prepare(self, stock_codes: List[Tuple[str, str]], start_date: str, end_date: str) -> Dict:
+        """
+        종목별 지표를 전체 기간에 대해 1회 계산 → 공통 날짜 축으로 정렬
+
+        신호 기준(params)과 무관한 값만 계산 → 파라미터를 바꿔도 다시 계산할 필요 없음
+
+        Args:
+            stock_codes: [(code, name), ...]
+
+        Returns:
+            dict: codes, names (S), dates (D, int64 YYYYMMDD),
+                  close / atr / rsi / vol_ratio (D x S float64, 데이터 없는 날 NaN),
+                  ma_up / ready (D x S bool, ready = 데이터 있고 20일 이상 쌓인 날)
+        """
+        symbols = []
+        seen = set()
+        for code, name in stock_codes:
+            if code in seen:
+                continue
+            seen.add(code)
+            bars = self.get_historical_data(code, start_date, end_date)
+            if bars is not None:
+                symbols.append((code, name, bars))
+
+        if not symbols:
+            return None
+
+        dates = np.unique(np.concatenate([bars.date for _, _, bars in symbols]))
+        shape = (len(dates), len(symbols))
+        data = {key: np.full(shape, np.nan) for key in ('close', 'atr', 'rsi', 'vol_ratio')}
+        data.update({key: np.zeros(shape, dtype=bool) for key in ('ma_up', 'ready')})
+
+        for s, (_, _, bars) in enumerate(symbols):
+            idx = np.searchsorted(dates, bars.date)
+            for key, values in self._indicator_arrays(bars).items():
+                data[key][idx, s] = values
+
+        data.update({
+            'codes': [code for code, _, _ in symbols],
+            'names': [name for _, name, _ in symbols],
+            'dates': dates
+        })
+        return data
+
     def run(self, stock_codes: List[Tuple[str, str]], start_date: str, end_date: str):
         """
         백테스팅 실행
 
+        - 지표는 prepare()에서 배열로 1회 계산
+        - 날짜 루프는 보유 종목 + 매수 신호 종목만 처리 (매수/매도 체결은 현금/포지션 상태 필요)
+
         Args:
             stock_codes: [(code, name), ...] 테스트할 종목 리스트
             start_date: 시작일 (YYYYMMDD)
@@ -202,53 +293,56 @@ class Backtester:
         print(f"테스트 종목: {len(stock_codes)}개")
         print("="*80 + "\n")
 
-        # 1. 과거 데이터 수집
-        print("📊 1단계: 과거 데이터 수집 중...")
-        historical_data = {}
-
-        for code, name in stock_codes[:10]:  # 10개 종목 테스트
-            df = self.get_historical_data(code, start_date, end_date)
-            if len(df) > 0:
-                historical_data[code] = {
-                    'name': name,
-                    'data': df
-                }
-            time.sleep(0.1)  # API 레이트 리밋
-
-        print(f"✅ {len(historical_data)}개 종목 데이터 수집 완료\n")
+        # 1. 과거 데이터 + 지표 배열
+        print("📊 1단계: 과거 데이터 수집 / 지표 계산 중...")
+        data = self.prepare(stock_codes, start_date, end_date)
 
-        if len(historical_data) == 0:
+        if data is None:
             print("❌ 데이터가 없습니다. 백테스트를 종료합니다.")
             return
 
+        print(f"✅ {len(data['codes'])}개 종목, {len(data['dates'])}일 데이터 준비 완료\n")
+
         # 2. 날짜별 시뮬레이션
         print("⚙️ 2단계: 전략 시뮬레이션 중...\n")
+        self.simulate(data)
 
-        # 모든 날짜 목록 생성
-        all_dates = set()
-        for info in historical_data.values():
-            all_dates.update(info['data']['date_str'].tolist())
-
-        all_dates = sorted(list(all_dates))
-
-        for i, date in enumerate(all_dates):
-            if i % 10 == 0:
-                print(f"  진행: {i+1}/{len(all_dates)} ({date})")
-
-            current_prices = {}
+        # 3. 결과 분석
+        print("\n" + "="*80)
+        print("📊 3단계: 결과 분석")
+        print("="*80 + "\n")
 
-            # 각 종목 처리
-            for code, info in historical_data.items():
-                name = info['name']
-                df = info['data']
+        self.analyze_results()
 
-                # 해당 날짜 데이터
-                day_data = df[df['date_str'] == date]
-                if len(day_data) == 0:
-                    continue
+    def simulate(self, data: Dict):
+        """
+        prepare() 결과로 날짜별 매매 시뮬레이션 (trade_history / equity_curve 기록)
 
-                current_price = float(day_data.iloc[0]['close'])
-                current_prices[code] = current_price
+        Args:
+            data: prepare() 결과 (메모리 맵 배열도 가능)
+        """
+        p = self.params
+        codes, names, dates = data['codes'], data['names'], data['dates']
+        close, atr = data['close'], data['atr']
+        scores = self.signal_scores(data)
+        column = {code: s for s, code in enumerate(codes)}
+        buy_signal = scores >= p['buy_signals']  # 데이터 없는 날은 신호 0
+
+        for d, date_int in enumerate(dates):
+            date = str(date_int)
+            if self.verbose and d % 10 == 0:
+                print(f"  진행: {d+1}/{len(dates)} ({date})")
+
+            # 처리 대상: 보유 종목 + 매수 신호 종목 (입력 종목 순서)
+            held = {column[code] for code in self.positions}
+            targets = sorted(held.union(np.flatnonzero(buy_signal[d]).tolist()))
+
+            for s in targets:
+                current_price = close[d, s]
+                if np.isnan(current_price):
+                    continue  # 해당 날짜 데이터 없음
+                current_price = float(current_price)
+                code = codes[s]
 
                 # 보유 중인 종목 관리
                 if code in self.positions:
@@ -261,33 +355,27 @@ class Backtester:
                         self.simulate_sell(code, current_price, date, f"손절 ({profit_rate:.2f}%)")
                         continue
 
-                    # 1차 익절 (+10%)
-                    if profit_rate >= 10.0 and position['qty'] > 1:
-                        self.simulate_sell(code, current_price, date, "1차 익절 (+10%)", partial=True)
+                    # 1차 익절 (기본 +10%)
+                    if profit_rate >= p['partial_target'] and position['qty'] > 1:
+                        self.simulate_sell(code, current_price, date,
+                                           f"1차 익절 (+{p['partial_target']:g}%)", partial=True)
                         continue
 
-                    # 2차 익절 (+20%)
-                    if profit_rate >= 20.0:
-                        self.simulate_sell(code, current_price, date, "2차 익절 (+20%)")
+                    # 2차 익절 (기본 +20%)
+                    if profit_rate >= p['final_target']:
+                        self.simulate_sell(code, current_price, date, f"2차 익절 (+{p['final_target']:g}%)")
                         continue
 
-                # 신규 매수 체크 (보유 중이 아니고, 포지션 여유 있으면)
-                elif len(self.positions) < 10:
-                    # 과거 30일 데이터로 신호 계산
-                    past_data = df[df['date_str'] <= date].tail(30)
+                # 신규 매수 (보유 중이 아니고, 포지션 여유 있으면)
+                elif len(self.positions) < p['max_positions']:
+                    # 시장 상태 감지 (간소화)
+                    regime = "trending"  # 실제로는 detect_market_regime 사용
+                    self.simulate_buy(code, names[s], current_price, date,
+                                      float(scores[d, s]), regime, float(atr[d, s]))
 
-                    if len(past_data) >= 20:
-                        # 시장 상태 감지 (간소화)
-                        regime = "trending"  # 실제로는 detect_market_regime 사용
-
-                        # 신호 계산 (간소화)
-                        signals = self._calculate_signals_simple(past_data)
-
-                        # 매수 조건 체크
-                        if signals >= 3:
-                            self.simulate_buy(code, name, current_price, date, signals, regime)
-
-            # 일별 자산 기록
+            # 일별 자산 기록 (보유 종목 당일 종가, 데이터 없으면 매입가)
+            current_prices = {code: float(close[d, column[code]]) for code in self.positions
+                              if not np.isnan(close[d, column[code]])}
             portfolio_value = self._get_portfolio_value(current_prices)
             total_value = self.cash + portfolio_value
 
@@ -299,38 +387,100 @@ class Backtester:
                 'positions': len(self.positions)
             })
 
-        # 3. 결과 분석
-        print("\n" + "="*80)
-        print("📊 3단계: 결과 분석")
-        print("="*80 + "\n")
-
-        self.analyze_results()
-
-    def _calculate_signals_simple(self, df: pd.DataFrame) -> int:
-        """간단한 신호 계산 (백테스팅용)"""
-        if len(df) < 20:
-            return 0
+        return self
 
-        signals = 0
+    def liquidate(self, data: Dict, reason: str = "구간 종료 정리"):
+        """보유 종목 전량 매도 (종목별 마지막 유효 종가) → 매도 기록 + 마지막 일별 자산 갱신
 
-        # MA
-        df['MA5'] = df['close'].rolling(5).mean()
-        df['MA20'] = df['close'].rolling(20).mean()
-        if df.iloc[-1]['MA5'] > df.iloc[-1]['MA20']:
-            signals += 1
-
-        # RSI
-        import ta
-        df['RSI'] = ta.momentum.rsi(df['close'], window=14)
-        if 30 < df.iloc[-1]['RSI'] < 70:
-            signals += 1
+        Args:
+            data: simulate()에 넘긴 prepare() 결과 (구간)
+        """
+        if not self.positions:
+            return self
+        codes, close = data['codes'], data['close']
+        date = str(data['dates'][-1])
+        for s, code in enumerate(codes):
+            if code not in self.positions:
+                continue
+            valid = np.flatnonzero(~np.isnan(close[:, s]))
+            price = float(close[valid[-1], s]) if len(valid) else self.positions[code]['avg_price']
+            self.simulate_sell(code, price, date, reason)
+
+        if self.equity_curve:
+            self.equity_curve[-1].update(cash=self.cash, portfolio=0, total=self.cash, positions=0)
+        return self
+
+    def _indicator_arrays(self, bars) -> Dict[str, np.ndarray]:
+        """신호 판단용 지표 (백테스팅용) - 전체 기간 일괄 계산"""
+        close = np.asarray(bars.close, dtype=np.float64)
+        volume = np.asarray(bars.volume, dtype=np.float64)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ma_up = indicators.sma(close, 5) > indicators.sma(close, 20)
+            vol_ratio = volume / indicators.sma(volume, 20)
+
+        ready = np.ones(len(close), dtype=bool)
+        ready[:19] = False  # 20일 미만
+
+        return {
+            'close': close,
+            'atr': indicators.atr(bars.high, bars.low, bars.close, 14),
+            'rsi': indicators.rsi(close, 14),
+            'vol_ratio': vol_ratio,
+            'ma_up': ma_up,
+            'ready': ready
+        }
 
-        # 거래량
-        avg_vol = df['volume'].tail(20).mean()
-        if df.iloc[-1]['volume'] > avg_vol * 1.2:
-            signals += 1
+    def signal_scores(self, data: Dict) -> np.ndarray:
+        """매수 신호 점수 (D x S) - params 기준/가중치로 일괄 계산
 
-        return signals
+        기본값이면 신호 개수 (0~3): MA5 > MA20, 30 < RSI < 70, 거래량 > 20일 평균 x 1.2
+        """
+        p = self.params
+        rsi = data['rsi']
+        with np.errstate(invalid='ignore'):
+            scores = (p['ma_weight'] * data['ma_up']
+                      + p['rsi_weight'] * ((rsi > p['rsi_low']) & (rsi < p['rsi_high']))
+                      + p['volume_weight'] * (data['vol_ratio'] > p['volume_ratio']))
+        return np.where(data['ready'], scores, 0.0)
+
+    def metrics(self) -> Dict:
+        """성과 지표 (수익률, MDD, 샤프 비율, 승률, 손익비)"""
+        # 최종 자산 = 마지막 일별 자산 (보유 종목은 종가 평가, 자산 기록이 없으면 매입가 평가)
+        if self.equity_curve:
+            final_value = self.equity_curve[-1]['total']
+        else:
+            final_value = self.cash + self._get_portfolio_value()
+        trades = [t for t in self.trade_history if t['action'] == 'SELL']
+        wins = [t['profit_rate'] for t in trades if t['profit_rate'] > 0]
+        losses = [t['profit_rate'] for t in trades if t['profit_rate'] <= 0]
+        avg_profit = float(np.mean(wins)) if wins else 0.0
+        avg_loss = float(np.mean(losses)) if losses else 0.0
+
+        # MDD (Maximum Drawdown) / 샤프 비율 (간소화) - 일별 자산 기준
+        equity = np.array([e['total'] for e in self.equity_curve], dtype=np.float64)
+        max_dd = sharpe = 0.0
+        if len(equity) > 0:
+            peak = np.maximum.accumulate(equity)
+            max_dd = float(np.max((peak - equity) / peak * 100))
+        if len(equity) > 1:
+            daily_returns = np.diff(equity) / equity[:-1]
+            if np.std(daily_returns) > 0:
+                sharpe = float(np.mean(daily_returns) / np.std(daily_returns) * np.sqrt(252))
+
+        return {
+            'final_value': final_value,
+            'total_return': (final_value - self.initial_cash) / self.initial_cash * 100,
+            'mdd': max_dd,
+            'sharpe': sharpe,
+            'trades': len(trades),
+            'wins': len(wins),
+            'losses': len(losses),
+            'win_rate': len(wins) / len(trades) * 100 if trades else 0.0,
+            'avg_profit': avg_profit,
+            'avg_loss': avg_loss,
+            'profit_factor': abs(avg_profit * len(wins) / (avg_loss * len(losses))) if wins and losses else 0.0
+        }
 
     def analyze_results(self):
         """결과 분석 및 출력"""
@@ -338,10 +488,6 @@ class Backtester:
             print("❌ 매매 기록이 없습니다.")
             return
 
-        # 최종 자산
-        final_value = self.cash + self._get_portfolio_value()
-        total_return = (final_value - self.initial_cash) / self.initial_cash * 100
-
         # 매매 통계
         trades = [t for t in self.trade_history if t['action'] == 'SELL']
 
@@ -366,53 +512,25 @@ class Backtester:
             self.save_results()
             return
 
-        wins = [t for t in trades if t['profit_rate'] > 0]
-        losses = [t for t in trades if t['profit_rate'] <= 0]
-
-        win_rate = len(wins) / len(trades) * 100 if len(trades) > 0 else 0
-        avg_profit = np.mean([t['profit_rate'] for t in wins]) if len(wins) > 0 else 0
-        avg_loss = np.mean([t['profit_rate'] for t in losses]) if len(losses) > 0 else 0
-
-        # MDD (Maximum Drawdown)
-        equity = [e['total'] for e in self.equity_curve]
-        peak = equity[0]
-        max_dd = 0
-
-        for value in equity:
-            if value > peak:
-                peak = value
-            dd = (peak - value) / peak * 100
-            if dd > max_dd:
-                max_dd = dd
-
-        # 샤프 비율 (간소화)
-        daily_returns = []
-        for i in range(1, len(equity)):
-            daily_return = (equity[i] - equity[i-1]) / equity[i-1]
-            daily_returns.append(daily_return)
-
-        sharpe = 0
-        if len(daily_returns) > 0 and np.std(daily_returns) > 0:
-            sharpe = np.mean(daily_returns) / np.std(daily_returns) * np.sqrt(252)
+        m = self.metrics()
 
         # 결과 출력
         print("📈 **수익률 분석**")
         print(f"  초기 자본: {self.initial_cash:,}원")
-        print(f"  최종 자산: {final_value:,}원")
-        print(f"  총 수익률: {total_return:+.2f}%")
-        print(f"  최대 낙폭(MDD): {max_dd:.2f}%")
-        print(f"  샤프 비율: {sharpe:.2f}")
+        print(f"  최종 자산: {m['final_value']:,}원")
+        print(f"  총 수익률: {m['total_return']:+.2f}%")
+        print(f"  최대 낙폭(MDD): {m['mdd']:.2f}%")
+        print(f"  샤프 비율: {m['sharpe']:.2f}")
 
         print(f"\n💼 **매매 통계**")
-        print(f"  총 거래: {len(trades)}회")
-        print(f"  승: {len(wins)}회 | 패: {len(losses)}회")
-        print(f"  승률: {win_rate:.1f}%")
-        print(f"  평균 수익: {avg_profit:+.2f}%")
-        print(f"  평균 손실: {avg_loss:+.2f}%")
+        print(f"  총 거래: {m['trades']}회")
+        print(f"  승: {m['wins']}회 | 패: {m['losses']}회")
+        print(f"  승률: {m['win_rate']:.1f}%")
+        print(f"  평균 수익: {m['avg_profit']:+.2f}%")
+        print(f"  평균 손실: {m['avg_loss']:+.2f}%")
 
-        if len(wins) > 0 and len(losses) > 0:
-            profit_factor = abs(avg_profit * len(wins) / (avg_loss * len(losses)))
-            print(f"  손익비: {profit_factor:.2f}")
+        if m['wins'] > 0 and m['losses'] > 0:
+            print(f"  손익비: {m['profit_factor']:.2f}")
 
         # 보유 기간
         hold_days = [t['hold_days'] for t in trades]
@@ -428,13 +546,157 @@ class Backtester:
         # 상세 매매 기록 저장
         self.save_results()
 
+    def monte_carlo(self, paths: int = monte_carlo.PATHS, method: str = 'bootstrap',
+                    block: int = 1, seed: int = None) -> Dict:
+        """
+        몬테카를로 강건성 분석 (run/walk_forward 이후)
+
+        Args:
+            paths: 재표본 경로 수
+            method: 'bootstrap' (복원 추출) 또는 'shuffle' (순서만 섞기)
+            block: 일별 수익률 연속 구간 길이 (자기상관 유지)
+
+        Returns:
+            dict: {'daily': 일별 수익률 기준 요약, 'trades': 거래 손익 기준 요약}
+        """
+        return monte_carlo.analyze(self.trade_history, self.equity_curve, self.initial_cash,
+                                   paths, method, block, seed=seed)
+
+    def walk_forward(self, stock_codes: List[Tuple[str, str]], start_date: str, end_date: str,
+                     configs: List[Dict], train_days: int = 250, test_days: int = 60,
+                     rank_by: str = 'sharpe', min_trades: int = 5, workers: int = None) -> Dict:
+        """
+        워크포워드 최적화 (표본 외 검증)
+
+        - 기간을 [학습 train_days | 검증 test_days] 구간으로 나누고 test_days씩 이동
+        - 학습 구간마다 configs 전체를 병렬 백테스트 → rank_by 1위 설정 선택
+        - 선택한 설정으로 바로 다음 검증 구간만 시뮬레이션 (검증 구간 데이터는 선택에 사용 안 함)
+        - 검증 구간 자산 곡선을 이어 붙임 (구간 끝 보유 종목은 마지막 종가로 매도 기록,
+          다음 구간은 이전 구간 마지막 자산으로 시작)
+        - 지표 배열은 전체 기간 1회 계산 후 구간별로 잘라서 사용 (이동 평균/RSI/ATR은 과거 봉만 사용
+          → 잘라도 값이 같고, 구간 앞부분도 이전 데이터로 계산된 값)
+
+        Args:
+            configs: 후보 설정 목록 (sweep.grid / sweep.sample)
+            train_days, test_days: 학습/검증 구간 길이 (거래일)
+            rank_by: 설정 선택 기준 (sharpe, profit_factor, total_return, mdd)
+            min_trades: 학습 구간 매도 거래 수 하한 (미달 설정 제외, 전부 미달이면 기본 설정)
+            workers: 프로세스 수 (기본: CPU 코어 수)
+
+        Returns:
+            dict: windows (구간별 선택 설정/학습·검증 성과), metrics (이어 붙인 표본 외 성과)
+        """
+        import sweep  # sweep.py가 backtest.py를 import → 순환 참조 방지
+
+        print("\n" + "="*80)
+        print("🔁 워크포워드 최적화 시작")
+        print("="*80)
+        print(f"기간: {start_date} ~ {end_date}")
+        print(f"학습 {train_days}일 / 검증 {test_days}일, 후보 설정 {len(configs)}개")
+        print("="*80 + "\n")
+
+        data = self.prepare(stock_codes, start_date, end_date)
+        if data is None:
+            print("❌ 데이터가 없습니다. 워크포워드를 종료합니다.")
+            return None
+
+        dates = data['dates']
+        windows = walk_forward_windows(len(dates), train_days, test_days)
+        if not windows:
+            print(f"❌ 데이터 {len(dates)}일 - 학습 구간({train_days}일)보다 길어야 합니다.")
+            return None
+
+        # 1. 모든 학습 구간 x 설정 병렬 실행 (데이터 공유 1회)
+        tasks = [(params, (lo, mid)) for lo, mid, _ in windows for params in configs]
+        train_metrics = sweep.run_pool(data, tasks, self.initial_cash, workers)
+
+        # 2. 구간별 1위 설정으로 다음 검증 구간 실행
+        print(f"\n📊 검증 구간 {len(windows)}개")
+        results = []
+        cash = self.initial_cash
+        for w, (lo, mid, hi) in enumerate(windows):
+            chunk = train_metrics[w * len(configs):(w + 1) * len(configs)]
+            ranked = sweep.rank([{'params': params, 'metrics': m} for params, m in zip(configs, chunk)
+                                 if m is not None], rank_by, min_trades)
+            if ranked:
+                best = ranked[0]
+            else:
+                print(f"  ⚠️ {dates[lo]}~{dates[mid - 1]} 학습 거래 부족 - 기본 설정 사용")
+                best = {'params': {}, 'metrics': None}
+
+            # 구간 끝 보유 종목은 마지막 종가로 매도 (손익이 거래 기록/승률/손익비에도 반영)
+            tester = Backtester(initial_cash=cash, params=best['params'], verbose=False)
+            window = slice_window(data, mid, hi)
+            tester.simulate(window).liquidate(window)
+            test = tester.metrics()
+            cash = test['final_value']
+            self.trade_history.extend(tester.trade_history)
+            self.equity_curve.extend(tester.equity_curve)
+
+            changed = {k: v for k, v in best['params'].items() if self.DEFAULT_PARAMS.get(k) != v}
+            train_score = best['metrics'][rank_by] if best['metrics'] else float('nan')
+            print(f"  {dates[mid]}~{dates[hi - 1]} | 학습 {rank_by} {train_score:6.2f} → "
+                  f"검증 수익률 {test['total_return']:+6.2f}% MDD {test['mdd']:5.1f}% "
+                  f"거래 {test['trades']:>3}회 | {changed}")
+
+            results.append({
+                'train': [str(dates[lo]), str(dates[mid - 1])],
+                'test': [str(dates[mid]), str(dates[hi - 1])],
+                'params': best['params'],
+                'train_metrics': best['metrics'],
+                'test_metrics': test
+            })
+
+        # 3. 이어 붙인 표본 외 성과
+        self.cash = cash
+        self.positions = {}
+        overall = self.metrics()
+
+        print("\n" + "="*80)
+        print("📈 **표본 외 성과 (검증 구간 연결)**")
+        print("="*80)
+        print(f"  기간: {results[0]['test'][0]} ~ {results[-1]['test'][1]}")
+        print(f"  초기 자본: {self.initial_cash:,}원 → 최종 자산: {overall['final_value']:,.0f}원")
+        print(f"  총 수익률: {overall['total_return']:+.2f}%")
+        print(f"  최대 낙폭(MDD): {overall['mdd']:.2f}%")
+        print(f"  샤프 비율: {overall['sharpe']:.2f}")
+        print(f"  총 거래: {overall['trades']}회 (승률 {overall['win_rate']:.1f}%, 손익비 {overall['profit_factor']:.2f})")
+
+        summary = {'windows': results, 'metrics': overall}
+        self.save_walk_forward(summary, train_days, test_days, rank_by)
+        return summary
+
+    def save_walk_forward(self, summary: Dict, train_days: int, test_days: int, rank_by: str):
+        """워크포워드 결과를 JSON 파일로 저장"""
+        results = {
+            'config': {
+                'initial_cash': self.initial_cash,
+                'train_days': train_days,
+                'test_days': test_days,
+                'rank_by': rank_by
+            },
+            'windows': summary['windows'],
+            'metrics': summary['metrics'],
+            'trades': self.trade_history,
+            'equity_curve': self.equity_curve
+        }
+
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = f"data/walk_forward_{timestamp}.json"
+
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+        print(f"\n💾 결과 저장: {filename}")
+
     def save_results(self):
         """결과를 JSON 파일로 저장"""
         results = {
             'config': {
                 'initial_cash': self.initial_cash,
                 'final_cash': self.cash,
-                'positions': len(self.positions)
+                'positions': len(self.positions),
+                'params': self.params
             },
             'trades': self.trade_history,
             'equity_curve': self.equity_curve
@@ -449,23 +711,54 @@ class Backtester:
         print(f"\n💾 결과 저장: {filename}")
 
 
+def slice_window(data: Dict, lo: int, hi: int) -> Dict:
+    """prepare() 결과의 날짜 구간 [lo, hi) (배열은 복사 없이 잘라서 사용)"""
+    window = {key: data[key][lo:hi] for key in Backtester.ARRAY_KEYS}
+    window['codes'] = data['codes']
+    window['names'] = data['names']
+    return window
+
+
+def walk_forward_windows(length: int, train_days: int, test_days: int) -> List[Tuple[int, int, int]]:
+    """워크포워드 구간 [(학습 시작, 검증 시작, 검증 끝)] - 날짜 인덱스, 마지막 검증 구간은 짧을 수 있음"""
+    windows = []
+    lo = 0
+    while lo + train_days < length:
+        windows.append((lo, lo + train_days, min(lo + train_days + test_days, length)))
+        lo += test_days
+    return windows
+
+
 if __name__ == "__main__":
     # 백테스팅 실행
+    # python backtest.py [기록 파일 디렉토리] [--walk-forward] [--monte-carlo]  (디렉토리 생략하면 로컬 일봉 저장소)
+    import sys
     from watchlist import get_all_stocks
 
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    walk_forward = '--walk-forward' in sys.argv
+
     # 테스트 설정
-    backtester = Backtester(initial_cash=30000000)
+    source = FileBarSource(args[0]) if args else StoreBarSource()
+    backtester = Backtester(initial_cash=30000000, source=source)
 
     # 종목 목록
     stocks = get_all_stocks()
 
-    # 백테스팅 기간 (KIS API는 최근 30일만 제공)
+    # 백테스팅 기간 (일봉 저장소에 최대 약 2년치 적재, 워크포워드는 전체)
     end_date = datetime.now().strftime('%Y%m%d')
-    start_date = (datetime.now() - timedelta(days=30)).strftime('%Y%m%d')
+    start_date = (datetime.now() - timedelta(days=730 if walk_forward else 180)).strftime('%Y%m%d')
 
     print(f"\n⚠️ 백테스팅 기간: {start_date} ~ {end_date}")
-    print(f"⚠️ 제한사항: KIS API는 최근 30일 데이터만 제공")
-    print(f"⚠️ 테스트 종목: 10개 (전체 {len(stocks)}개 중)\n")
+    print(f"⚠️ 테스트 종목: {len(stocks)}개\n")
 
     # 실행
-    backtester.run(stocks, start_date, end_date)
+    if walk_forward:
+        from sweep import DEFAULT_SPACE, sample
+        backtester.walk_forward(stocks, start_date, end_date, sample(DEFAULT_SPACE, 200),
+                                train_days=250, test_days=60)
+    else:
+        backtester.run(stocks, start_date, end_date)
+
+    if '--monte-carlo' in sys.argv and backtester.equity_curve:
+        backtester.monte_carlo(paths=100000)
@@ -0,0 +1,110 @@
+# bar_source.py
+"""
+백테스트용 일봉 데이터 공급자
+- Backtester는 이 인터페이스(get_range)로만 과거 일봉을 읽음 → KIS 토큰/API 호출 없음
+  · get_range(symbol, exchange, start_date, end_date) - BarStore.get_range와 같은 인자 순서
+- StoreBarSource: 실전 전략이 쌓아 둔 일봉 저장소(DATA_DIR/bars)를 읽기 전용으로 사용
+- FileBarSource: 기록해 둔 파일 디렉토리 ({종목}.npy 또는 {종목}.csv)
+  → 같은 파일이면 같은 결과 (재현 가능한 백테스트)
+
+사용 예:
+    source = StoreBarSource()                      # 저장소 그대로
+    FileBarSource.record(source, codes, "snap/", start_date, end_date)  # 스냅샷 기록
+    Backtester(source=FileBarSource("snap/")).run(stocks, start_date, end_date)
+"""
+import os
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from bar_store import BAR_DTYPE, BarStore, slice_range
+from market_data import OHLCVBars
+
+
+class BarSource(ABC):
+    """일봉 공급자 인터페이스"""
+
+    def get_range(self, symbol, exchange=None, start_date=None, end_date=None):
+        """기간 일봉 (YYYYMMDD, 양 끝 포함)
+
+        Returns:
+            OHLCVBars 또는 None (데이터 없음)
+        """
+        return slice_range(self.load(symbol, exchange), start_date, end_date)
+
+    @abstractmethod
+    def load(self, symbol, exchange=None):
+        """전체 일봉 (과거순)"""
+
+
+class StoreBarSource(BarSource):
+    def __init__(self, store_dir=None):
+        """
+        Args:
+            store_dir: 일봉 저장소 디렉토리 (기본: DATA_DIR/bars)
+        """
+        self.store = BarStore(api=None, store_dir=store_dir)
+
+    def load(self, symbol, exchange=None):
+        # 저장된 데이터만 사용 (증분 업데이트 없음)
+        return self.store.load(symbol, exchange)
+
+
+class FileBarSource(BarSource):
+    CSV_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: 기록 파일 디렉토리
+                - {종목}.npy: BAR_DTYPE 구조화 배열
+                - {종목}.csv: date(YYYYMMDD), open, high, low, close, volume 컬럼
+                - 해외 종목은 {거래소}_{종목}.npy / .csv
+        """
+        self.directory = directory
+
+    def _path(self, symbol, exchange, ext):
+        name = f"{exchange}_{symbol}" if exchange else symbol
+        return os.path.join(self.directory, f"{name}.{ext}")
+
+    def load(self, symbol, exchange=None):
+        npy_path = self._path(symbol, exchange, 'npy')
+        csv_path = self._path(symbol, exchange, 'csv')
+        try:
+            if os.path.exists(npy_path):
+                data = np.load(npy_path)
+            elif os.path.exists(csv_path):
+                df = pd.read_csv(csv_path, usecols=self.CSV_COLUMNS).sort_values('date')
+                data = np.empty(len(df), BAR_DTYPE)
+                for column in self.CSV_COLUMNS:
+                    data[column] = df[column].to_numpy()
+            else:
+                return None
+        except Exception as e:
+            print(f"⚠️ {symbol} 기록 파일 읽기 실패: {e}")
+            return None
+        return OHLCVBars(data['date'], data['open'], data['high'],
+                         data['low'], data['close'], data['volume'])
+
+    def save(self, symbol, bars, exchange=None):
+        """일봉을 .npy 파일로 기록"""
+        os.makedirs(self.directory, exist_ok=True)
+        np.save(self._path(symbol, exchange, 'npy'), BarStore._to_array(bars))
+
+    @classmethod
+    def record(cls, source, symbols, directory, start_date=None, end_date=None):
+        """다른 공급자의 기간 일봉을 디렉토리에 기록 (재현용 스냅샷)
+
+        Args:
+            source: BarSource
+            symbols: [종목 코드] 또는 [(종목 코드, 거래소)]
+
+        Returns:
+            FileBarSource
+        """
+        target = cls(directory)
+        for item in symbols:
+            symbol, exchange = item if isinstance(item, tuple) else (item, None)
+            bars = source.get_range(symbol, exchange, start_date, end_date)
+            if bars is not None and len(bars) > 0:
+                target.save(symbol, bars, exchange)
+        return target
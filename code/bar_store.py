@@ -0,0 +1,168 @@
+# bar_store.py
+"""
+일봉 로컬 저장소 (PVC)
+- 종목별 .npy 파일 1개 (구조화 배열: date, open, high, low, close, volume)
+- 읽기는 메모리 맵 (필요한 구간만 디스크에서 읽음)
+- 마지막 저장일 이후 봉만 API로 받아서 이어 붙임 (증분 업데이트)
+- 처음 보는 종목은 BACKFILL_BARS개까지 과거 데이터를 페이지 단위로 채움
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from config import Config, ensure_data_dir
+from market_data import OHLCVBars
+
+
+def slice_range(bars, start_date=None, end_date=None):
+    """기간 일봉 (YYYYMMDD, 양 끝 포함) - 배열 뷰, 복사 없음"""
+    if bars is None or len(bars) == 0:
+        return None
+    lo = np.searchsorted(bars.date, int(start_date), 'left') if start_date else 0
+    hi = np.searchsorted(bars.date, int(end_date), 'right') if end_date else len(bars)
+    return OHLCVBars(bars.date[lo:hi], bars.open[lo:hi], bars.high[lo:hi],
+                     bars.low[lo:hi], bars.close[lo:hi], bars.volume[lo:hi])
+
+
+BAR_DTYPE = np.dtype([
+    ('date', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('volume', np.int64)
+])
+
+
+class BarStore:
+    BACKFILL_BARS = 500      # 신규 종목 초기 적재 봉 수 (약 2년)
+    PAGE_SIZE = 100          # 기간 조회 1회 최대 봉 수
+    MAX_PAGES = 10           # 1회 업데이트 최대 호출 수
+    UPDATE_INTERVAL = 10 * 60  # 같은 종목 재업데이트 최소 간격 (초)
+
+    def __init__(self, api, store_dir=None):
+        """
+        Args:
+            api: KISApi 인스턴스
+            store_dir: 저장 디렉토리 (기본: DATA_DIR/bars)
+        """
+        self.api = api
+        self.store_dir = ensure_data_dir(store_dir or os.path.join(Config.DATA_DIR, 'bars'))
+        self._updated_at = {}  # {파일 경로: 마지막 업데이트 시각} (프로세스 내)
+        self._lock = threading.Lock()
+
+    def get(self, symbol, exchange=None, count=100, update=True):
+        """최근 count개 일봉 (필요하면 먼저 증분 업데이트)
+
+        Args:
+            symbol: 종목 코드/심볼
+            exchange: 해외 거래소 (None이면 국내)
+            count: 봉 개수
+            update: False면 저장된 데이터만 사용 (API 호출 없음)
+
+        Returns:
+            OHLCVBars 또는 None
+        """
+        bars = self.update(symbol, exchange) if update else self.load(symbol, exchange)
+        if bars is None or len(bars) == 0:
+            return None
+        return bars.tail(count)
+
+    def get_range(self, symbol, exchange=None, start_date=None, end_date=None, update=True):
+        """기간 일봉 (YYYYMMDD, 양 끝 포함)"""
+        bars = self.update(symbol, exchange) if update else self.load(symbol, exchange)
+        return slice_range(bars, start_date, end_date)
+
+    def load(self, symbol, exchange=None):
+        """저장된 일봉 (메모리 맵, 없으면 None)"""
+        path = self._path(symbol, exchange)
+        try:
+            data = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ {symbol} 일봉 파일 읽기 실패 - 다시 받습니다: {e}")
+            return None
+        return self._to_bars(data)
+
+    def update(self, symbol, exchange=None):
+        """마지막 저장일 이후 봉만 받아서 저장
+
+        Returns:
+            OHLCVBars (저장된 전체) 또는 None
+        """
+        path = self._path(symbol, exchange)
+        stored = self.load(symbol, exchange)
+
+        with self._lock:
+            recently = time.time() - self._updated_at.get(path, 0) < self.UPDATE_INTERVAL
+        if stored is not None and recently:
+            return stored
+
+        # 마지막 저장 봉(장중에 받았을 수 있음)부터 다시 받아서 덮어씀
+        last_date = int(stored.date[-1]) if stored is not None and len(stored) > 0 else None
+        if last_date is not None:
+            start_date = str(last_date)
+        else:
+            start_date = (datetime.now() - timedelta(days=self.BACKFILL_BARS * 7 // 5 + 10)).strftime('%Y%m%d')
+
+        pages = []
+        end_date = None
+        for _ in range(self.MAX_PAGES):
+            page = self.api.get_ohlcv_range(symbol, exchange, start_date, end_date)
+            if page is None or len(page) == 0:
+                break
+            pages.append(page)
+
+            fetched = sum(len(p) for p in pages)
+            if page.date[0] <= int(start_date) or len(page) < self.PAGE_SIZE or fetched >= self.BACKFILL_BARS:
+                break
+            end_date = (datetime.strptime(str(page.date[0]), '%Y%m%d') - timedelta(days=1)).strftime('%Y%m%d')
+
+        if not pages:
+            return stored  # 조회 실패 → 기존 데이터 사용
+
+        new = np.concatenate([self._to_array(p) for p in reversed(pages)])
+        if stored is not None:
+            old = self._to_array(stored)
+            new = np.concatenate([old[old['date'] < new['date'][0]], new])
+
+        self._save(path, new)
+        with self._lock:
+            self._updated_at[path] = time.time()
+
+        added = len(new) - (len(stored) if stored is not None else 0)
+        if added > 0:
+            print(f"💾 {symbol} 일봉 {added}개 추가 저장 (총 {len(new)}개)")
+        return self._to_bars(new)
+
+    def _path(self, symbol, exchange):
+        market = exchange or 'KRX'
+        return os.path.join(self.store_dir, f"{market}_{symbol}.npy")
+
+    def _save(self, path, data):
+        """임시 파일에 쓰고 교체 (다른 프로세스의 메모리 맵 읽기 보호)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️ 일봉 파일 저장 실패: {e}")
+
+    @staticmethod
+    def _to_array(bars):
+        data = np.empty(len(bars), BAR_DTYPE)
+        data['date'] = bars.date
+        data['open'] = bars.open
+        data['high'] = bars.high
+        data['low'] = bars.low
+        data['close'] = bars.close
+        data['volume'] = bars.volume
+        return data
+
+    @staticmethod
+    def _to_bars(data):
+        return OHLCVBars(data['date'], data['open'], data['high'],
+                         data['low'], data['close'], data['volume'])
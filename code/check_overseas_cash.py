@@ -17,15 +17,7 @@ def check_method_1():
     time.sleep(1)
     api.get_access_token()
 
-    url = f"{api.config.BASE_URL}/uapi/overseas-stock/v1/trading/inquire-balance"
-
-    headers = {
-        "content-type": "application/json",
-        "authorization": f"Bearer {api.access_token}",
-        "appkey": api.config.APP_KEY,
-        "appsecret": api.config.APP_SECRET,
-        "tr_id": "VTTS3012R"
-    }
+    tr_id = "VTTS3012R"
 
     params = {
         "CANO": api.config.ACCOUNT_NO,
@@ -37,8 +29,7 @@ def check_method_1():
     }
 
     time.sleep(0.5)
-    import requests
-    res = requests.get(url, headers=headers, params=params)
+    res = api.get("/uapi/overseas-stock/v1/trading/inquire-balance", tr_id, params)
 
     if res.status_code == 200:
         data = res.json()
@@ -65,15 +56,7 @@ def check_method_2():
 
     api = KISApi()
 
-    url = f"{api.config.BASE_URL}/uapi/overseas-stock/v1/trading/inquire-balance"
-
-    headers = {
-        "content-type": "application/json",
-        "authorization": f"Bearer {api.access_token}",
-        "appkey": api.config.APP_KEY,
-        "appsecret": api.config.APP_SECRET,
-        "tr_id": "VTTS3012R"
-    }
+    tr_id = "VTTS3012R"
 
     params = {
         "CANO": api.config.ACCOUNT_NO,
@@ -85,8 +68,7 @@ def check_method_2():
     }
 
     time.sleep(0.5)
-    import requests
-    res = requests.get(url, headers=headers, params=params)
+    res = api.get("/uapi/overseas-stock/v1/trading/inquire-balance", tr_id, params)
 
     if res.status_code == 200:
         data = res.json()
@@ -109,15 +91,7 @@ def check_method_3():
     api = KISApi()
 
     # 국내주식 잔고 조회로 해외주식 예수금도 나오는지 확인
-    url = f"{api.config.BASE_URL}/uapi/domestic-stock/v1/trading/inquire-balance"
-
-    headers = {
-        "content-type": "application/json",
-        "authorization": f"Bearer {api.access_token}",
-        "appkey": api.config.APP_KEY,
-        "appsecret": api.config.APP_SECRET,
-        "tr_id": "VTTC8434R"
-    }
+    tr_id = "VTTC8434R"
 
     params = {
         "CANO": api.config.ACCOUNT_NO,
@@ -134,8 +108,7 @@ def check_method_3():
     }
 
     time.sleep(0.5)
-    import requests
-    res = requests.get(url, headers=headers, params=params)
+    res = api.get("/uapi/domestic-stock/v1/trading/inquire-balance", tr_id, params)
 
     if res.status_code == 200:
         data = res.json()
@@ -1,5 +1,6 @@
 # config.py
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,3 +15,28 @@ class Config:
     
     # 실전투자라면 아래 URL 사용
     # BASE_URL = "https://openapi.koreainvestment.com:9443"
+
+    # 실시간 시세 WebSocket (모의투자: 31000 / 실전투자: ws://ops.koreainvestment.com:21000)
+    WS_URL = os.getenv('KIS_WS_URL', "ws://ops.koreainvestment.com:31000")
+
+    # 공유 데이터 디렉토리 (k8s: trading-journal-pvc 마운트 경로)
+    DATA_DIR = os.getenv('DATA_DIR', '/app/data')
+
+    # API 호출 예산 (같은 APP_KEY 쓰는 모든 프로세스 합산)
+    # 모의투자 초당 2건 기준: 시세 1.5건 + 주문/계좌 0.5건
+    RATE_BUDGETS = {
+        'quotation': (float(os.getenv('KIS_QUOTATION_RATE', '1.5')), int(os.getenv('KIS_QUOTATION_BURST', '2'))),
+        'order': (float(os.getenv('KIS_ORDER_RATE', '0.5')), int(os.getenv('KIS_ORDER_BURST', '1')))
+    }
+
+
+def ensure_data_dir(path):
+    """공유 데이터 디렉토리 확인 (쓰기 불가면 임시 디렉토리로 대체)"""
+    try:
+        os.makedirs(path, exist_ok=True)
+        if os.access(path, os.W_OK):
+            return path
+    except OSError:
+        pass
+    print(f"⚠️ {path} 사용 불가 - 임시 디렉토리 사용")
+    return tempfile.gettempdir()
@@ -7,6 +7,7 @@
 - 통계 및 리포트
 """
 
+import asyncio
 import discord
 from discord import app_commands
 from discord.ext import tasks
@@ -19,6 +20,7 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from kis_api import KISApi
+from kis_async import AsyncKISApi
 from trading_journal import TradingJournal
 from advanced_strategy import AdvancedTradingStrategy
 
@@ -33,6 +35,7 @@ class TradingBot(discord.Client):
 
         self.tree = app_commands.CommandTree(self)
         self.api = KISApi()
+        self.aapi = AsyncKISApi(self.api)  # ✅ 이벤트 루프 블로킹 방지 (워커 스레드에서 호출)
         self.journal = TradingJournal()
         self.strategy = AdvancedTradingStrategy()
 
@@ -52,7 +55,7 @@ class TradingBot(discord.Client):
         print(f"📊 서버 수: {len(self.guilds)}")
 
         # API 토큰 발급
-        self.api.get_access_token()
+        await self.aapi.get_access_token()
         print("✅ KIS API 토큰 발급 완료")
 
         # 자동 리포트 시작
@@ -80,7 +83,7 @@ async def balance(interaction: discord.Interaction):
     await interaction.response.defer(thinking=True)
 
     try:
-        balance_data = client.api.get_balance()
+        balance_data = await client.aapi.get_balance()
 
         if not balance_data or 'output2' not in balance_data:
             await interaction.followup.send("❌ 잔고 조회 실패")
@@ -155,7 +158,7 @@ async def positions(interaction: discord.Interaction):
     await interaction.response.defer(thinking=True)
 
     try:
-        balance_data = client.api.get_balance()
+        balance_data = await client.aapi.get_balance()
 
         if not balance_data or 'output1' not in balance_data:
             await interaction.followup.send("❌ 포지션 조회 실패")
@@ -337,14 +340,13 @@ async def analyze(interaction: discord.Interaction, 종목코드: str):
     await interaction.response.defer(thinking=True)
 
     try:
-        # 신호 분석
-        signals, details = client.strategy.check_buy_signals(종목코드)
-
-        # 시장 상태
-        regime, regime_info = client.strategy.detect_market_regime(종목코드)
-
-        # 현재가
-        current_price = int(client.api.get_current_price(종목코드))
+        # 신호 분석 + 시장 상태 + 현재가 (동시 실행)
+        (signals, details), (regime, regime_info), price_str = await asyncio.gather(
+            client.aapi.run(client.strategy.check_buy_signals, 종목코드),
+            client.aapi.run(client.strategy.detect_market_regime, 종목코드),
+            client.aapi.get_current_price(종목코드)
+        )
+        current_price = int(price_str)
 
         embed = discord.Embed(
             title=f"🔍 종목 분석: {종목코드}",
@@ -452,7 +454,7 @@ async def buy(interaction: discord.Interaction, 종목코드: str, 수량: int):
 
     try:
         # 현재가 조회
-        current_price = int(client.api.get_current_price(종목코드))
+        current_price = int(await client.aapi.get_current_price(종목코드))
         amount = current_price * 수량
 
         # 확인 메시지
@@ -481,7 +483,7 @@ async def sell(interaction: discord.Interaction, 종목코드: str, 수량: int)
 
     try:
         # 현재가 조회
-        current_price = int(client.api.get_current_price(종목코드))
+        current_price = int(await client.aapi.get_current_price(종목코드))
         amount = current_price * 수량
 
         # 확인 메시지
@@ -0,0 +1,158 @@
+# eval_context.py
+"""
+종목 평가 스냅샷
+- execute_strategy 시작 시 한 번 만들어 시장 상태 → 매수 신호 → 포지션 사이징 → 포지션 관리에 그대로 전달
+- 일봉, 지표, 현재가, 분봉, 수급, 계좌를 한 시점에 한 번씩만 조회
+  → 같은 평가 안의 모든 판단이 같은 가격/같은 잔고를 봄
+- 읽기 전용 (생성 후 속성 변경 불가)
+"""
+import time
+from types import MappingProxyType
+from indicators import row
+
+
+class _ReadOnly:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__}는 읽기 전용입니다 ({name})")
+
+    def _init(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+
+class PortfolioView(_ReadOnly):
+    """계좌 스냅샷 (평가 시점 잔고 1회 조회)"""
+    __slots__ = ('loaded', 'cash', 'total_assets', 'holdings')
+
+    def __init__(self, cash=0, total_assets=0, holdings=None, loaded=True):
+        """
+        Args:
+            cash: 예수금 (국내: 원, 해외: USD)
+            total_assets: 총평가금액
+            holdings: {종목: {'quantity', 'profit_rate', 'price', 'avg_price'}}
+            loaded: 잔고 조회 성공 여부
+        """
+        holdings = {symbol: MappingProxyType(dict(info)) for symbol, info in (holdings or {}).items()}
+        self._init(loaded=loaded, cash=cash, total_assets=total_assets,
+                   holdings=MappingProxyType(holdings))
+
+    @classmethod
+    def from_domestic(cls, balance):
+        """국내 잔고 응답 (get_balance) → 스냅샷"""
+        if not balance or 'output1' not in balance or 'output2' not in balance:
+            return cls(loaded=False)
+
+        summary = balance['output2'][0] if balance['output2'] else {}
+        holdings = {}
+        for stock in balance['output1']:
+            quantity = int(stock.get('hldg_qty', 0))
+            if quantity > 0:
+                holdings[stock.get('pdno')] = {
+                    'quantity': quantity,
+                    'profit_rate': float(stock.get('evlu_pfls_rt', 0)),
+                    'price': int(stock.get('prpr', 0)),
+                    'avg_price': float(stock.get('pchs_avg_pric', 0) or 0)
+                }
+        return cls(int(summary.get('dnca_tot_amt', 0)), int(summary.get('tot_evlu_amt', 0)), holdings)
+
+    @classmethod
+    def from_overseas(cls, balance):
+        """해외 잔고 응답 (get_overseas_balance) → 스냅샷 (총평가 = 예수금 + 보유 평가액)"""
+        if not balance:
+            return cls(loaded=False)
+
+        cash = 0.0
+        try:
+            output2 = balance.get('output2')
+            if isinstance(output2, dict):
+                cash = float(output2.get('frcr_buy_amt_smtl1', 0))  # 외화 매수금액 합계 (예수금)
+            elif isinstance(output2, list) and len(output2) > 0:
+                cash = float(output2[0].get('frcr_buy_amt_smtl1', 0))
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            print(f"⚠️ 잔고 조회 실패: {e}")
+
+        holdings = {}
+        try:
+            for stock in balance.get('output1') or []:
+                quantity = int(float(stock.get('ovrs_cblc_qty', 0)))
+                if quantity > 0:
+                    holdings[stock.get('ovrs_pdno')] = {
+                        'quantity': quantity,
+                        'profit_rate': float(stock.get('evlu_pfls_rt', 0)),
+                        'price': float(stock.get('now_pric2', 0)),
+                        'avg_price': float(stock.get('pchs_avg_pric', 0) or 0)
+                    }
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"⚠️ 보유 종목 조회 실패: {e}")
+
+        total = cash + sum(info['quantity'] * info['price'] for info in holdings.values())
+        return cls(cash, total, holdings)
+
+    @property
+    def holdings_count(self):
+        return len(self.holdings)
+
+    def position(self, symbol, price=None):
+        """보유 수량, 수익률 (미보유면 0, 0)
+
+        Args:
+            price: 현재가 - 주면 매입평균가 기준으로 수익률 재계산 (스냅샷 이후 가격 반영)
+        """
+        info = self.holdings.get(symbol)
+        if not info:
+            return 0, 0
+        if price and info.get('avg_price'):
+            return info['quantity'], round((price / info['avg_price'] - 1) * 100, 2)
+        return info['quantity'], info['profit_rate']
+
+    def value_of(self, symbols):
+        """지정 종목들의 평가금액 합계 (섹터 노출도 계산용)"""
+        return sum(info['quantity'] * info['price']
+                   for symbol, info in self.holdings.items() if symbol in symbols)
+
+
+class EvalContext(_ReadOnly):
+    """종목 1개 평가 스냅샷"""
+    __slots__ = ('symbol', 'exchange', 'bars', 'values', 'latest', 'prev',
+                 'price', 'minute_df', 'investor', 'portfolio', 'created_at')
+
+    def __init__(self, symbol, bars, values, price, minute_df=None, investor=None,
+                 portfolio=None, exchange=None):
+        """
+        Args:
+            symbol: 종목 코드/티커
+            bars: 일봉 OHLCVBars (없으면 None)
+            values: 지표 dict (indicators.compute_all 형식, 없으면 None)
+            price: 현재가 (조회 실패 시 None)
+            minute_df: 분봉 DataFrame (국내만)
+            investor: 기관/외인 수급 dict (국내만)
+            portfolio: PortfolioView (매매 판단이 없는 조회면 None)
+            exchange: 해외 거래소 (국내는 None)
+        """
+        has_values = values is not None and len(bars) > 0
+        self._init(
+            symbol=symbol,
+            exchange=exchange,
+            bars=bars,
+            values=MappingProxyType(values) if values is not None else None,
+            latest=MappingProxyType(row(values, -1)) if has_values else None,
+            prev=MappingProxyType(row(values, -2)) if has_values and len(bars) > 1 else None,
+            price=price,
+            minute_df=minute_df,
+            investor=investor,
+            portfolio=portfolio,
+            created_at=time.time()
+        )
+
+    def with_portfolio(self, portfolio):
+        """같은 시장 데이터 + 다른 계좌 스냅샷 (주문 직전 최신 잔고로 교체)"""
+        ctx = object.__new__(EvalContext)
+        ctx._init(**{name: getattr(self, name) for name in self.__slots__})
+        ctx._init(portfolio=portfolio)
+        return ctx
+
+    def has_bars(self, minimum):
+        """일봉이 minimum개 이상인지"""
+        return self.bars is not None and len(self.bars) >= minimum
@@ -0,0 +1,151 @@
+# exit_engine.py
+"""
+실시간 청산 엔진 (체결가 틱마다 보유 종목 청산 조건 판단)
+- 15분 스캔 주기를 기다리지 않고 가격이 손절/익절/트레일링/급락 기준을 넘는 순간 청산
+- 틱 판단은 메모리 계산만 (보유 수량 + 매입평균가 + pyramid_tracker 기준) → API 호출 없음
+- 조건 충족 시 전략의 _manage_position을 그대로 실행 (단일 청산 스레드)
+  · 주문은 기존 _place_order → sell_stock 경로 (청산 우선순위, 계좌 스냅샷 반영)
+  · 일지 기록 / sold_today / 알림도 스캔 주기 청산과 동일
+  · 스캐너 주문 단계와 같은 trade_lock → 같은 종목 이중 주문 없음
+- 같은 종목은 처리 중이면 틱 무시, 처리 후 COOLDOWN 동안 재판단 안 함
+- 분봉/수급/추세 신호가 필요한 판단(데드크로스, 피라미딩)은 스캔 주기에서 처리
+
+틱 판단 기준 (_manage_position과 같은 값):
+    급락: 전일 대비 -5% 미만 (detect_market_regime 장중 급락, 수익 +8% 이상 50% 부분 청산은 보유 중 1회)
+    트레일링: 최고 수익률 +10% 이상 → 최고점 대비 -3%p
+    손절: pyramid_tracker stop_loss_pct (기본 -5%)
+    익절: profit_target_2 (기본 +20%) 전량 / profit_target_1 (기본 +12%) 50% (보유 중 1회, pyramid_tracker partial_taken)
+"""
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExitEngine:
+    COOLDOWN = 30           # 같은 종목 재판단 대기 (초) - 주문 실패/홀딩 판단 후 틱마다 반복 방지
+    CRASH_CHANGE = -5.0     # 전일 대비 급락 기준 (%)
+    TRAILING_START = 10.0   # 트레일링 스탑 발동 최고 수익률 (%)
+    TRAILING_DRAWDOWN = 3.0 # 최고점 대비 하락폭 (%p)
+
+    def __init__(self, strategy, names=None):
+        """
+        Args:
+            strategy: AdvancedTradingStrategy (계좌 스냅샷, pyramid_tracker, _manage_position 사용)
+            names: {종목코드: 종목명} (알림/일지용)
+        """
+        self.strategy = strategy
+        self.names = dict(names or {})
+        self.positions = {}         # {종목코드: (수량, 매입평균가)}
+        self.pending = set()        # 청산 처리 중인 종목
+        self.cooldown_until = {}
+        self.ticks = 0
+        self.triggers = 0
+        self.orders = 0
+        self.last_latency = 0.0     # 마지막 청산 틱 수신 → 주문 완료 (초)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exit-engine")
+
+    def sync(self, portfolio, names=None):
+        """보유 종목 갱신 (스캔 주기마다) → 실시간 구독할 종목 코드 목록
+
+        Args:
+            portfolio: PortfolioView (strategy.get_portfolio())
+            names: {종목코드: 종목명}
+        """
+        if names:
+            self.names.update(names)
+
+        positions = {
+            code: (info['quantity'], info['avg_price'])
+            for code, info in portfolio.holdings.items() if info.get('avg_price')
+        }
+        with self._lock:
+            self.positions = positions
+        return sorted(positions)
+
+    def check(self, stock_code, price, change_rate=None):
+        """틱 1개 판단 → 청산 사유 (조건 미충족이면 None)"""
+        quantity, avg_price = self.positions.get(stock_code, (0, 0))
+        if not quantity:
+            return None
+
+        profit_rate = (price / avg_price - 1) * 100
+
+        # 최고 수익률은 틱 기준으로 갱신 (스캔 주기 사이 고점도 트레일링에 반영)
+        peak_profit = self.strategy.peak_profit
+        peak = peak_profit.get(stock_code)
+        if peak is None or profit_rate > peak:
+            peak_profit[stock_code] = peak = profit_rate
+
+        stop_loss, target_1, target_2 = self.strategy.exit_thresholds(stock_code)
+        # 급락 부분 청산 / 1차 익절 여부는 스캔 주기와 공유 (pyramid_tracker 영구 저장, 전량 청산 시 초기화)
+        tracker = self.strategy.pyramid_tracker.get(stock_code, {})
+
+        if change_rate is not None and change_rate < self.CRASH_CHANGE and not tracker.get('crash_taken'):
+            return "crash"
+        if peak >= self.TRAILING_START and peak - profit_rate >= self.TRAILING_DRAWDOWN:
+            return "trailing_stop"
+        if profit_rate <= stop_loss:
+            return "stop_loss"
+        if profit_rate >= target_2:
+            return "profit_target_2"
+        if profit_rate >= target_1 and quantity > 1 and not tracker.get('partial_taken'):
+            return "profit_target_1"
+        return None
+
+    def on_tick(self, stock_code, price, change_rate=None):
+        """실시간 체결가 콜백 (수신 스레드) - 판단만 하고 주문은 청산 스레드로 넘김"""
+        received = time.time()
+        with self._lock:
+            self.ticks += 1
+            if stock_code in self.pending or received < self.cooldown_until.get(stock_code, 0):
+                return
+            reason = self.check(stock_code, price, change_rate)
+            if reason is None:
+                return
+            self.pending.add(stock_code)
+            self.triggers += 1
+
+        print(f"\n⚡ 실시간 청산 조건: {self.names.get(stock_code, stock_code)} ({stock_code}) "
+              f"{price:,}원 → {reason}")
+        self._executor.submit(self._exit, stock_code, price, reason, received)
+
+    def _exit(self, stock_code, price, reason, received):
+        """청산 스레드: 틱 가격으로 평가 스냅샷 → 기존 포지션 관리 로직 실행"""
+        strategy = self.strategy
+        stock_name = self.names.get(stock_code, stock_code)
+        quantity = remaining = 0
+        try:
+            with strategy.trade_lock:
+                ctx = strategy.build_tick_context(stock_code, price)
+                quantity, profit_rate = ctx.portfolio.position(stock_code, price)
+                if quantity == 0:
+                    return  # 스캔 주기에서 이미 청산됨
+
+                # 급락 틱이면 급락장 청산 (일봉 기준 판단이 늦어도 틱 기준 우선)
+                regime = "crash" if reason == "crash" else strategy.detect_market_regime(stock_code, ctx)[0]
+                strategy._manage_position(stock_code, stock_name, quantity, profit_rate, regime, ctx, signals=0)
+                remaining, _ = strategy.get_portfolio().position(stock_code)
+
+            if remaining < quantity:
+                self.orders += 1
+                self.last_latency = time.time() - received
+                print(f"⚡ 실시간 청산 완료: {stock_name} ({stock_code}) {quantity - remaining}주 "
+                      f"(틱 수신 후 {self.last_latency * 1000:.0f}ms)")
+        except Exception as e:
+            print(f"❌ 실시간 청산 실패 ({stock_code}): {e}")
+            print(traceback.format_exc())
+        finally:
+            info = strategy.get_portfolio().holdings.get(stock_code)  # 체결 반영된 수량/평균가
+            with self._lock:
+                self.pending.discard(stock_code)
+                self.cooldown_until[stock_code] = time.time() + self.COOLDOWN
+                if info and info.get('avg_price'):
+                    self.positions[stock_code] = (info['quantity'], info['avg_price'])
+                else:
+                    self.positions.pop(stock_code, None)
+
+    def close(self):
+        """처리 중인 청산 완료 대기"""
+        self._executor.shutdown(wait=True)
@@ -36,15 +36,7 @@ def test_all_exchanges():
         print(f"📊 {exc_name} ({exc_code})")
         print(f"{'=' * 80}")
 
-        url = f"{api.config.BASE_URL}/uapi/overseas-stock/v1/trading/inquire-balance"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {api.access_token}",
-            "appkey": api.config.APP_KEY,
-            "appsecret": api.config.APP_SECRET,
-            "tr_id": "VTTS3012R"
-        }
+        tr_id = "VTTS3012R"
 
         # USD, HKD, CNY, JPY, VND 등 다양한 통화
         currency_map = {
@@ -64,8 +56,7 @@ def test_all_exchanges():
 
         time.sleep(0.6)  # Rate limit
 
-        import requests
-        res = requests.get(url, headers=headers, params=params)
+        res = api.get("/uapi/overseas-stock/v1/trading/inquire-balance", tr_id, params)
 
         if res.status_code == 200:
             data = res.json()
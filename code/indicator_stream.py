@@ -0,0 +1,328 @@
+# indicator_stream.py
+"""
+스트리밍 지표 (장중 틱/분봉 갱신용)
+- 새 봉 추가 / 현재 봉 수정 모두 과거 봉 재계산 없이 O(1)
+- 값은 indicators.compute_all(지금까지의 봉)의 마지막 값과 동일 (ta 0.11 기준)
+- 확정된 봉까지의 상태만 보관하고, 현재 봉은 그 상태에서 한 단계만 계산
+  · push(키, 봉): 키가 같으면 현재 봉 수정, 키가 바뀌면 이전 봉 확정 후 추가
+- 상태는 튜플/dict → to_dict()/from_dict()로 JSON 저장 후 다음 실행에서 이어서 계산
+"""
+import json
+import math
+import os
+from config import Config, ensure_data_dir
+
+
+NAN = float('nan')
+
+
+def _div(a, b):
+    """NumPy와 같은 나눗셈 (0으로 나누면 inf/NaN)"""
+    if b == 0:
+        return NAN if a == 0 or math.isnan(a) else math.copysign(math.inf, a)
+    return a / b
+
+
+def _freeze(obj):
+    """JSON에서 읽은 리스트 → 튜플 (상태는 튜플로 이어 붙임)"""
+    if isinstance(obj, list):
+        return tuple(_freeze(item) for item in obj)
+    if isinstance(obj, dict):
+        return {key: _freeze(value) for key, value in obj.items()}
+    return obj
+
+
+class SMA:
+    def __init__(self, window):
+        self.window = window
+
+    def initial(self):
+        return (), 0.0  # (최근 window개 값, 합계)
+
+    def step(self, state, x):
+        values, total = state
+        values, total = values + (x,), total + x
+        if len(values) > self.window:
+            total -= values[0]
+            values = values[1:]
+        value = total / self.window if len(values) == self.window else NAN
+        return (values, total), value
+
+
+class EMA:
+    def __init__(self, window=None, alpha=None, min_periods=None):
+        """span=window (ta _ema) 또는 alpha 직접 지정 (Wilder: 1/window)"""
+        self.alpha = alpha if alpha is not None else 2.0 / (window + 1)
+        self.min_periods = min_periods if min_periods is not None else window
+
+    def initial(self):
+        return NAN, 0  # (직전 값, 유효 개수)
+
+    def step(self, state, x):
+        prev, count = state
+        if math.isnan(x):  # 앞쪽 NaN(예: MACD 계산 전)은 건너뜀
+            return state, prev if count >= self.min_periods else NAN
+        prev = x if count == 0 else (1 - self.alpha) * prev + self.alpha * x
+        count += 1
+        return (prev, count), prev if count >= self.min_periods else NAN
+
+
+class MACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+
+    def initial(self):
+        return self.fast.initial(), self.slow.initial(), self.signal.initial()
+
+    def step(self, state, close):
+        fast, slow, signal = state
+        fast, fast_value = self.fast.step(fast, close)
+        slow, slow_value = self.slow.step(slow, close)
+        line = fast_value - slow_value
+        signal, signal_value = self.signal.step(signal, line)
+        return (fast, slow, signal), (line, signal_value, line - signal_value)
+
+
+class RSI:
+    def __init__(self, window=14):
+        self.up = EMA(alpha=1.0 / window, min_periods=window)
+        self.down = EMA(alpha=1.0 / window, min_periods=window)
+
+    def initial(self):
+        return NAN, self.up.initial(), self.down.initial()
+
+    def step(self, state, close):
+        prev_close, up, down = state
+        diff = close - prev_close  # 첫 봉은 NaN → 상승/하락 0
+        up, up_value = self.up.step(up, diff if diff > 0 else 0.0)
+        down, down_value = self.down.step(down, -diff if diff < 0 else 0.0)
+        value = 100.0 if down_value == 0 else 100 - _div(100, 1 + _div(up_value, down_value))
+        return (close, up, down), value
+
+
+class Bollinger:
+    def __init__(self, window=20, window_dev=2):
+        self.sma = SMA(window)
+        self.window_dev = window_dev
+
+    def initial(self):
+        return self.sma.initial()
+
+    def step(self, state, close):
+        state, middle = self.sma.step(state, close)
+        if math.isnan(middle):
+            return state, (NAN, NAN, NAN)
+        values = state[0]
+        std = math.sqrt(sum((v - middle) ** 2 for v in values) / len(values))  # 모표준편차
+        return state, (middle + self.window_dev * std, middle, middle - self.window_dev * std)
+
+
+class ATR:
+    def __init__(self, window=14):
+        self.window = window
+
+    def initial(self):
+        return NAN, 0, 0.0, 0.0  # (직전 종가, 봉 수, 초기 TR 합, ATR)
+
+    def step(self, state, high, low, close):
+        prev_close, count, seed, atr = state
+        tr = high - low
+        if not math.isnan(prev_close):
+            tr = max(tr, abs(high - prev_close), abs(low - prev_close))
+
+        w = self.window
+        if count < w - 1:  # ta: 처음 window-1개는 0
+            return (close, count + 1, seed + tr, 0.0), 0.0
+        if count == w - 1:
+            atr = (seed + tr) / w
+        else:
+            atr = (atr * (w - 1) + tr) / w
+        return (close, count + 1, seed, atr), atr
+
+
+class ADX:
+    def __init__(self, window=14):
+        self.window = window
+
+    def initial(self):
+        # (직전 고가, 저가, 종가, 봉 수, TR 합, +DM 합, -DM 합, 초기 DX 합, ADX)
+        return NAN, NAN, NAN, 0, 0.0, 0.0, 0.0, 0.0, NAN
+
+    def step(self, state, high, low, close):
+        prev_high, prev_low, prev_close, count, s_tr, s_pos, s_neg, dx_sum, adx = state
+        w = self.window
+        if count == 0:
+            return (high, low, close, 1, s_tr, s_pos, s_neg, dx_sum, adx), NAN
+
+        tr = max(high, prev_close) - min(low, prev_close)
+        up, down = high - prev_high, prev_low - low
+        pos = up if up > down and up > 0 else 0.0
+        neg = down if down > up and down > 0 else 0.0
+
+        # Wilder 누적합: 처음 window개는 단순 합, 이후 S - S/window + 값
+        if count <= w:
+            s_tr, s_pos, s_neg = s_tr + tr, s_pos + pos, s_neg + neg
+        else:
+            s_tr = s_tr - s_tr / w + tr
+            s_pos = s_pos - s_pos / w + pos
+            s_neg = s_neg - s_neg / w + neg
+
+        if count >= w:
+            di_pos, di_neg = 100 * _div(s_pos, s_tr), 100 * _div(s_neg, s_tr)
+            dx = 100 * abs(_div(di_pos - di_neg, di_pos + di_neg))
+            if count < 2 * w - 1:
+                dx_sum += dx
+            elif count == 2 * w - 1:
+                adx = (dx_sum + dx) / w
+            else:
+                adx = (adx * (w - 1) + dx) / w
+
+        state = (high, low, close, count + 1, s_tr, s_pos, s_neg, dx_sum, adx)
+        return state, adx if count >= 2 * w - 1 else NAN  # ta: 2*window봉 미만이면 계산 불가
+
+
+class _Stream:
+    """확정 상태 + 현재 봉 (push 키가 바뀔 때만 이전 봉 확정)"""
+
+    def __init__(self):
+        self.state = self.initial()  # 현재 봉 직전까지 확정된 상태
+        self.key = None               # 현재 봉 키 (날짜/분)
+        self.bar = None               # 현재 봉 입력값
+        self.value = None
+        self._next = None             # 현재 봉까지 반영한 상태 (다음 봉이 오면 확정)
+
+    def push(self, key, *bar):
+        """봉 입력 (키가 같으면 현재 봉 수정, 새 키면 추가, 지난 키는 무시)
+
+        Returns:
+            현재 봉 기준 지표 값
+        """
+        if self.key is not None:
+            if key < self.key:
+                return self.value
+            if key != self.key:
+                self.state = self._next
+
+        self.key, self.bar = key, bar
+        self._next, self.value = self.step(self.state, *bar)
+        return self.value
+
+    def to_dict(self):
+        return {'state': self.state, 'key': self.key, 'bar': self.bar}
+
+    def load(self, data):
+        """to_dict() 결과로 복원 (현재 봉은 다시 계산)"""
+        self.state = _freeze(data['state'])
+        self.key, self.bar = data['key'], None
+        if data.get('bar') is not None:
+            self.bar = tuple(data['bar'])
+            self._next, self.value = self.step(self.state, *self.bar)
+        return self
+
+
+class StreamingSMA(_Stream, SMA):
+    def __init__(self, window):
+        SMA.__init__(self, window)
+        _Stream.__init__(self)
+
+
+class StreamingIndicators(_Stream):
+    """종목 1개 일봉 지표 전체 (compute_all과 같은 컬럼, 마지막 봉 값만)"""
+
+    def __init__(self):
+        self.ma5, self.ma20 = SMA(5), SMA(20)
+        self.rsi = RSI(14)
+        self.macd = MACD()
+        self.bb = Bollinger()
+        self.atr = ATR(14)
+        self.adx = ADX(14)
+        self.vol_ma = SMA(20)
+        super().__init__()
+
+    @classmethod
+    def from_bars(cls, bars):
+        """과거 봉으로 상태 구성 (1회 O(n), 이후 갱신은 O(1))"""
+        stream = cls()
+        columns = (bars.date, bars.open, bars.high, bars.low, bars.close, bars.volume)
+        for date, open_, high, low, close, volume in zip(*(col.tolist() for col in columns)):
+            stream.push(date, open_, high, low, close, volume)
+        return stream
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls().load(data)
+
+    def initial(self):
+        return {
+            'MA5': self.ma5.initial(),
+            'MA20': self.ma20.initial(),
+            'RSI': self.rsi.initial(),
+            'MACD': self.macd.initial(),
+            'BB': self.bb.initial(),
+            'ATR': self.atr.initial(),
+            'ADX': self.adx.initial(),
+            'VOL_MA': self.vol_ma.initial()
+        }
+
+    def step(self, state, open_, high, low, close, volume):
+        close, volume = float(close), float(volume)
+        nxt = {}
+        nxt['MA5'], ma5 = self.ma5.step(state['MA5'], close)
+        nxt['MA20'], ma20 = self.ma20.step(state['MA20'], close)
+        nxt['RSI'], rsi = self.rsi.step(state['RSI'], close)
+        nxt['MACD'], (macd, macd_signal, macd_hist) = self.macd.step(state['MACD'], close)
+        nxt['BB'], (bb_upper, bb_middle, bb_lower) = self.bb.step(state['BB'], close)
+        nxt['ATR'], atr = self.atr.step(state['ATR'], high, low, close)
+        nxt['ADX'], adx = self.adx.step(state['ADX'], high, low, close)
+        nxt['VOL_MA'], vol_ma = self.vol_ma.step(state['VOL_MA'], volume)
+
+        return nxt, {
+            'open': open_,
+            'high': high,
+            'low': low,
+            'close': close,
+            'volume': volume,
+            'MA5': ma5,
+            'MA20': ma20,
+            'RSI': rsi,
+            'MACD': macd,
+            'MACD_signal': macd_signal,
+            'MACD_hist': macd_hist,
+            'BB_upper': bb_upper,
+            'BB_middle': bb_middle,
+            'BB_lower': bb_lower,
+            'ATR': atr,
+            'ADX': adx,
+            'VOL_RATIO': _div(volume, vol_ma)
+        }
+
+
+def _streams_path(path=None):
+    return path or os.path.join(ensure_data_dir(Config.DATA_DIR), 'indicator_streams.json')
+
+
+def save_streams(streams, path=None):
+    """종목별 스트리밍 지표 상태 저장 ({종목: StreamingIndicators})"""
+    path = _streams_path(path)
+    try:
+        data = {symbol: stream.to_dict() for symbol, stream in streams.items()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ 지표 상태 저장 실패: {e}")
+
+
+def load_streams(path=None):
+    """저장된 스트리밍 지표 상태 복원 (없으면 빈 dict)"""
+    path = _streams_path(path)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return {symbol: StreamingIndicators.from_dict(item) for symbol, item in data.items()}
+    except Exception as e:
+        print(f"⚠️ 지표 상태 불러오기 실패: {e}")
+        return {}
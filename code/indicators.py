@@ -0,0 +1,402 @@
+# indicators.py
+"""
+기술적 지표 (NumPy 구현)
+- ta 0.11 라이브러리와 같은 값 (초기 NaN/0 구간 포함) → test_indicators.py로 검증
+- 모든 지표는 2차원 배열 (종목 x 봉)을 받아 종목 전체를 한 번에 계산
+  · 봉 개수가 다른 종목은 앞쪽을 NaN으로 채워 최신 봉 기준으로 정렬 (stack)
+  · 1차원 배열(종목 1개)도 그대로 사용 가능
+- IndicatorMemo: 같은 봉 데이터면 재계산 없이 재사용
+  · 장중에 오늘 봉만 바뀌면 스트리밍 지표(indicator_stream.py)로 마지막 값만 갱신
+"""
+import threading
+import numpy as np
+from indicator_stream import StreamingIndicators
+
+
+def _as_2d(x):
+    x = np.asarray(x, dtype=np.float64)
+    return x[None, :] if x.ndim == 1 else x
+
+
+def _like(result, x):
+    """입력이 1차원이면 결과도 1차원으로"""
+    return result[0] if np.ndim(x) == 1 else result
+
+
+def _first_valid(x):
+    """종목별 첫 유효 봉 위치 (앞쪽 NaN 패딩 길이)"""
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), x.shape[1])
+
+
+def _rolling(x, window, fn):
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] >= window:
+        out[:, window - 1:] = fn(np.lib.stride_tricks.sliding_window_view(x, window, axis=1), axis=2)
+    return out
+
+
+def sma(x, window):
+    """단순 이동평균 (pandas rolling(window).mean()과 동일, 앞부분 NaN)"""
+    return _like(_rolling(_as_2d(x), window, np.mean), x)
+
+
+def rolling_std(x, window, ddof=0):
+    """이동 표준편차 (앞부분 NaN)"""
+    std = lambda w, axis: np.std(w, axis=axis, ddof=ddof)
+    return _like(_rolling(_as_2d(x), window, std), x)
+
+
+def _scan(add, decay, init, seed=None, is_seed=None):
+    """선형 점화식 y[t] = decay * y[t-1] + add[t] (is_seed 위치는 seed 값으로 재시작)
+
+    EMA/ATR/ADX 공통 - 봉 방향은 순차, 종목 방향은 벡터 계산
+    종목 1개면 파이썬 float 루프가 NumPy 열 단위 연산보다 빠름
+    """
+    rows, length = add.shape
+    if rows == 1:
+        values, prev, out = add[0].tolist(), float(init[0]), []
+        seeds = seed[0].tolist() if seed is not None else None
+        marks = is_seed[0].tolist() if is_seed is not None else None
+        for t in range(length):
+            prev = decay * prev + values[t]
+            if marks is not None and marks[t]:
+                prev = seeds[t]
+            out.append(prev)
+        return np.array([out], dtype=np.float64).reshape(rows, length)
+
+    out = np.empty(add.shape)
+    prev = np.array(init, dtype=np.float64)
+    for t in range(length):
+        prev *= decay
+        prev += add[:, t]
+        if is_seed is not None:
+            np.copyto(prev, seed[:, t], where=is_seed[:, t])
+        out[:, t] = prev
+    return out
+
+
+def _ewm(x, alpha, min_periods):
+    """지수 가중 평균 (pandas ewm(adjust=False)와 동일, 종목별 앞쪽 NaN은 건너뜀)"""
+    valid = ~np.isnan(x)
+    if x.shape[1] == 0:
+        return np.empty(x.shape)
+
+    # 앞쪽 NaN을 첫 유효값으로 채우면 종목마다 시작 위치가 달라도 같은 점화식으로 계산됨
+    start = np.minimum(_first_valid(x), x.shape[1] - 1)
+    first = x[np.arange(x.shape[0]), start]
+    filled = np.where(valid, x, first[:, None])
+
+    out = _scan(alpha * filled, 1 - alpha, first)
+    out[np.cumsum(valid, axis=1) < min_periods] = np.nan
+    return out
+
+
+def ema(x, window):
+    """지수 이동평균 (ta의 _ema: span=window, min_periods=window)"""
+    return _like(_ewm(_as_2d(x), 2.0 / (window + 1), window), x)
+
+
+def rsi(close, window=14):
+    """RSI (ta.momentum.rsi와 동일)"""
+    c = _as_2d(close)
+    diff = np.full(c.shape, np.nan)
+    diff[:, 1:] = c[:, 1:] - c[:, :-1]
+
+    # ta: 첫 diff(NaN)는 상승/하락 0으로 처리 (패딩 구간은 NaN 유지)
+    padding = np.isnan(c)
+    up = np.where(padding, np.nan, np.where(diff > 0, diff, 0.0))
+    down = np.where(padding, np.nan, np.where(diff < 0, -diff, 0.0))
+    ema_up = _ewm(up, 1.0 / window, window)
+    ema_down = _ewm(down, 1.0 / window, window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100 - 100 / (1 + ema_up / ema_down)
+    return _like(np.where(ema_down == 0, 100.0, out), close)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    """MACD (ta.trend.MACD와 동일) → (macd, signal, diff)
+
+    시그널선은 MACD 첫 값부터 9개가 쌓여야 계산됨 (30봉이면 전부 NaN)
+    """
+    c = _as_2d(close)
+    line = _ewm(c, 2.0 / (fast + 1), fast) - _ewm(c, 2.0 / (slow + 1), slow)
+    sig = _ewm(line, 2.0 / (signal + 1), signal)
+    return _like(line, close), _like(sig, close), _like(line - sig, close)
+
+
+def bollinger(close, window=20, window_dev=2):
+    """볼린저 밴드 (ta.volatility.BollingerBands와 동일, 모표준편차) → (upper, middle, lower)"""
+    middle = sma(close, window)
+    std = rolling_std(close, window, ddof=0)
+    return middle + window_dev * std, middle, middle - window_dev * std
+
+
+def _prev(x):
+    """한 봉 전 값 (첫 봉은 NaN)"""
+    out = np.full(x.shape, np.nan)
+    out[:, 1:] = x[:, :-1]
+    return out
+
+
+def atr(high, low, close, window=14):
+    """ATR (ta.volatility.average_true_range와 동일, 유효 봉 window-1개 전까지 0)"""
+    h, l, c = _as_2d(high), _as_2d(low), _as_2d(close)
+    prev_close = _prev(c)
+    tr = np.fmax(h - l, np.fmax(np.abs(h - prev_close), np.abs(l - prev_close)))  # 첫 봉은 고가-저가
+    seed = _rolling(tr, window, np.mean)
+    start = _first_valid(c)
+
+    k = np.arange(c.shape[1])[None, :] - start[:, None]  # 종목별 유효 봉 기준 위치
+    is_seed = k == window - 1
+
+    out = _scan(tr / window, (window - 1) / window, np.zeros(c.shape[0]), seed, is_seed)
+    out = np.where(k < 0, np.nan, np.where(k < window - 1, 0.0, out))
+    return _like(out, close)
+
+
+def _wilder_sum(values, window, k, n):
+    """ta ADX 내부 누적합 - i번째 값이 다음 봉(values[t+1])을 더하고 마지막 값은 0 (ta와 동일)"""
+    following = np.full(values.shape, np.nan)
+    following[:, :-1] = values[:, 1:]
+    seed = _rolling(following, window, np.sum)
+
+    i = k - (window - 1)
+    is_seed = i == 0
+
+    out = _scan(following, 1 - 1 / window, np.zeros(values.shape[0]), seed, is_seed)
+    return np.where((i >= 0) & (i < n[:, None] - 1), out, 0.0)
+
+
+def adx(high, low, close, window=14):
+    """ADX (ta.trend.ADXIndicator.adx와 동일, 유효 봉 2*window 미만이면 NaN)"""
+    h, l, c = _as_2d(high), _as_2d(low), _as_2d(close)
+    start = _first_valid(c)
+    k = np.arange(c.shape[1])[None, :] - start[:, None]  # 유효 봉 기준 위치
+    n = c.shape[1] - start - (window - 1)                # ta 내부 배열 길이
+
+    prev_close = _prev(c)
+    dm = np.maximum(h, prev_close) - np.minimum(l, prev_close)
+
+    diff_up = h - _prev(h)
+    diff_down = _prev(l) - l
+    pos = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+    neg = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+
+    trs = _wilder_sum(dm, window, k, n)
+    dip = _wilder_sum(pos, window, k, n)
+    din = _wilder_sum(neg, window, k, n)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_pos = 100 * dip / trs
+        di_neg = 100 * din / trs
+        dx = 100 * np.abs((di_pos - di_neg) / (di_pos + di_neg))
+
+    i = k - (window - 1)
+    is_seed = i == window
+    seed = _prev(_rolling(dx, window, np.mean))  # 직전 window개 dx 평균
+
+    out = _scan(_prev(dx) / window, (window - 1) / window, np.zeros(c.shape[0]), seed, is_seed)
+    out = np.where(k < 0, np.nan, np.where(i < window, 0.0, out))
+
+    out[n <= window] = np.nan  # ta는 예외 발생
+    return _like(out, close)
+
+
+def stack(bars_list, length=None):
+    """여러 종목 일봉을 2차원 배열로 (최신 봉 기준 정렬, 앞쪽 NaN 패딩)
+
+    Args:
+        bars_list: OHLCVBars 리스트
+        length: 사용할 최근 봉 개수 (None이면 가장 긴 종목 기준)
+
+    Returns:
+        dict: {'open', 'high', 'low', 'close', 'volume': (종목 수 x length) float64 배열}
+    """
+    if length is None:
+        length = max((len(bars) for bars in bars_list), default=0)
+
+    matrix = {key: np.full((len(bars_list), length), np.nan)
+              for key in ('open', 'high', 'low', 'close', 'volume')}
+    for row_idx, bars in enumerate(bars_list):
+        m = min(len(bars), length)
+        if m == 0:
+            continue
+        for key in matrix:
+            matrix[key][row_idx, length - m:] = getattr(bars, key)[-m:]
+    return matrix
+
+
+def compute_batch(matrix):
+    """지표 전체 계산 (종목 x 봉 배열)
+
+    Args:
+        matrix: stack() 결과 또는 같은 키를 가진 배열 dict (1차원/2차원)
+
+    Returns:
+        dict: {컬럼명: 배열} - 기존 DataFrame 컬럼명과 동일 + VOL_RATIO (거래량 / 20일 평균)
+    """
+    close, high, low, volume = matrix['close'], matrix['high'], matrix['low'], matrix['volume']
+    macd_line, macd_signal, macd_hist = macd(close)
+    bb_upper, bb_middle, bb_lower = bollinger(close)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vol_ratio = np.asarray(volume, dtype=np.float64) / sma(volume, 20)
+
+    return {
+        'open': matrix['open'],
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume,
+        'MA5': sma(close, 5),
+        'MA20': sma(close, 20),
+        'RSI': rsi(close, 14),
+        'MACD': macd_line,
+        'MACD_signal': macd_signal,
+        'MACD_hist': macd_hist,
+        'BB_upper': bb_upper,
+        'BB_middle': bb_middle,
+        'BB_lower': bb_lower,
+        'ATR': atr(high, low, close, 14),
+        'ADX': adx(high, low, close, 14),
+        'VOL_RATIO': vol_ratio
+    }
+
+
+def compute_all(bars):
+    """종목 1개 지표 전체 계산
+
+    Args:
+        bars: OHLCVBars (과거 → 최신 순)
+
+    Returns:
+        dict: {컬럼명: 1차원 배열} - close/volume 등 원본 포함
+    """
+    return compute_batch({
+        'open': bars.open,
+        'high': bars.high,
+        'low': bars.low,
+        'close': bars.close,
+        'volume': bars.volume
+    })
+
+
+def unstack(values, row_idx, length):
+    """compute_batch 결과에서 한 종목의 최근 length개 봉 (패딩 제외)"""
+    return {key: array[row_idx, array.shape[1] - length:] for key, array in values.items()}
+
+
+def row(values, i=-1):
+    """i번째 봉의 지표 값 (df.iloc[i] 대용)"""
+    return {key: array[i] for key, array in values.items()}
+
+
+_RAW_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class IndicatorMemo:
+    MAX_ENTRIES = 512
+
+    def __init__(self):
+        self._entries = {}
+        self._latest = {}  # (종목, 시작일, 봉 수) → (봉, 지표, 스트리밍 상태)
+        self._lock = threading.Lock()
+
+    def get(self, symbol, bars):
+        """지표 계산 (같은 종목/같은 봉이면 이전 결과 재사용, 오늘 봉만 바뀌었으면 마지막 값만 갱신)"""
+        key = self._key(symbol, bars)
+        with self._lock:
+            values = self._entries.get(key)
+        if values is not None:
+            return values
+
+        values = self._revise(symbol, bars)
+        if values is None:
+            values = compute_all(bars)
+        self.put(symbol, bars, values)
+        return values
+
+    def get_many(self, bars_by_symbol):
+        """여러 종목 한 번에 계산 (메모에 없는 종목만 2차원 배열로 일괄 계산)
+
+        Args:
+            bars_by_symbol: {종목: OHLCVBars}
+
+        Returns:
+            dict: {종목: 지표 dict}
+        """
+        results = {}
+        missing = []
+        with self._lock:
+            for symbol, bars in bars_by_symbol.items():
+                values = self._entries.get(self._key(symbol, bars))
+                if values is not None:
+                    results[symbol] = values
+                elif len(bars) > 0:
+                    missing.append(symbol)
+
+        if missing:
+            bars_list = [bars_by_symbol[symbol] for symbol in missing]
+            batch = compute_batch(stack(bars_list))
+            for row_idx, symbol in enumerate(missing):
+                bars = bars_by_symbol[symbol]
+                values = unstack(batch, row_idx, len(bars))
+                self.put(symbol, bars, values)
+                results[symbol] = values
+        return results
+
+    def put(self, symbol, bars, values):
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._entries.clear()
+                self._latest.clear()
+            self._entries[self._key(symbol, bars)] = values
+
+            window = self._window(symbol, bars)
+            stream = self._latest.get(window, (None, None, None))[2]
+            self._latest[window] = (bars, values, stream)
+
+    def _revise(self, symbol, bars):
+        """같은 구간에서 오늘(마지막) 봉만 바뀐 경우 - 스트리밍으로 마지막 값만 계산
+
+        Returns:
+            지표 dict (이전 결과 복사 + 마지막 값 교체) 또는 None (전체 계산 필요)
+        """
+        window = self._window(symbol, bars)
+        with self._lock:
+            old_bars, old_values, stream = self._latest.get(window, (None, None, None))
+        if old_bars is None or len(bars) < 2 or int(old_bars.date[-1]) != int(bars.date[-1]):
+            return None
+        if not all(np.array_equal(getattr(old_bars, key)[:-1], getattr(bars, key)[:-1])
+                   for key in ('close', 'high', 'low', 'volume')):
+            return None  # 과거 봉이 바뀜 (수정주가, 장중 저장된 전일 봉 확정 등)
+
+        last = (int(bars.date[-1]), bars.open[-1], bars.high[-1], bars.low[-1], bars.close[-1], bars.volume[-1])
+        if stream is None or stream.key != last[0]:
+            stream = StreamingIndicators.from_bars(bars)  # 최초 1회만 과거 봉 재생
+        else:
+            stream.push(*last)  # 현재 봉 수정 O(1)
+
+        values = {key: array.copy() for key, array in old_values.items() if key not in _RAW_COLUMNS}
+        for key, value in stream.value.items():
+            if key not in _RAW_COLUMNS:
+                values[key][-1] = value
+        for key in _RAW_COLUMNS:
+            values[key] = getattr(bars, key)
+
+        with self._lock:
+            self._latest[window] = (bars, values, stream)
+        return values
+
+    @staticmethod
+    def _window(symbol, bars):
+        # 같은 종목/같은 시작일/같은 길이 = 오늘 봉만 다를 수 있는 구간
+        return symbol, int(bars.date[0]), len(bars)
+
+    @staticmethod
+    def _key(symbol, bars):
+        # 마지막 봉 날짜 + 봉 개수 + 마지막 봉 종가/거래량/고가/저가 (장중 오늘 봉이 바뀌면 재계산)
+        return (symbol, int(bars.date[-1]), len(bars), float(bars.close[-1]),
+                int(bars.volume[-1]), float(bars.high[-1]), float(bars.low[-1]))
@@ -1,95 +1,194 @@
 # kis_api.py
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import threading
 import time
 from config import Config
+from market_data import OHLCVBars, DOMESTIC_FIELDS, OVERSEAS_FIELDS
+from rate_limiter import TokenBucketLimiter
+from token_store import TokenStore
 
 class KISApi:
+    # 커넥션 풀 설정 (스레드 동시 호출 대비 여유 있게)
+    POOL_CONNECTIONS = 4   # 호스트별 풀 개수
+    POOL_MAXSIZE = 16      # 풀당 최대 keep-alive 연결 수
+    TIMEOUT = (3.05, 10)   # (연결, 응답) 타임아웃 초
+
+    RATE_LIMIT_MSG_CD = "EGW00201"  # 초당 거래건수 초과 응답 코드
+    RATE_LIMIT_RETRIES = 2
+
+    MULTI_PRICE_LIMIT = 30  # 멀티 시세 1회 조회 최대 종목 수
+
     def __init__(self):
         self.config = Config()
         self.access_token = None
-        self.last_request_time = 0
-        self.min_interval = 0.6  # 최소 0.6초 간격 (초당 1.6회) - 안전하게 조정
-        
-    def _rate_limit(self):
-        """API 호출 속도 제한"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_interval:
-            time.sleep(self.min_interval - elapsed)
-        self.last_request_time = time.time()
-        
+        self.token_expires_at = 0
+        self.token_retry_at = 0
+        self.session = self._create_session()
+        self.calls = 0  # 누적 API 호출 수 (주기 예산 계산용, 재시도 포함)
+        self._calls_lock = threading.Lock()
+
+        # ✅ 접근 토큰 공유 저장소 (PVC, 프로세스 간 락)
+        self.token_store = TokenStore(self.config.APP_KEY, self.config.DATA_DIR)
+
+        # ✅ 토큰 버킷 속도 제한 (같은 APP_KEY 쓰는 모든 프로세스/스레드 공유)
+        self.limiter = TokenBucketLimiter(
+            self.config.APP_KEY, self.config.DATA_DIR, self.config.RATE_BUDGETS
+        )
+
+    def _create_session(self):
+        """keep-alive 세션 생성 (TCP/TLS 연결 재사용)"""
+        session = requests.Session()
+
+        # 끊어진 keep-alive 연결만 재시도 (주문 중복 방지 위해 read 재시도 없음)
+        retry = Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_CONNECTIONS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            max_retries=retry
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        # 모든 요청 공통 헤더
+        session.headers.update({
+            "content-type": "application/json",
+            "appkey": self.config.APP_KEY or "",
+            "appsecret": self.config.APP_SECRET or ""
+        })
+        return session
+
+    def _set_access_token(self, token, expires_at):
+        """토큰 저장 + 세션 공통 헤더 갱신"""
+        self.access_token = token
+        self.token_expires_at = expires_at
+        self.session.headers["authorization"] = f"Bearer {token}"
+
+    def _rate_limit(self, endpoint_class="quotation"):
+        """API 호출 속도 제한 (공유 토큰 버킷에서 1건 차감)"""
+        self.limiter.acquire(endpoint_class)
+
+    @staticmethod
+    def _endpoint_class(path):
+        """엔드포인트 종류 분류 (시세 조회 vs 주문/계좌)"""
+        return "quotation" if "/quotations/" in path else "order"
+
+    def _is_rate_limited(self, res):
+        """서버 측 속도 초과 응답 여부"""
+        return res.status_code != 200 and self.RATE_LIMIT_MSG_CD in res.text
+
+    def request(self, method, path, tr_id=None, params=None, body=None):
+        """KIS API 공용 호출 (keep-alive 세션 + 속도 제한 + 기본 타임아웃)
+
+        Args:
+            method: "GET" 또는 "POST"
+            path: BASE_URL 이후 경로 (예: /uapi/domestic-stock/v1/quotations/inquire-price)
+            tr_id: 거래 ID (공통 헤더에 추가)
+            params: 쿼리 파라미터 (GET)
+            body: JSON 바디 (POST)
+        """
+        url = f"{self.config.BASE_URL}{path}"
+        headers = {"tr_id": tr_id} if tr_id else None
+        data = json.dumps(body) if body is not None else None
+        endpoint_class = self._endpoint_class(path)
+
+        if not path.startswith("/oauth2/"):
+            self._ensure_token()
+
+        for attempt in range(self.RATE_LIMIT_RETRIES + 1):
+            self._rate_limit(endpoint_class)  # 속도 제한
+            with self._calls_lock:
+                self.calls += 1
+            res = self.session.request(
+                method, url, headers=headers, params=params, data=data, timeout=self.TIMEOUT
+            )
+
+            # 초당 거래건수 초과 → 공유 버킷 비우고 재시도 (주문도 미체결이므로 안전)
+            if not self._is_rate_limited(res):
+                break
+            print(f"⚠️ 호출 한도 초과 - 재시도 ({attempt + 1}/{self.RATE_LIMIT_RETRIES})")
+            self.limiter.penalize(endpoint_class)
+
+        return res
+
+    def get(self, path, tr_id, params=None):
+        """GET 호출 (시세/잔고 조회)"""
+        return self.request("GET", path, tr_id, params=params)
+
+    def post(self, path, tr_id, body):
+        """POST 호출 (주문)"""
+        return self.request("POST", path, tr_id, body=body)
+
     def get_access_token(self):
-        """접근 토큰 발급 (파일 공유 방식)"""
-        import os
-
-        token_file = '/tmp/kis_token.json'
-
-        # 1. 기존 토큰 파일 확인 (다른 프로세스가 발급한 토큰)
-        if os.path.exists(token_file):
-            try:
-                with open(token_file, 'r') as f:
-                    token_data = json.load(f)
-
-                # 토큰 유효 시간 체크 (발급 후 24시간)
-                issued_at = token_data.get('issued_at', 0)
-                if time.time() - issued_at < 86400:  # 24시간 = 86400초
-                    self.access_token = token_data['token']
-                    print("✅ 기존 토큰 재사용!")
-                    return self.access_token
-            except Exception as e:
-                print(f"⚠️ 토큰 파일 읽기 실패: {e}")
-
-        # 2. 새 토큰 발급
-        url = f"{self.config.BASE_URL}/oauth2/tokenP"
-
-        headers = {"content-type": "application/json"}
+        """접근 토큰 조회 (PVC 공유 캐시 + 파일 락, 만료 전 자동 갱신)"""
+        token_data = self.token_store.get(self._issue_token)
+
+        if token_data is None:
+            return None
+
+        self._set_access_token(token_data['token'], token_data['expires_at'])
+        if token_data['reused']:
+            print("✅ 기존 토큰 재사용!")
+        else:
+            print("✅ 토큰 발급 성공!")
+        return self.access_token
+
+    def _issue_token(self):
+        """새 토큰 발급 → (token, expires_in초) 또는 None"""
         body = {
             "grant_type": "client_credentials",
             "appkey": self.config.APP_KEY,
             "appsecret": self.config.APP_SECRET
         }
 
-        self._rate_limit()  # 속도 제한
-        res = requests.post(url, headers=headers, data=json.dumps(body))
+        res = self.post("/oauth2/tokenP", None, body)
 
         if res.status_code == 200:
-            self.access_token = res.json()["access_token"]
-
-            # 3. 토큰 파일로 저장 (다른 프로세스와 공유)
-            try:
-                with open(token_file, 'w') as f:
-                    json.dump({
-                        'token': self.access_token,
-                        'issued_at': time.time()
-                    }, f)
-                print("✅ 토큰 발급 성공!")
-            except Exception as e:
-                print(f"⚠️ 토큰 파일 저장 실패: {e}")
-
-            return self.access_token
+            result = res.json()
+            expires_in = int(result.get("expires_in", 86400))  # 기본 24시간
+            return result["access_token"], expires_in
         else:
             print("❌ 토큰 발급 실패:", res.text)
             return None
-    
-    def get_current_price(self, stock_code):
-        """현재가 조회"""
-        url = f"{self.config.BASE_URL}/uapi/domestic-stock/v1/quotations/inquire-price"
-        
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
+
+    def get_approval_key(self):
+        """실시간(WebSocket) 접속키 발급"""
+        body = {
+            "grant_type": "client_credentials",
             "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "FHKST01010100"
+            "secretkey": self.config.APP_SECRET
         }
+
+        res = self.post("/oauth2/Approval", None, body)
+
+        if res.status_code == 200:
+            return res.json().get("approval_key")
+        print("❌ 실시간 접속키 발급 실패:", res.text)
+        return None
+
+    def _ensure_token(self):
+        """토큰이 없거나 만료 임박이면 갱신 (장시간 실행 프로세스 대비)"""
+        now = time.time()
+        if self.access_token is not None and now < self.token_expires_at - self.token_store.REFRESH_MARGIN:
+            return
+        if now < self.token_retry_at:
+            return  # 직전 발급 실패 - 발급 API 제한(분당 1회) 때문에 잠시 대기
+
+        if self.get_access_token() is None:
+            self.token_retry_at = now + 60
+
+    def get_current_price(self, stock_code):
+        """현재가 조회"""
+        tr_id = "FHKST01010100"
         
         params = {
             "fid_cond_mrkt_div_code": "J",
             "fid_input_iscd": stock_code
         }
         
-        self._rate_limit()  # 속도 제한
-        res = requests.get(url, headers=headers, params=params)
+        res = self.get("/uapi/domestic-stock/v1/quotations/inquire-price", tr_id, params)
         
         if res.status_code == 200:
             return res.json()["output"]["stck_prpr"]
@@ -97,17 +196,92 @@ class KISApi:
             print("❌ 조회 실패:", res.text)
             return None
     
+    def get_current_prices(self, stock_codes):
+        """여러 종목 현재가 일괄 조회 (관심종목 멀티 시세, 호출 1회당 최대 30종목)
+
+        Args:
+            stock_codes: 종목 코드 리스트
+
+        Returns:
+            dict: {종목코드: {'price', 'change_rate', 'volume', 'open', 'high', 'low', 'prev_close'}}
+                  (조회 실패 종목은 제외)
+        """
+        codes = list(dict.fromkeys(stock_codes))  # 중복 제거 (순서 유지)
+        quotes = {}
+
+        for i in range(0, len(codes), self.MULTI_PRICE_LIMIT):
+            chunk = codes[i:i + self.MULTI_PRICE_LIMIT]
+            quotes.update(self._get_multi_price(chunk))
+
+        # 멀티 시세에서 빠진 종목은 단건 조회로 보완
+        for code in codes:
+            if code not in quotes:
+                quote = self._get_quote(code)
+                if quote:
+                    quotes[code] = quote
+
+        return quotes
+
+    def _get_multi_price(self, stock_codes):
+        """멀티 시세 1회 호출 (실패 시 빈 dict)"""
+        tr_id = "FHKST11300006"
+
+        params = {}
+        for n, code in enumerate(stock_codes, 1):
+            params[f"FID_COND_MRKT_DIV_CODE_{n}"] = "J"
+            params[f"FID_INPUT_ISCD_{n}"] = code
+
+        res = self.get("/uapi/domestic-stock/v1/quotations/intstock-multprice", tr_id, params)
+
+        data = res.json() if res.status_code == 200 else {}
+        if data.get('rt_cd') != '0':
+            print(f"⚠️ 멀티 시세 조회 실패 ({len(stock_codes)}종목) - 단건 조회로 전환:", res.text[:200])
+            return {}
+
+        quotes = {}
+        for item in data.get('output') or []:
+            code = item.get('inter_shrn_iscd')
+            if code and int(item.get('inter2_prpr') or 0) > 0:
+                quotes[code] = {
+                    'price': int(item['inter2_prpr']),
+                    'change_rate': float(item.get('prdy_ctrt') or 0),
+                    'volume': int(item.get('acml_vol') or 0),
+                    'open': int(item.get('inter2_oprc') or 0),
+                    'high': int(item.get('inter2_hgpr') or 0),
+                    'low': int(item.get('inter2_lwpr') or 0),
+                    'prev_close': int(item.get('inter2_prdy_clpr') or 0)
+                }
+        return quotes
+
+    def _get_quote(self, stock_code):
+        """단건 현재가 조회 → get_current_prices와 같은 형식 (실패 시 None)"""
+        tr_id = "FHKST01010100"
+
+        params = {
+            "fid_cond_mrkt_div_code": "J",
+            "fid_input_iscd": stock_code
+        }
+
+        res = self.get("/uapi/domestic-stock/v1/quotations/inquire-price", tr_id, params)
+
+        if res.status_code != 200 or res.json().get('rt_cd') != '0':
+            print(f"❌ {stock_code} 조회 실패:", res.text[:200])
+            return None
+
+        output = res.json()['output']
+        return {
+            'price': int(output['stck_prpr']),
+            'change_rate': float(output.get('prdy_ctrt') or 0),
+            'volume': int(output.get('acml_vol') or 0),
+            'open': int(output.get('stck_oprc') or 0),
+            'high': int(output.get('stck_hgpr') or 0),
+            'low': int(output.get('stck_lwpr') or 0),
+            'prev_close': int(output.get('stck_sdpr') or 0)
+        }
+
     def get_balance(self):
         """잔고 조회"""
-        url = f"{self.config.BASE_URL}/uapi/domestic-stock/v1/trading/inquire-balance"
-        
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "VTTC8434R"
-        }
+        tr_id = "VTTC8434R"
         
         params = {
             "CANO": self.config.ACCOUNT_NO,
@@ -123,8 +297,7 @@ class KISApi:
             "CTX_AREA_NK100": ""
         }
         
-        self._rate_limit()  # 속도 제한
-        res = requests.get(url, headers=headers, params=params)
+        res = self.get("/uapi/domestic-stock/v1/trading/inquire-balance", tr_id, params)
         
         if res.status_code == 200:
             return res.json()
@@ -134,15 +307,7 @@ class KISApi:
     
     def buy_stock(self, stock_code, quantity, price=0):
         """주식 매수 (price=0이면 시장가)"""
-        url = f"{self.config.BASE_URL}/uapi/domestic-stock/v1/trading/order-cash"
-        
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "VTTC0802U"
-        }
+        tr_id = "VTTC0802U"
         
         body = {
             "CANO": self.config.ACCOUNT_NO,
@@ -153,8 +318,7 @@ class KISApi:
             "ORD_UNPR": "0" if price == 0 else str(price)
         }
         
-        self._rate_limit()  # 속도 제한
-        res = requests.post(url, headers=headers, data=json.dumps(body))
+        res = self.post("/uapi/domestic-stock/v1/trading/order-cash", tr_id, body)
 
         if res.status_code == 200:
             result = res.json()
@@ -173,15 +337,7 @@ class KISApi:
     
     def sell_stock(self, stock_code, quantity, price=0):
         """주식 매도 (price=0이면 시장가)"""
-        url = f"{self.config.BASE_URL}/uapi/domestic-stock/v1/trading/order-cash"
-        
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "VTTC0801U"
-        }
+        tr_id = "VTTC0801U"
         
         body = {
             "CANO": self.config.ACCOUNT_NO,
@@ -192,8 +348,7 @@ class KISApi:
             "ORD_UNPR": "0" if price == 0 else str(price)
         }
         
-        self._rate_limit()  # 속도 제한
-        res = requests.post(url, headers=headers, data=json.dumps(body))
+        res = self.post("/uapi/domestic-stock/v1/trading/order-cash", tr_id, body)
 
         if res.status_code == 200:
             result = res.json()
@@ -219,15 +374,7 @@ class KISApi:
             ticker: 종목 심볼 (예: AAPL, TSLA)
             exchange: 거래소 코드 (NAS=나스닥, NYSE=뉴욕, AMS=아멕스)
         """
-        url = f"{self.config.BASE_URL}/uapi/overseas-price/v1/quotations/price"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "HHDFS00000300"
-        }
+        tr_id = "HHDFS00000300"
 
         params = {
             "AUTH": "",
@@ -235,8 +382,7 @@ class KISApi:
             "SYMB": ticker
         }
 
-        self._rate_limit()
-        res = requests.get(url, headers=headers, params=params)
+        res = self.get("/uapi/overseas-price/v1/quotations/price", tr_id, params)
 
         if res.status_code == 200:
             output = res.json().get("output")
@@ -253,15 +399,7 @@ class KISApi:
             exchange: 거래소 코드 (NASD, NYSE, AMEX 등)
             currency: 통화 코드 (USD, HKD, JPY 등)
         """
-        url = f"{self.config.BASE_URL}/uapi/overseas-stock/v1/trading/inquire-balance"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "VTTS3012R"  # 모의투자용
-        }
+        tr_id = "VTTS3012R"  # 모의투자용
 
         params = {
             "CANO": self.config.ACCOUNT_NO,
@@ -272,8 +410,7 @@ class KISApi:
             "CTX_AREA_NK200": ""
         }
 
-        self._rate_limit()
-        res = requests.get(url, headers=headers, params=params)
+        res = self.get("/uapi/overseas-stock/v1/trading/inquire-balance", tr_id, params)
 
         if res.status_code == 200:
             return res.json()
@@ -301,15 +438,7 @@ class KISApi:
                 print(f"  ❌ 현재가 조회 실패")
                 return None
 
-        url = f"{self.config.BASE_URL}/uapi/overseas-stock/v1/trading/order"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "VTTT1002U"  # 모의투자 매수
-        }
+        tr_id = "VTTT1002U"  # 모의투자 매수
 
         body = {
             "CANO": self.config.ACCOUNT_NO,
@@ -322,8 +451,7 @@ class KISApi:
             "ORD_DVSN": "00"  # 00=지정가 (모의투자 필수)
         }
 
-        self._rate_limit()
-        res = requests.post(url, headers=headers, data=json.dumps(body))
+        res = self.post("/uapi/overseas-stock/v1/trading/order", tr_id, body)
 
         if res.status_code == 200:
             result = res.json()
@@ -360,15 +488,7 @@ class KISApi:
                 print(f"  ❌ 현재가 조회 실패")
                 return None
 
-        url = f"{self.config.BASE_URL}/uapi/overseas-stock/v1/trading/order"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "VTTT1001U"  # 모의투자 매도
-        }
+        tr_id = "VTTT1001U"  # 모의투자 매도
 
         body = {
             "CANO": self.config.ACCOUNT_NO,
@@ -381,8 +501,7 @@ class KISApi:
             "ORD_DVSN": "00"  # 00=지정가 (모의투자 필수)
         }
 
-        self._rate_limit()
-        res = requests.post(url, headers=headers, data=json.dumps(body))
+        res = self.post("/uapi/overseas-stock/v1/trading/order", tr_id, body)
 
         if res.status_code == 200:
             result = res.json()
@@ -400,7 +519,7 @@ class KISApi:
             return None
 
     def get_overseas_ohlcv(self, ticker, exchange="NAS", period="D", count=100):
-        """해외주식 OHLCV 데이터 조회
+        """해외주식 OHLCV 데이터 조회 (DataFrame)
 
         Args:
             ticker: 종목 심볼
@@ -408,68 +527,111 @@ class KISApi:
             period: 기간 (D=일봉, W=주봉, M=월봉)
             count: 데이터 개수
         """
-        url = f"{self.config.BASE_URL}/uapi/overseas-price/v1/quotations/dailyprice"
+        return self.get_ohlcv_bars(ticker, exchange, period, count, as_frame=True)
 
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "HHDFS76240000"
-        }
+    def get_ohlcv_bars(self, symbol, exchange=None, period="D", count=100, as_frame=False):
+        """일봉 데이터 조회 (국내/해외 공통)
 
-        params = {
-            "AUTH": "",
-            "EXCD": exchange,
-            "SYMB": ticker,
-            "GUBN": period,
-            "BYMD": "",  # 조회 시작일 (공백이면 최근부터)
-            "MODP": "1"   # 0=수정주가 미반영, 1=반영
-        }
+        Args:
+            symbol: 종목 코드 (국내) 또는 심볼 (해외)
+            exchange: 해외 거래소 (NAS, NYS, AMS), None이면 국내
+            period: 기간 (D=일봉, W=주봉, M=월봉)
+            count: 데이터 개수
+            as_frame: True면 DataFrame으로 변환
+
+        Returns:
+            OHLCVBars (과거 → 최신 순) 또는 DataFrame, 실패 시 None
+        """
+        if exchange is None:
+            tr_id = "FHKST01010400"
+            path = "/uapi/domestic-stock/v1/quotations/inquire-daily-price"
+            params = {
+                "fid_cond_mrkt_div_code": "J",
+                "fid_input_iscd": symbol,
+                "fid_org_adj_prc": "0",
+                "fid_period_div_code": period
+            }
+            rows_key, fields = 'output', DOMESTIC_FIELDS
+        else:
+            tr_id = "HHDFS76240000"
+            path = "/uapi/overseas-price/v1/quotations/dailyprice"
+            params = {
+                "AUTH": "",
+                "EXCD": exchange,
+                "SYMB": symbol,
+                "GUBN": period,
+                "BYMD": "",  # 조회 기준일 (공백이면 최근부터)
+                "MODP": "1"   # 0=수정주가 미반영, 1=반영
+            }
+            rows_key, fields = 'output2', OVERSEAS_FIELDS
 
-        self._rate_limit()
-        res = requests.get(url, headers=headers, params=params)
+        res = self.get(path, tr_id, params)
 
-        if res.status_code == 200:
-            result = res.json()
-            if 'output2' in result:
-                import pandas as pd
-                data = result['output2'][:count]
-
-                if not data or len(data) == 0:
-                    print(f"❌ 해외주식 데이터 없음: {ticker}")
-                    return None
-
-                # 데이터 파싱 (필드명 확인)
-                df = pd.DataFrame(data)
-
-                # 날짜 필드 (xymd, stck_bsop_date, rsym_bsop_date 등 다양한 필드명 시도)
-                date_field = None
-                for field in ['xymd', 'stck_bsop_date', 'rsym_bsop_date', 'date']:
-                    if field in df.columns:
-                        date_field = field
-                        break
-
-                if date_field is None:
-                    print(f"⚠️ 날짜 필드를 찾을 수 없습니다. 사용 가능한 필드: {df.columns.tolist()}")
-                    # 첫 번째 필드를 날짜로 가정
-                    date_field = df.columns[0]
-
-                df['date'] = pd.to_datetime(df[date_field])
-                df['open'] = df['open'].astype(float)
-                df['high'] = df['high'].astype(float)
-                df['low'] = df['low'].astype(float)
-                df['close'] = df['clos'].astype(float)
-                df['volume'] = df['tvol'].astype(float)
-
-                # 최신 데이터가 위에 있으므로 역순 정렬
-                df = df.iloc[::-1].reset_index(drop=True)
-
-                return df[['date', 'open', 'high', 'low', 'close', 'volume']]
+        if res.status_code != 200:
+            print(f"❌ {symbol} 일봉 조회 실패:", res.text[:200])
+            return None
+
+        rows = res.json().get(rows_key)
+        if not rows:
+            print(f"❌ {symbol} 일봉 데이터 없음")
+            return None
+
+        bars = OHLCVBars.from_rows(rows, fields, count)
+        if len(bars) == 0:
+            print(f"❌ {symbol} 일봉 데이터 없음")
+            return None
+
+        return bars.to_frame() if as_frame else bars
+
+    def get_ohlcv_range(self, symbol, exchange=None, start_date=None, end_date=None):
+        """기간 지정 일봉 조회 (1회 최대 100개, 국내/해외 공통)
+
+        Args:
+            symbol: 종목 코드 (국내) 또는 심볼 (해외)
+            exchange: 해외 거래소 (NAS, NYS, AMS), None이면 국내
+            start_date: 시작일 (YYYYMMDD, None이면 제한 없음)
+            end_date: 종료일 (YYYYMMDD, None이면 오늘)
+
+        Returns:
+            OHLCVBars (end_date부터 과거로 최대 100개, 과거 → 최신 순), 실패 시 None
+        """
+        end_date = end_date or time.strftime('%Y%m%d')
+
+        if exchange is None:
+            tr_id = "FHKST03010100"
+            path = "/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
+            params = {
+                "FID_COND_MRKT_DIV_CODE": "J",
+                "FID_INPUT_ISCD": symbol,
+                "FID_INPUT_DATE_1": start_date or "19000101",
+                "FID_INPUT_DATE_2": end_date,
+                "FID_PERIOD_DIV_CODE": "D",
+                "FID_ORG_ADJ_PRC": "0"  # 0=수정주가
+            }
+            rows_key, fields = 'output2', DOMESTIC_FIELDS
         else:
-            print(f"❌ 해외주식 OHLCV 조회 실패: {res.text}")
+            tr_id = "HHDFS76240000"
+            path = "/uapi/overseas-price/v1/quotations/dailyprice"
+            params = {
+                "AUTH": "",
+                "EXCD": exchange,
+                "SYMB": symbol,
+                "GUBN": "0",  # 0=일, 1=주, 2=월
+                "BYMD": end_date,
+                "MODP": "1"
+            }
+            rows_key, fields = 'output2', OVERSEAS_FIELDS
 
-        return None
+        res = self.get(path, tr_id, params)
+
+        if res.status_code != 200:
+            print(f"❌ {symbol} 기간 일봉 조회 실패:", res.text[:200])
+            return None
+
+        bars = OHLCVBars.from_rows(res.json().get(rows_key) or [], fields)
+        if start_date and len(bars) > 0:
+            bars = bars.tail(int((bars.date >= int(start_date)).sum()))
+        return bars
 
     def get_investor_trading(self, stock_code):
         """기관/외인 매매 동향 조회
@@ -484,23 +646,14 @@ class KISApi:
                 'individual_net': 개인 순매수량
             }
         """
-        url = f"{self.config.BASE_URL}/uapi/domestic-stock/v1/quotations/inquire-investor"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "FHKST01010900"
-        }
+        tr_id = "FHKST01010900"
 
         params = {
             "fid_cond_mrkt_div_code": "J",
             "fid_input_iscd": stock_code
         }
 
-        self._rate_limit()
-        res = requests.get(url, headers=headers, params=params)
+        res = self.get("/uapi/domestic-stock/v1/quotations/inquire-investor", tr_id, params)
 
         if res.status_code == 200:
             result = res.json()
@@ -529,15 +682,7 @@ class KISApi:
         Returns:
             DataFrame: 분봉 데이터 (date, open, high, low, close, volume)
         """
-        url = f"{self.config.BASE_URL}/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.access_token}",
-            "appkey": self.config.APP_KEY,
-            "appsecret": self.config.APP_SECRET,
-            "tr_id": "FHKST03010200"
-        }
+        tr_id = "FHKST03010200"
 
         params = {
             "fid_etc_cls_code": "",
@@ -547,8 +692,7 @@ class KISApi:
             "fid_pw_data_incu_yn": "Y"     # 과거 데이터 포함 여부
         }
 
-        self._rate_limit()
-        res = requests.get(url, headers=headers, params=params)
+        res = self.get("/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice", tr_id, params)
 
         if res.status_code == 200:
             result = res.json()
@@ -0,0 +1,109 @@
+# kis_async.py
+"""
+asyncio용 KIS API 클라이언트
+- KISApi와 같은 국내/해외 메서드를 await로 호출 (이벤트 루프 블로킹 없음)
+- 실제 호출은 KISApi 공용 세션(keep-alive 풀) + 공유 토큰 버킷을 그대로 사용
+- 여러 요청을 동시에 띄워도 실제 호출 속도는 토큰 버킷이 허용량만큼 조절
+
+사용 예:
+    aapi = AsyncKISApi()
+    prices = await aapi.gather("get_current_price", ["005930", "000660"])
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from kis_api import KISApi
+
+
+class AsyncKISApi:
+    MAX_IN_FLIGHT = 8  # 동시에 대기 가능한 요청 수 (HTTP 풀 크기 이하)
+
+    def __init__(self, api=None, max_in_flight=MAX_IN_FLIGHT):
+        """
+        Args:
+            api: 공유할 KISApi 인스턴스 (없으면 새로 생성)
+            max_in_flight: 동시 요청 수 상한
+        """
+        self.api = api or KISApi()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="kis-async")
+
+    async def run(self, fn, *args, **kwargs):
+        """동기 함수를 워커 스레드에서 실행 (전략 계산 등 무거운 작업용)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def gather(self, method_name, items, *args, **kwargs):
+        """같은 메서드를 여러 종목에 동시에 호출
+
+        Args:
+            method_name: 호출할 메서드 이름 (예: "get_current_price")
+            items: 첫 번째 인자 목록 (종목 코드/티커)
+
+        Returns:
+            dict: {item: 결과} (예외 발생 종목은 None)
+        """
+        method = getattr(self, method_name)
+        results = await asyncio.gather(
+            *(method(item, *args, **kwargs) for item in items),
+            return_exceptions=True
+        )
+
+        output = {}
+        for item, result in zip(items, results):
+            if isinstance(result, Exception):
+                print(f"⚠️ {item} {method_name} 실패: {result}")
+                result = None
+            output[item] = result
+        return output
+
+    def close(self):
+        """워커 스레드 정리"""
+        self._executor.shutdown(wait=False)
+
+    # ==================== 공통 ====================
+
+    async def get_access_token(self):
+        return await self.run(self.api.get_access_token)
+
+    async def get_ohlcv_bars(self, symbol, exchange=None, period="D", count=100, as_frame=False):
+        return await self.run(self.api.get_ohlcv_bars, symbol, exchange, period, count, as_frame)
+
+    # ==================== 국내주식 ====================
+
+    async def get_current_price(self, stock_code):
+        return await self.run(self.api.get_current_price, stock_code)
+
+    async def get_current_prices(self, stock_codes):
+        return await self.run(self.api.get_current_prices, stock_codes)
+
+    async def get_balance(self):
+        return await self.run(self.api.get_balance)
+
+    async def buy_stock(self, stock_code, quantity, price=0):
+        return await self.run(self.api.buy_stock, stock_code, quantity, price)
+
+    async def sell_stock(self, stock_code, quantity, price=0):
+        return await self.run(self.api.sell_stock, stock_code, quantity, price)
+
+    async def get_investor_trading(self, stock_code):
+        return await self.run(self.api.get_investor_trading, stock_code)
+
+    async def get_minute_ohlcv(self, stock_code, time_end="153000"):
+        return await self.run(self.api.get_minute_ohlcv, stock_code, time_end)
+
+    # ==================== 해외주식 ====================
+
+    async def get_overseas_current_price(self, ticker, exchange="NAS"):
+        return await self.run(self.api.get_overseas_current_price, ticker, exchange)
+
+    async def get_overseas_balance(self, exchange="NASD", currency="USD"):
+        return await self.run(self.api.get_overseas_balance, exchange, currency)
+
+    async def buy_overseas_stock(self, ticker, quantity, exchange="NASD", price=0):
+        return await self.run(self.api.buy_overseas_stock, ticker, quantity, exchange, price)
+
+    async def sell_overseas_stock(self, ticker, quantity, exchange="NASD", price=0):
+        return await self.run(self.api.sell_overseas_stock, ticker, quantity, exchange, price)
+
+    async def get_overseas_ohlcv(self, ticker, exchange="NAS", period="D", count=100):
+        return await self.run(self.api.get_overseas_ohlcv, ticker, exchange, period, count)
@@ -0,0 +1,191 @@
+# market_data.py
+"""
+일봉(OHLCV) 데이터 컨테이너
+- 컬럼별 NumPy 배열 (date=int64 YYYYMMDD, OHLC=float64, volume=int64)
+- KIS 응답(최신순 JSON 리스트)을 미리 할당한 배열에 바로 파싱 (과거 → 최신 순)
+- 국내/해외 공통 (필드명만 다름), DataFrame 변환은 필요할 때만
+- MarketDataCache: 실행 중 같은 종목 시세를 한 번만 조회하도록 메모
+"""
+import threading
+import time
+from datetime import datetime
+import numpy as np
+
+
+# KIS 응답 필드명 (날짜, 시가, 고가, 저가, 종가, 거래량)
+DOMESTIC_FIELDS = ('stck_bsop_date', 'stck_oprc', 'stck_hgpr', 'stck_lwpr', 'stck_clpr', 'acml_vol')
+OVERSEAS_FIELDS = ('xymd', 'open', 'high', 'low', 'clos', 'tvol')
+
+
+class OHLCVBars:
+    def __init__(self, date, open_, high, low, close, volume):
+        """
+        Args:
+            date: int64 배열 (YYYYMMDD)
+            open_, high, low, close: float64 배열
+            volume: int64 배열
+        """
+        self.date = date
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty(0, np.int64), np.empty(0), np.empty(0),
+                   np.empty(0), np.empty(0), np.empty(0, np.int64))
+
+    @classmethod
+    def from_rows(cls, rows, fields, count=None):
+        """KIS 일봉 응답 파싱 (최신순 rows → 과거순 배열)
+
+        Args:
+            rows: 응답 리스트 (최신 데이터가 먼저)
+            fields: (날짜, 시가, 고가, 저가, 종가, 거래량) 필드명
+            count: 최근 N개만 사용 (None이면 전체)
+
+        Returns:
+            OHLCVBars
+        """
+        date_f, open_f, high_f, low_f, close_f, vol_f = fields
+
+        # 장 시작 전/휴장일 빈 행 제외
+        rows = [row for row in rows if row.get(date_f) and row.get(close_f)]
+        if count is not None:
+            rows = rows[:count]
+
+        n = len(rows)
+        date = np.empty(n, np.int64)
+        ohlc = np.empty((4, n), np.float64)
+        volume = np.empty(n, np.int64)
+
+        for i, row in enumerate(rows):
+            j = n - 1 - i  # 최신순 → 과거순
+            date[j] = int(row[date_f])
+            ohlc[0, j] = float(row[open_f] or 0)
+            ohlc[1, j] = float(row[high_f] or 0)
+            ohlc[2, j] = float(row[low_f] or 0)
+            ohlc[3, j] = float(row[close_f])
+            volume[j] = int(float(row[vol_f] or 0))
+
+        return cls(date, ohlc[0], ohlc[1], ohlc[2], ohlc[3], volume)
+
+    def __len__(self):
+        return len(self.date)
+
+    def tail(self, n):
+        """최근 n개 (배열 뷰, 복사 없음)"""
+        start = max(0, len(self) - n)
+        return OHLCVBars(self.date[start:], self.open[start:], self.high[start:],
+                         self.low[start:], self.close[start:], self.volume[start:])
+
+    def with_bar(self, date, open_, high, low, close, volume):
+        """마지막 봉을 교체(같은 날짜)하거나 뒤에 붙인 새 OHLCVBars (원본은 그대로)"""
+        n = len(self) - (len(self) > 0 and self.date[-1] == date)
+        return OHLCVBars(np.append(self.date[:n], np.int64(date)), np.append(self.open[:n], float(open_)),
+                         np.append(self.high[:n], float(high)), np.append(self.low[:n], float(low)),
+                         np.append(self.close[:n], float(close)), np.append(self.volume[:n], np.int64(volume)))
+
+    def to_frame(self):
+        """DataFrame 변환 (date, open, high, low, close, volume)"""
+        import pandas as pd  # 배열만 쓰는 호출부는 pandas 불필요
+
+        return pd.DataFrame({
+            'date': pd.to_datetime(self.date.astype('U8'), format='%Y%m%d'),
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'close': self.close,
+            'volume': self.volume
+        })
+
+
+class MarketDataCache:
+    QUOTE_TTL = 60    # 현재가/분봉/수급 재사용 시간 (초)
+    BAR_TTL = 10 * 60  # 일봉 재사용 시간 (초) - 장중 오늘 봉이 계속 바뀌므로 상한
+
+    def __init__(self, quote_ttl=QUOTE_TTL, bar_ttl=BAR_TTL):
+        """
+        Args:
+            quote_ttl: 현재가 등 장중 시세 재사용 시간 (초)
+            bar_ttl: 일봉 재사용 시간 (초)
+        """
+        self.quote_ttl = quote_ttl
+        self.bar_ttl = bar_ttl
+        self._entries = {}    # (endpoint, symbol, 날짜) → (저장 시각, 값, 개수)
+        self._key_locks = {}  # 같은 키 동시 조회 시 한 스레드만 호출
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def bars(self, endpoint, symbol, count, fetch_fn):
+        """일봉 메모 (더 많은 개수를 요청할 때만 재조회)
+
+        Args:
+            endpoint: 구분 키 (예: "daily", "daily:NAS")
+            symbol: 종목 코드/심볼
+            count: 필요한 봉 개수
+            fetch_fn: count를 받아 OHLCVBars를 돌려주는 조회 함수
+
+        Returns:
+            OHLCVBars (최근 count개) 또는 None
+        """
+        bars = self.get(endpoint, symbol, fetch_fn, self.bar_ttl, count)
+        return bars.tail(count) if bars is not None else None
+
+    def quote(self, endpoint, symbol, fetch_fn=None):
+        """장중 시세 메모 (quote_ttl 동안 재사용, fetch_fn이 없으면 저장된 값만)"""
+        if fetch_fn is None:
+            entry = self._lookup(self._key(endpoint, symbol), self.quote_ttl, 0)
+            return entry[1] if entry else None
+        return self.get(endpoint, symbol, fetch_fn, self.quote_ttl)
+
+    def put_quotes(self, endpoint, values):
+        """일괄 조회 결과 저장 ({symbol: 값})"""
+        now = time.time()
+        with self._lock:
+            for symbol, value in values.items():
+                self._entries[self._key(endpoint, symbol)] = (now, value, 0)
+
+    def get(self, endpoint, symbol, fetch_fn, ttl, count=0):
+        """메모 조회 → 없거나 만료됐으면 fetch_fn 호출 후 저장 (None은 저장 안 함)"""
+        key = self._key(endpoint, symbol)
+
+        entry = self._lookup(key, ttl, count)
+        if entry:
+            return entry[1]
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # 대기하는 동안 다른 스레드가 조회했는지 재확인
+            entry = self._lookup(key, ttl, count)
+            if entry:
+                return entry[1]
+
+            value = fetch_fn(count) if count else fetch_fn()
+            with self._lock:
+                self.misses += 1
+                if value is not None:
+                    self._entries[key] = (time.time(), value, count)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._key_locks.clear()
+
+    def _key(self, endpoint, symbol):
+        # 날짜가 바뀌면 자동으로 새 키 (전날 봉/시세 재사용 방지)
+        return endpoint, symbol, datetime.now().strftime('%Y%m%d')
+
+    def _lookup(self, key, ttl, count):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[0] < ttl and entry[2] >= count:
+                self.hits += 1
+                return entry
+        return None
@@ -0,0 +1,242 @@
+# monte_carlo.py
+"""
+몬테카를로 강건성 분석 (백테스트 결과 재표본)
+- 백테스트 1회는 경로 1개의 MDD/샤프 비율 → 운이 좋았던 순서인지 알 수 없음
+- 일별 수익률 또는 매도 거래 손익을 재표본해서 수만 개 경로의 성과 분포 계산
+  · bootstrap: 복원 추출 (block > 1이면 연속 구간 단위 추출 → 수익률 자기상관 유지)
+  · shuffle: 순서만 섞기 (최종 수익률/샤프는 그대로, MDD/연속 손실 분포만 변함)
+- 재표본/자산 곡선/지표 계산 모두 (경로 x 기간) 배열 연산 (경로별 파이썬 루프 없음)
+  → 메모리 제한을 위해 CHUNK 경로씩 나눠서 계산
+- 결과: 최종 수익률, MDD, 샤프 비율, 최장 연속 손실의 평균/중앙값/신뢰구간 + 손실 확률
+
+사용 예:
+    python monte_carlo.py data/backtest_result_20250101_120000.json --paths 100000
+    python monte_carlo.py data/walk_forward_20250101_120000.json --method shuffle
+"""
+import argparse
+import json
+from datetime import datetime
+import numpy as np
+
+
+PATHS = 10000         # 기본 경로 수
+CHUNK = 2000          # 한 번에 계산할 경로 수 (경로 x 기간 배열이 CPU 캐시에 가깝게)
+TRADING_DAYS = 252    # 연간 거래일 (샤프 비율 연율화)
+
+METRIC_NAMES = {
+    'final_return': ('최종 수익률', '%'),
+    'mdd': ('최대 낙폭(MDD)', '%'),
+    'sharpe': ('샤프 비율', ''),
+    'losing_streak': ('최장 연속 손실', '회')
+}
+
+
+def resample_indices(n, paths, method='bootstrap', block=1, rng=None):
+    """재표본 인덱스 (paths x n)
+
+    Args:
+        n: 원본 길이
+        method: 'bootstrap' (복원 추출) 또는 'shuffle' (순열)
+        block: bootstrap 연속 구간 길이 (1이면 개별 추출)
+    """
+    rng = rng or np.random.default_rng()
+    if method == 'shuffle':
+        return rng.permuted(np.broadcast_to(np.arange(n), (paths, n)), axis=1)
+    if method != 'bootstrap':
+        raise ValueError(f"알 수 없는 재표본 방식: {method}")
+
+    block = max(1, min(block, n))
+    if block == 1:
+        return rng.integers(0, n, (paths, n))
+    starts = rng.integers(0, n - block + 1, (paths, -(-n // block)))
+    return (starts[:, :, None] + np.arange(block)).reshape(paths, -1)[:, :n]
+
+
+def longest_streak(mask):
+    """행별 최장 연속 True 길이 (paths x n → paths)"""
+    if mask.shape[1] == 0:
+        return np.zeros(mask.shape[0], dtype=np.int64)
+    count = np.cumsum(mask, axis=1, dtype=np.int32)
+    reset = count * ~mask                                   # 끊긴 지점의 누적 수 (True 위치는 0)
+    np.maximum.accumulate(reset, axis=1, out=reset)         # 마지막으로 끊긴 지점의 누적 수
+    count -= reset
+    return count.max(axis=1).astype(np.int64)
+
+
+def path_metrics(returns, compound=True, periods_per_year=TRADING_DAYS):
+    """경로별 성과 지표
+
+    Args:
+        returns: (paths x n) 기간 수익률 (비율, 0.01 = 1%)
+        compound: True면 복리 (일별 수익률), False면 단순 합산 (초기 자본 대비 거래 손익)
+        periods_per_year: 샤프 비율 연율화 기간 수
+
+    Returns:
+        dict: {final_return (%), mdd (%), sharpe, losing_streak} - 각각 길이 paths 배열
+    """
+    # 자산 곡선 (시작 1.0)
+    equity = returns + 1 if compound else np.cumsum(returns, axis=1)
+    if compound:
+        np.cumprod(equity, axis=1, out=equity)
+    else:
+        equity += 1
+    final_return = (equity[:, -1] - 1) * 100
+
+    # MDD = 1 - min(자산 / 직전 고점) (고점은 시작 자산 1.0 포함)
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, 1.0, out=peak)
+    np.divide(equity, peak, out=peak)
+    mdd = (1 - np.minimum(peak.min(axis=1), 1.0)) * 100
+
+    # 샤프 비율 (모표준편차, Backtester.metrics와 같은 정의)
+    mean = returns.mean(axis=1)
+    std = np.sqrt(np.maximum(np.einsum('ij,ij->i', returns, returns) / returns.shape[1] - mean * mean, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 1e-12, mean / std * np.sqrt(periods_per_year), 0.0)
+
+    return {
+        'final_return': final_return,
+        'mdd': mdd,
+        'sharpe': sharpe,
+        'losing_streak': longest_streak(returns < 0)
+    }
+
+
+def simulate(returns, paths=PATHS, method='bootstrap', block=1, compound=True,
+             periods_per_year=TRADING_DAYS, seed=None, chunk=CHUNK):
+    """재표본 경로 성과 분포
+
+    Args:
+        returns: 원본 기간 수익률 (1차원)
+        paths: 경로 수
+        method, block: resample_indices 참고
+        compound, periods_per_year: path_metrics 참고
+        seed: 난수 시드 (같으면 같은 결과)
+        chunk: 한 번에 계산할 경로 수
+
+    Returns:
+        dict: {지표: 길이 paths 배열} 또는 None (수익률 없음)
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    n = len(returns)
+    if n == 0:
+        return None
+
+    rng = np.random.default_rng(seed)
+    parts = []
+    for start in range(0, paths, chunk):
+        idx = resample_indices(n, min(chunk, paths - start), method, block, rng)
+        parts.append(path_metrics(returns[idx], compound, periods_per_year))
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def summarize(samples, actual=None, confidence=0.95):
+    """분포 요약 (평균, 중앙값, 신뢰구간, 실제 경로 값, 손실 확률)
+
+    Args:
+        samples: simulate() 결과
+        actual: 원본 경로 지표 (path_metrics 결과, 경로 1개)
+        confidence: 신뢰수준 (기본 95% → 2.5% ~ 97.5% 분위)
+    """
+    tail = (1 - confidence) / 2 * 100
+    summary = {}
+    for key, values in samples.items():
+        low, median, high = np.percentile(values, [tail, 50, 100 - tail])
+        summary[key] = {
+            'mean': float(np.mean(values)),
+            'median': float(median),
+            'low': float(low),
+            'high': float(high),
+            'actual': float(actual[key][0]) if actual is not None else None
+        }
+    summary['loss_probability'] = float(np.mean(samples['final_return'] < 0) * 100)
+    summary['confidence'] = confidence
+    summary['paths'] = len(samples['final_return'])
+    return summary
+
+
+def daily_returns(equity_curve):
+    """Backtester.equity_curve → 일별 수익률"""
+    totals = np.array([e['total'] for e in equity_curve], dtype=np.float64)
+    if len(totals) < 2:
+        return np.empty(0)
+    return np.diff(totals) / totals[:-1]
+
+
+def trade_returns(trade_history, initial_cash):
+    """Backtester.trade_history → 매도 거래별 손익 (초기 자본 대비 비율), 연간 거래 수
+
+    Returns:
+        (손익 배열, 연간 거래 수) - 거래 기간이 1년 미만이면 연간 거래 수는 거래 수
+    """
+    sells = [t for t in trade_history if t['action'] == 'SELL']
+    returns = np.array([t['profit_amount'] for t in sells], dtype=np.float64) / initial_cash
+    if len(sells) < 2:
+        return returns, max(len(sells), 1)
+
+    first = datetime.strptime(sells[0]['date'], '%Y%m%d')
+    last = datetime.strptime(sells[-1]['date'], '%Y%m%d')
+    years = (last - first).days / 365.25
+    return returns, len(sells) / years if years >= 1 else len(sells)
+
+
+def analyze(trade_history, equity_curve, initial_cash, paths=PATHS, method='bootstrap',
+            block=1, confidence=0.95, seed=None):
+    """일별 수익률 / 거래 손익 두 기준으로 몬테카를로 분석 + 출력
+
+    Returns:
+        dict: {'daily': 요약, 'trades': 요약} (데이터 없는 기준은 None)
+    """
+    report = {}
+
+    returns = daily_returns(equity_curve)
+    report['daily'] = _run(returns, paths, method, block, True, TRADING_DAYS, confidence, seed)
+
+    returns, per_year = trade_returns(trade_history, initial_cash)
+    report['trades'] = _run(returns, paths, method, 1, False, per_year, confidence, seed)
+
+    for key, title in (('daily', f"일별 수익률 {len(daily_returns(equity_curve))}일"),
+                       ('trades', f"매도 거래 {len(returns)}회")):
+        print_summary(report[key], f"{title} 재표본 ({method}{f', 블록 {block}일' if block > 1 and key == 'daily' else ''})")
+    return report
+
+
+def _run(returns, paths, method, block, compound, periods_per_year, confidence, seed):
+    samples = simulate(returns, paths, method, block, compound, periods_per_year, seed)
+    if samples is None:
+        return None
+    actual = path_metrics(np.asarray(returns, dtype=np.float64)[None, :], compound, periods_per_year)
+    return summarize(samples, actual, confidence)
+
+
+def print_summary(summary, title):
+    """분포 요약 출력"""
+    print(f"\n🎲 **몬테카를로: {title}**")
+    if summary is None:
+        print("  데이터 없음")
+        return
+
+    pct = summary['confidence'] * 100
+    print(f"  경로: {summary['paths']:,}개, 신뢰구간 {pct:.0f}%")
+    for key, (label, unit) in METRIC_NAMES.items():
+        s = summary[key]
+        print(f"  {label}: 실제 {s['actual']:.2f}{unit} | 중앙값 {s['median']:.2f}{unit} | "
+              f"구간 {s['low']:.2f} ~ {s['high']:.2f}{unit}")
+    print(f"  손실 확률: {summary['loss_probability']:.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="백테스트 결과 몬테카를로 분석")
+    parser.add_argument('result', help="백테스트 결과 JSON (data/backtest_result_*.json, data/walk_forward_*.json)")
+    parser.add_argument('--paths', type=int, default=PATHS)
+    parser.add_argument('--method', choices=['bootstrap', 'shuffle'], default='bootstrap')
+    parser.add_argument('--block', type=int, default=1, help="일별 수익률 블록 길이 (기본 1)")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.result, 'r', encoding='utf-8') as f:
+        result = json.load(f)
+
+    analyze(result['trades'], result['equity_curve'], result['config']['initial_cash'],
+            args.paths, args.method, args.block, args.confidence, args.seed)
@@ -18,15 +18,16 @@ class MultiStockMonitor:
         print("📊 여러 종목 실시간 모니터링")
         print("=" * 60 + "\n")
 
+        # 현재가 일괄 조회 (멀티 시세)
+        quotes = self.api.get_current_prices([stock['code'] for stock in stock_list])
+
         for stock in stock_list:
             code = stock['code']
             name = stock['name']
 
-            # 현재가 조회
-            current_price = self.api.get_current_price(code)
-
-            if current_price:
-                print(f"📈 {name} ({code}): {current_price}원")
+            quote = quotes.get(code)
+            if quote:
+                print(f"📈 {name} ({code}): {quote['price']:,}원 ({quote['change_rate']:+.2f}%)")
 
         # 보유 종목 확인
         print("\n" + "=" * 60)
@@ -5,22 +5,46 @@
 - 9가지 고급 전략 모두 포함
 """
 from kis_api import KISApi
+from market_data import MarketDataCache
+from bar_store import BarStore
+from indicators import IndicatorMemo, row
+from eval_context import EvalContext, PortfolioView
+from portfolio import Portfolio
+from position_sizing import size_position
+from rate_limiter import request_priority, current_priority, PRIORITY_EXIT
 from discord.discord_notifier import DiscordNotifier
 import pandas as pd
-import ta
 import traceback
 import time
+from datetime import datetime, timedelta
 
 class OverseasTradingStrategy:
+    SIGNAL_WEIGHTS = {
+        'MA': 2.0,
+        'RSI': 1.0,
+        'MACD': 1.5,
+        'Volume': 1.5,
+        'BB': 1.0
+    }
+
+    # 🔎 1차 선별 (저장된 일봉만 사용, 현재가 조회 없음)
+    SCREEN_TOP_N = 15        # 전체 분석할 최대 후보 수 (보유 종목은 별도로 항상 포함)
+    SCREEN_MIN_SCORE = 2.1   # 매수 최소 기준 2/5 (= 7점 만점 중 2.1점)
+    SCREEN_STALE_DAYS = 7    # 저장된 일봉이 이보다 오래됐거나 없으면 선별 때도 증분 업데이트 (후보가 못 돼도 1주 1회)
+
     def __init__(self):
         self.api = KISApi()
         self.api.get_access_token()
         self.notifier = DiscordNotifier(market='overseas')
         self.current_buy_id = {}
-        self.pyramid_tracker = {}
+        self.pyramid_tracker = self._load_pyramid_tracker()  # ✅ 영구 저장 (분할 매수 + 1차 익절 여부)
         self.max_holdings = 15  # 공격적 설정 (해외주식)
         self.sold_today = self._load_sold_today()  # ✅ 영구 저장
         self.peak_profit = {}
+        self.market_data = MarketDataCache()  # 🆕 시세 메모 (종목당 일봉/현재가 1회 조회)
+        self.bar_store = BarStore(self.api)  # 🆕 일봉 로컬 저장소 (PVC, 증분 업데이트)
+        self.indicators = IndicatorMemo()  # 🆕 NumPy 지표 (같은 봉이면 재사용)
+        self.portfolio = Portfolio(self.api.get_overseas_balance, PortfolioView.from_overseas)  # 🆕 계좌 스냅샷 (실행당 1회 조회 + 체결 로컬 반영)
 
     def _load_sold_today(self):
         """당일 익절 종목 로드 (영구 저장)"""
@@ -52,6 +76,34 @@ class OverseasTradingStrategy:
         except Exception as e:
             print(f"⚠️ sold_today 저장 실패: {e}")
 
+    def _load_pyramid_tracker(self):
+        """보유 종목별 분할 매수/익절 상태 로드 (영구 저장)"""
+        import os, json
+        tracker_file = '/app/data/pyramid_tracker_overseas.json'
+        try:
+            if os.path.exists(tracker_file):
+                with open(tracker_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"⚠️ pyramid_tracker 로드 실패: {e}")
+        return {}
+
+    def _save_pyramid_tracker(self):
+        """보유 종목별 분할 매수/익절 상태 저장 (영구 저장)"""
+        import os, json
+        tracker_file = '/app/data/pyramid_tracker_overseas.json'
+        try:
+            os.makedirs(os.path.dirname(tracker_file), exist_ok=True)
+            with open(tracker_file, 'w', encoding='utf-8') as f:
+                json.dump(self.pyramid_tracker, f, ensure_ascii=False, indent=2, default=float)
+        except Exception as e:
+            print(f"⚠️ pyramid_tracker 저장 실패: {e}")
+
+    def _clear_tracker(self, ticker):
+        """전량 청산 → 분할 매수/1차 익절 상태 삭제"""
+        if self.pyramid_tracker.pop(ticker, None) is not None:
+            self._save_pyramid_tracker()
+
     def _convert_exchange_code(self, exchange):
         """거래소 코드 변환 (NAS→NASD, NYSE→NYSE, AMS→AMEX)"""
         mapping = {
@@ -61,41 +113,69 @@ class OverseasTradingStrategy:
         }
         return mapping.get(exchange, exchange)
 
-    def get_current_holdings_count(self):
-        """현재 보유 해외주식 수 조회"""
+    def get_portfolio(self):
+        """해외 계좌 스냅샷 (실행 시작 시 1회 조회, 이후 내 주문 체결로 로컬 갱신)"""
+        return self.portfolio.snapshot()
+
+    def _place_order(self, side, ticker, quantity, exchange_trading, price):
+        """주문 + 계좌 스냅샷 갱신 (성공 시 체결 반영, 예외 시 다음 조회에서 재동기화)
+
+        Args:
+            side: 'buy' 또는 'sell'
+            exchange_trading: 주문용 거래소 코드 (NASD, NYSE, AMEX)
+            price: 체결 추정가 (주문 시점 현재가)
+        """
+        order_fn = self.api.buy_overseas_stock if side == 'buy' else self.api.sell_overseas_stock
+        priority = PRIORITY_EXIT if side == 'sell' else current_priority()  # 매도(청산)는 스캔 호출보다 먼저
         try:
-            balance = self.api.get_overseas_balance()
-            if balance and 'output1' in balance:
-                if isinstance(balance['output1'], list):
-                    holdings = [s for s in balance['output1'] if float(s.get('ovrs_cblc_qty', 0)) > 0]
-                    return len(holdings)
-        except Exception as e:
-            print(f"⚠️ 보유 종목 수 조회 실패: {e}")
-        return 0
+            with request_priority(priority):
+                result = order_fn(ticker, quantity, exchange_trading)
+        except Exception:
+            self.portfolio.mark_stale()
+            raise
+        if result:
+            self.portfolio.apply_fill(ticker, quantity if side == 'buy' else -quantity, price)
+        return result
+
+    def build_context(self, ticker, exchange="NAS", portfolio=None):
+        """종목 평가 스냅샷 생성 - 일봉/지표/현재가를 한 번씩만 조회
+
+        Args:
+            ticker: 티커
+            exchange: 거래소 (NAS, NYSE, AMS)
+            portfolio: PortfolioView (매매 판단 시 전달, 조회만 할 때는 None)
+
+        Returns:
+            EvalContext
+        """
+        bars = self.get_bars(ticker, exchange, count=30)
+        values = None
+        if bars is not None and len(bars) > 0:
+            values = self.indicators.get(f"{exchange}:{ticker}", bars)
 
-    def get_sector_exposure(self, sector_name, account_balance):
-        """특정 섹터의 현재 노출도 계산"""
         try:
-            from watchlist_us import WATCHLIST_US
-            sector_stocks = WATCHLIST_US.get(sector_name, [])
-            sector_tickers = [ticker for ticker, name, exchange in sector_stocks]
+            price = float(self._get_current_price(ticker, exchange))
+        except (TypeError, ValueError):
+            price = None
 
-            balance = self.api.get_overseas_balance()
-            if not balance or 'output1' not in balance:
-                return 0.0
+        return EvalContext(ticker, bars, values, price, portfolio=portfolio, exchange=exchange)
 
-            if not isinstance(balance['output1'], list):
-                return 0.0
+    def get_current_holdings_count(self, portfolio=None):
+        """현재 보유 해외주식 수 (계좌 스냅샷 기준)"""
+        if portfolio is None:
+            portfolio = self.get_portfolio()
+        return portfolio.holdings_count
 
-            total_sector_value = 0
-            for stock in balance['output1']:
-                ticker = stock.get('ovrs_pdno')
-                if ticker in sector_tickers:
-                    qty = float(stock.get('ovrs_cblc_qty', 0))
-                    price = float(stock.get('now_pric2', 0))
-                    total_sector_value += qty * price
+    def get_sector_exposure(self, sector_name, account_balance, portfolio=None):
+        """특정 섹터의 현재 노출도 계산 (계좌 스냅샷 기준)"""
+        try:
+            from watchlist_us import WATCHLIST_US
+            sector_stocks = WATCHLIST_US.get(sector_name, [])
+            sector_tickers = [ticker for ticker, name, exchange in sector_stocks]
 
-            return total_sector_value / account_balance if account_balance > 0 else 0.0
+            if portfolio is None:
+                portfolio = self.get_portfolio()
+            return portfolio.value_of(sector_tickers) / account_balance if account_balance > 0 else 0.0
         except Exception as e:
             print(f"⚠️ 섹터 노출도 조회 실패: {e}")
             return 0.0
@@ -112,53 +192,69 @@ class OverseasTradingStrategy:
             pass
         return None
 
-    def get_ohlcv(self, ticker, exchange="NAS", count=100):
-        """일봉 데이터 조회 (해외주식)"""
-        df = self.api.get_overseas_ohlcv(ticker, exchange, "D", count)
-        if df is not None and len(df) > 0:
-            print(f"✅ {len(df)}개의 일봉 데이터 수신 ({ticker})")
-        return df
-
-    def check_buy_signals(self, ticker, exchange="NAS"):
-        """매수 신호 체크 (가중치 적용)"""
-        WEIGHTS = {
-            'MA': 2.0,
-            'RSI': 1.0,
-            'MACD': 1.5,
-            'Volume': 1.5,
-            'BB': 1.0
-        }
-        MAX_WEIGHTED_SCORE = sum(WEIGHTS.values())
-
-        weighted_score = 0.0
-        signal_details = []
+    def get_bars(self, ticker, exchange="NAS", count=100):
+        """일봉 데이터 조회 (해외주식 OHLCVBars, 로컬 저장소 + 같은 실행 중에는 메모 재사용)"""
+        def fetch(n):
+            bars = self.bar_store.get(ticker, exchange, count=n)
+            if bars is not None:
+                print(f"✅ {len(bars)}개의 일봉 데이터 로드 ({ticker})")
+            return bars
 
-        df = self.get_ohlcv(ticker, exchange, count=30)
-
-        if df is None or len(df) < 20:
-            return 0, ["❌ 데이터 부족"]
+        return self.market_data.bars(f"daily:{exchange}", ticker, count, fetch)
 
-        # 이동평균
-        df['MA5'] = df['close'].rolling(5).mean()
-        df['MA20'] = df['close'].rolling(20).mean()
+    def screen_bars(self, ticker, exchange="NAS", count=30):
+        """1차 선별용 일봉 - 저장된 일봉만 (일봉 API 호출 없음)
 
-        # RSI
-        df['RSI'] = ta.momentum.rsi(df['close'], window=14)
+        저장된 일봉이 없거나 SCREEN_STALE_DAYS보다 오래됐으면 증분 업데이트 1회
+        (후보/보유 종목은 전체 분석 단계의 get_bars에서 갱신)
+        """
+        bars = self.bar_store.get(ticker, exchange, count=count, update=False)
+        stale = int((datetime.now() - timedelta(days=self.SCREEN_STALE_DAYS)).strftime('%Y%m%d'))
+        if bars is None or len(bars) < count or bars.date[-1] < stale:
+            bars = self.bar_store.get(ticker, exchange, count=count)
+        return bars
 
-        # MACD
-        macd = ta.trend.MACD(df['close'])
-        df['MACD'] = macd.macd()
-        df['MACD_signal'] = macd.macd_signal()
-        df['MACD_hist'] = macd.macd_diff()
+    def get_ohlcv(self, ticker, exchange="NAS", count=100):
+        """일봉 데이터 조회 (해외주식 DataFrame)"""
+        bars = self.get_bars(ticker, exchange, count)
+        return bars.to_frame() if bars is not None else None
+
+    def prefetch_indicators(self, symbols, count=30, screen=False):
+        """감시 종목 지표 일괄 계산 (종목 x 봉 2차원 배열 한 번에)
+
+        Args:
+            symbols: (티커, 거래소) 리스트
+            count: 일봉 개수 (check_buy_signals와 같은 30개)
+            screen: True면 1차 선별용 일봉 (저장된 일봉만, 종목별 API 호출 없음)
+
+        Returns:
+            dict: {"거래소:티커": 지표 dict}
+        """
+        bars_by_key = {}
+        for ticker, exchange in symbols:
+            bars = self.screen_bars(ticker, exchange, count) if screen else self.get_bars(ticker, exchange, count)
+            if bars is not None and len(bars) > 0:
+                bars_by_key[f"{exchange}:{ticker}"] = bars
+
+        results = self.indicators.get_many(bars_by_key)
+        print(f"🧮 지표 일괄 계산: {len(results)}/{len(symbols)}개")
+        return results
+
+    def _get_current_price(self, ticker, exchange="NAS"):
+        """현재가 조회 (1분 이내 조회 결과 재사용)"""
+        return self.market_data.quote(
+            f"price:{exchange}", ticker, lambda: self.api.get_overseas_current_price(ticker, exchange)
+        )
 
-        # 볼린저 밴드
-        bb = ta.volatility.BollingerBands(df['close'])
-        df['BB_upper'] = bb.bollinger_hband()
-        df['BB_middle'] = bb.bollinger_mavg()
-        df['BB_lower'] = bb.bollinger_lband()
+    def _daily_signals(self, latest, prev):
+        """일봉 지표 신호 - check_buy_signals와 1차 선별이 함께 사용
 
-        latest = df.iloc[-1]
-        prev = df.iloc[-2]
+        Returns:
+            tuple: (가중치 점수, 상세 내역)
+        """
+        WEIGHTS = self.SIGNAL_WEIGHTS
+        weighted_score = 0.0
+        signal_details = []
 
         # 1. MA 체크
         if pd.notna(latest['MA5']) and pd.notna(latest['MA20']):
@@ -185,8 +281,7 @@ class OverseasTradingStrategy:
                 signal_details.append(f"❌ MACD 약세")
 
         # 4. 거래량
-        avg_volume = df['volume'].tail(20).mean()
-        if latest['volume'] > avg_volume * 1.2:
+        if latest['VOL_RATIO'] > 1.2:  # 거래량 / 20일 평균
             weighted_score += WEIGHTS['Volume']
             signal_details.append(f"✅ 거래량 급증 [+{WEIGHTS['Volume']}]")
         else:
@@ -203,6 +298,76 @@ class OverseasTradingStrategy:
             else:
                 signal_details.append(f"❌ 볼린저 상단")
 
+        return weighted_score, signal_details
+
+    def screen_score(self, ticker, exchange="NAS"):
+        """1차 선별 점수 - 저장된 일봉만 사용 (현재가 조회 없음)
+
+        Returns:
+            float: 일봉 가중치 점수 (일봉 부족이면 None)
+        """
+        bars = self.screen_bars(ticker, exchange, count=30)
+        if bars is None or len(bars) < 20:
+            return None
+
+        values = self.indicators.get(f"{exchange}:{ticker}", bars)
+        score, _ = self._daily_signals(row(values, -1), row(values, -2))
+        return score
+
+    def exit_thresholds(self, ticker):
+        """손절선, 1차/2차 익절 목표 (%) - 매수 시 pyramid_tracker에 저장된 값, 없으면 기본값"""
+        tracker = self.pyramid_tracker.get(ticker)
+        if tracker:
+            return (-tracker.get('stop_loss_pct', 0.05) * 100,
+                    tracker.get('profit_target_1', 12.0),
+                    tracker.get('profit_target_2', 20.0))
+        return -5.0, 12.0, 20.0
+
+    def poll_profile(self, ticker, exchange="NAS"):
+        """적응형 스캔 주기 재료 (poll_scheduler) - 저장된 일봉 + 지표 메모 + 계좌 스냅샷만 사용
+
+        Returns:
+            dict: atr_pct, volume_ratio, held, level_distance (일봉 부족이면 None)
+        """
+        bars = self.get_bars(ticker, exchange, count=30)
+        if bars is None or len(bars) < 21:
+            return None
+
+        latest = row(self.indicators.get(f"{exchange}:{ticker}", bars), -1)
+        close = bars.close[-1]
+        avg_volume = bars.volume[-21:-1].mean()
+        quantity, profit_rate = self.get_portfolio().position(ticker)
+
+        level_distance = None
+        if quantity:
+            levels = list(self.exit_thresholds(ticker))
+            if self.peak_profit.get(ticker, 0) >= 10.0:
+                levels.append(self.peak_profit[ticker] - 3.0)  # 트레일링 스탑선
+            level_distance = min(abs(profit_rate - level) for level in levels)
+
+        return {
+            'atr_pct': latest['ATR'] / close * 100 if pd.notna(latest['ATR']) and close else 0.0,
+            'volume_ratio': bars.volume[-1] / avg_volume if avg_volume else 0.0,
+            'held': quantity > 0,
+            'level_distance': level_distance
+        }
+
+    def check_buy_signals(self, ticker, exchange="NAS", ctx=None):
+        """매수 신호 체크 (가중치 적용, ctx가 없으면 새로 조회)"""
+        MAX_WEIGHTED_SCORE = sum(self.SIGNAL_WEIGHTS.values())
+
+        if ctx is None:
+            ctx = self.build_context(ticker, exchange)
+
+        if not ctx.has_bars(20):
+            return 0, ["❌ 데이터 부족"]
+
+        # 지표 (스냅샷에서 조회 - MA, RSI, MACD, 볼린저 밴드 등)
+        latest = ctx.latest
+        prev = ctx.prev
+
+        weighted_score, signal_details = self._daily_signals(latest, prev)
+
         # 정규화
         normalized_score = (weighted_score / MAX_WEIGHTED_SCORE) * 5.0
         signals = int(round(normalized_score))
@@ -211,35 +376,30 @@ class OverseasTradingStrategy:
 
         return signals, signal_details
 
-    def detect_market_regime(self, ticker, exchange="NAS"):
+    def detect_market_regime(self, ticker, exchange="NAS", ctx=None):
         """시장 상태 감지"""
-        df = self.get_ohlcv(ticker, exchange, count=30)
-        if df is None or len(df) < 20:
-            return "unknown", {}
-
-        # ADX
-        adx_indicator = ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=14)
-        df['ADX'] = adx_indicator.adx()
+        if ctx is None:
+            ctx = self.build_context(ticker, exchange)
 
-        # ATR
-        df['ATR'] = ta.volatility.average_true_range(df['high'], df['low'], df['close'], window=14)
-
-        df['MA5'] = df['close'].rolling(5).mean()
-        df['MA20'] = df['close'].rolling(20).mean()
+        bars = ctx.bars
+        if not ctx.has_bars(20):
+            return "unknown", {}
 
-        latest = df.iloc[-1]
-        prev_5 = df.iloc[-5:] if len(df) >= 5 else df
+        # ADX, ATR, 이동평균 (스냅샷 지표)
+        latest = ctx.latest
 
-        price_change_5d = (latest['close'] - prev_5['close'].iloc[0]) / prev_5['close'].iloc[0] * 100
+        close_5d_ago = bars.close[-5]
+        price_change_5d = (latest['close'] - close_5d_ago) / close_5d_ago * 100
 
-        try:
-            current_price = float(self.api.get_overseas_current_price(ticker, exchange))
+        if ctx.price is not None:
+            current_price = ctx.price
             intraday_change = (current_price - latest['close']) / latest['close'] * 100
-        except:
+        else:
             current_price = latest['close']
             intraday_change = 0
 
-        volatility = df['close'].tail(20).std() / df['close'].tail(20).mean() * 100
+        recent = bars.close[-20:]
+        volatility = recent.std(ddof=1) / recent.mean() * 100
 
         regime_info = {
             'adx': latest['ADX'],
@@ -274,69 +434,57 @@ class OverseasTradingStrategy:
 
         return "unknown", regime_info
 
-    def calculate_position_size(self, ticker, exchange, account_balance, regime="unknown"):
+    def calculate_position_size(self, ticker, exchange, account_balance, regime="unknown", ctx=None):
         """✅ 포지션 사이징 (변동성 기반 + ATR 동적 목표가)"""
-        df = self.get_ohlcv(ticker, exchange, count=30)
-        if df is None or len(df) < 14:
-            return 0, 0, 0, 0.05, 12.0, 20.0  # ✅ 기본 목표가 추가
+        if ctx is None:
+            ctx = self.build_context(ticker, exchange)
 
-        atr = ta.volatility.average_true_range(
-            df['high'], df['low'], df['close'], window=14
-        ).iloc[-1]
-
-        current_price = float(self.api.get_overseas_current_price(ticker, exchange))
-
-        # 변동성 기반 손절
-        atr_pct = (atr / current_price) * 100
-        base_stop_loss_pct = 0.03 if regime == "crash" else 0.05
-
-        if atr_pct < 2.0:
-            adjusted_stop_loss_pct = base_stop_loss_pct * 0.8
-        elif atr_pct > 5.0:
-            adjusted_stop_loss_pct = base_stop_loss_pct * 1.5
-        else:
-            adjusted_stop_loss_pct = base_stop_loss_pct
+        if not ctx.has_bars(14):
+            return 0, 0, 0, 0.05, 12.0, 20.0  # ✅ 기본 목표가 추가
 
-        adjusted_stop_loss_pct = max(0.03, min(adjusted_stop_loss_pct, 0.08))
+        atr = ctx.latest['ATR']
 
-        # ✅ ATR 기반 동적 목표가 설정
-        if atr_pct < 2.0:
-            profit_target_1 = 10.0  # 낮은 변동성: 보수적
-            profit_target_2 = 18.0
-        elif atr_pct > 5.0:
-            profit_target_1 = 15.0  # 높은 변동성: 공격적
-            profit_target_2 = 25.0
-        else:
-            profit_target_1 = 12.0  # 보통 변동성: 기본
-            profit_target_2 = 20.0
+        current_price = ctx.price
+        if current_price is None:
+            print("❌ 현재가 조회 실패 - 매수 보류")
+            return 0, 0, 0, 0.05, 12.0, 20.0
 
-        # 수량 계산 (2% 리스크)
-        risk_amount = account_balance * 0.02
-        stop_loss_amount = current_price * adjusted_stop_loss_pct
-        shares = int(risk_amount / stop_loss_amount)
+        # 변동성 기반 손절 / ATR 동적 목표가 / 2% 리스크 수량 (백테스트와 같은 순수 함수)
+        shares, stop_loss_pct, profit_target_1, profit_target_2 = size_position(
+            account_balance, current_price, atr, regime
+        )
 
-        # 횡보장 50% 축소
-        if regime == "sideways":
-            shares = int(shares * 0.5)
+        return shares, current_price, atr, stop_loss_pct, profit_target_1, profit_target_2
 
-        # 한 종목 최대 10% (횡보장 5%)
-        max_position_pct = 0.05 if regime == "sideways" else 0.10
-        max_position = account_balance * max_position_pct
-        max_shares = int(max_position / current_price)
+    def evaluate(self, ticker, exchange, ctx):
+        """시장 상태 + 매수 신호 계산 (주문/잔고 없음 - 스캐너 분석 단계에서 병렬 실행)
 
-        shares = min(shares, max_shares)
+        Returns:
+            tuple: (regime, regime_info, signals, details)
+        """
+        regime, regime_info = self.detect_market_regime(ticker, exchange, ctx)
+        signals, details = self.check_buy_signals(ticker, exchange, ctx)
+        return regime, regime_info, signals, details
 
-        return shares, current_price, atr, adjusted_stop_loss_pct, profit_target_1, profit_target_2
+    def execute_strategy(self, ticker, stock_name, exchange, portfolio=None, ctx=None, evaluation=None):
+        """전략 실행 (해외주식, portfolio가 없으면 잔고 1회 조회)
 
-    def execute_strategy(self, ticker, stock_name, exchange):
-        """전략 실행 (해외주식)"""
+        ctx/evaluation: 스캐너에서 미리 만든 스냅샷/신호 (계좌는 실행 시점 스냅샷으로 교체)
+        """
         print(f"\n{'=' * 60}")
         print(f"🇺🇸 해외주식 전략 실행: {stock_name} ({ticker}) [{exchange}]")
         print(f"{'=' * 60}\n")
 
         try:
-            # 시장 상태 감지
-            regime, regime_info = self.detect_market_regime(ticker, exchange)
+            # 평가 스냅샷 (일봉/지표/현재가/잔고 한 번씩 조회 → 모든 단계가 같은 값 사용)
+            portfolio = portfolio if portfolio is not None else self.get_portfolio()
+            if ctx is None:
+                ctx = self.build_context(ticker, exchange, portfolio)
+            else:
+                ctx = ctx.with_portfolio(portfolio)
+
+            # 시장 상태 감지 + 매수 신호 확인
+            regime, regime_info, signals, details = evaluation or self.evaluate(ticker, exchange, ctx)
             print(f"🌐 시장 상태: {regime.upper()}")
             if regime_info:
                 print(f"  ADX: {regime_info.get('adx', 0):.1f}")
@@ -344,31 +492,14 @@ class OverseasTradingStrategy:
                 print(f"  장중 변화율: {regime_info.get('intraday_change', 0):.2f}%")
                 print(f"  변동성: {regime_info.get('volatility', 0):.2f}%\n")
 
-            # 매수 신호 확인
-            signals, details = self.check_buy_signals(ticker, exchange)
-
             print("📊 매수 신호 체크:")
             for detail in details:
                 print(f"  {detail}")
             print(f"\n신호 점수: {signals}/5")
 
-            # 잔고 확인
-            balance = self.api.get_overseas_balance()
-            cash_usd = 0
-            holding_qty = 0
-            profit_rate = 0
-
-            if balance and 'output2' in balance:
-                try:
-                    output2 = balance['output2']
-                    if isinstance(output2, dict):
-                        # frcr_buy_amt_smtl1 = 외화 매수금액 합계 (예수금)
-                        cash_usd = float(output2.get('frcr_buy_amt_smtl1', 0))
-                    elif isinstance(output2, list) and len(output2) > 0:
-                        cash_usd = float(output2[0].get('frcr_buy_amt_smtl1', 0))
-                except (KeyError, IndexError, TypeError, ValueError) as e:
-                    print(f"⚠️ 잔고 조회 실패: {e}")
-                    cash_usd = 0
+            # 잔고 확인 (스냅샷)
+            cash_usd = ctx.portfolio.cash
+            holding_qty, profit_rate = ctx.portfolio.position(ticker, ctx.price)
 
             # 해외주식 계좌에 돈이 없으면 기본값 사용 (테스트용)
             if cash_usd == 0:
@@ -377,16 +508,6 @@ class OverseasTradingStrategy:
             else:
                 print(f"✅ 해외주식 예수금 확인: ${cash_usd:,.2f}")
 
-            if balance and 'output1' in balance:
-                try:
-                    for stock in balance['output1']:
-                        if stock.get('ovrs_pdno') == ticker and float(stock.get('ovrs_cblc_qty', 0)) > 0:
-                            holding_qty = int(float(stock.get('ovrs_cblc_qty', 0)))
-                            profit_rate = float(stock.get('evlu_pfls_rt', 0))
-                            break
-                except (KeyError, TypeError, ValueError) as e:
-                    print(f"⚠️ 보유 종목 조회 실패: {e}")
-
             print(f"\n💰 계좌 상태:")
             print(f"  예수금: ${cash_usd:,.2f}")
             print(f"  보유수량: {holding_qty}주")
@@ -395,7 +516,7 @@ class OverseasTradingStrategy:
 
             # 매매 결정
             if holding_qty > 0:
-                self._manage_position(ticker, stock_name, exchange, holding_qty, profit_rate, regime)
+                self._manage_position(ticker, stock_name, exchange, holding_qty, profit_rate, regime, ctx, signals)
             else:
                 # 급락장 매수 금지
                 if regime == "crash":
@@ -403,7 +524,7 @@ class OverseasTradingStrategy:
                     return
 
                 # 보유 종목 수 제한
-                current_holdings = self.get_current_holdings_count()
+                current_holdings = self.get_current_holdings_count(ctx.portfolio)
                 if current_holdings >= self.max_holdings:
                     print(f"\n⚠️ 보유 종목 한도 초과 ({current_holdings}/{self.max_holdings})")
                     return
@@ -412,7 +533,7 @@ class OverseasTradingStrategy:
                 stock_sector = self.get_stock_sector(ticker)
                 if stock_sector:
                     total_balance = cash_usd * 1300  # USD to KRW 환산 (대략)
-                    sector_exposure = self.get_sector_exposure(stock_sector, total_balance)
+                    sector_exposure = self.get_sector_exposure(stock_sector, total_balance, ctx.portfolio)
                     if sector_exposure >= 0.30:
                         print(f"\n⚠️ 섹터 한도 초과 ({stock_sector}: {sector_exposure*100:.1f}% / 30%)")
                         return
@@ -426,20 +547,20 @@ class OverseasTradingStrategy:
                 if regime == "sideways":
                     if signals >= 2:
                         print(f"\n📊 횡보장 - 매수! ({signals}/5) [공격적]")
-                        self._execute_buy(ticker, stock_name, exchange, cash_usd, signals, regime)
+                        self._execute_buy(ticker, stock_name, exchange, cash_usd, signals, regime, ctx)
                     else:
                         print(f"\n❌ 횡보장 - 신호 부족 ({signals}/5, 필요: 2+)")
 
                 elif regime == "trending":
                     if signals >= 2:
                         print(f"\n📈 추세장 - 매수! ({signals}/5) [공격적]")
-                        self._execute_buy(ticker, stock_name, exchange, cash_usd, signals, regime)
+                        self._execute_buy(ticker, stock_name, exchange, cash_usd, signals, regime, ctx)
                     else:
                         print(f"\n❌ 추세장 - 신호 부족 ({signals}/5, 필요: 2+)")
 
                 else:
                     if signals >= 4:
-                        self._execute_buy(ticker, stock_name, exchange, cash_usd, signals, regime)
+                        self._execute_buy(ticker, stock_name, exchange, cash_usd, signals, regime, ctx)
                     else:
                         print(f"\n❌ 신호 부족 ({signals}/5, 필요: 4+)")
 
@@ -453,14 +574,14 @@ class OverseasTradingStrategy:
                 error=error_msg
             )
 
-    def _execute_buy(self, ticker, stock_name, exchange, cash_usd, signals, regime):
+    def _execute_buy(self, ticker, stock_name, exchange, cash_usd, signals, regime, ctx=None):
         """매수 실행"""
         print(f"\n🎯 강한 매수 신호! ({signals}/5)")
 
         # USD 환산 (간단히 $10,000 초기자본 가정)
         total_balance_usd = cash_usd + 10000
         shares, current_price, atr, stop_loss_pct, target_1, target_2 = self.calculate_position_size(
-            ticker, exchange, total_balance_usd * 1300, regime  # KRW 환산
+            ticker, exchange, total_balance_usd * 1300, regime, ctx  # KRW 환산
         )
 
         if shares == 0:
@@ -479,7 +600,7 @@ class OverseasTradingStrategy:
             print(f"  손절: -{stop_loss_pct*100:.1f}%")
             print(f"  ✅ 익절 목표: 1차 +{target_1:.0f}% (50%), 2차 +{target_2:.0f}% (100%)")
 
-            result = self.api.buy_overseas_stock(ticker, first_buy, exchange_trading)
+            result = self._place_order('buy', ticker, first_buy, exchange_trading, current_price)
 
             if result:
                 print("✅ 매수 성공!")
@@ -492,43 +613,57 @@ class OverseasTradingStrategy:
                     'stop_loss_pct': stop_loss_pct,
                     'profit_target_1': target_1,  # ✅ 추가
                     'profit_target_2': target_2,  # ✅ 추가
-                    'exchange': exchange
+                    'exchange': exchange,
+                    'partial_taken': False        # 🆕 1차 익절 완료 여부 (보유 중 1회)
                 }
+                self._save_pyramid_tracker()
 
                 self.notifier.notify_buy(stock_name, ticker, first_buy, current_price)
             else:
                 print("❌ 매수 실패")
 
-    def _manage_position(self, ticker, stock_name, exchange, quantity, profit_rate, regime):
-        """포지션 관리"""
+    def _manage_position(self, ticker, stock_name, exchange, quantity, profit_rate, regime, ctx=None, signals=None):
+        """포지션 관리 (ctx/signals: execute_strategy의 스냅샷과 신호 점수 재사용)"""
         print(f"\n📊 포지션 관리 중...")
 
-        current_price = float(self.api.get_overseas_current_price(ticker, exchange))
+        if ctx is None:
+            ctx = self.build_context(ticker, exchange)
+
+        current_price = ctx.price
+        if current_price is None:
+            print("❌ 현재가 조회 실패 - 포지션 관리 스킵")
+            return
         exchange_trading = self._convert_exchange_code(exchange)
 
-        # 급락장 차등 청산
-        if regime == "crash":
+        # 급락장 차등 청산 (부분 청산은 보유 중 1회 → 이후 남은 물량은 손절/트레일링/익절 기준)
+        crash_taken = self.pyramid_tracker.get(ticker, {}).get('crash_taken', False)
+        if regime == "crash" and crash_taken:
+            print(f"🚨 급락장 - 부분 청산 완료 종목 (남은 {quantity}주는 일반 기준으로 관리)")
+        elif regime == "crash":
             if profit_rate >= 8.0:
-                sell_qty = int(quantity * 0.5)
+                sell_qty = int(quantity * 0.5) if quantity > 1 else quantity
                 print(f"🚨 급락장 - 50% 부분 청산 (수익 {profit_rate:.2f}%)")
             else:
                 sell_qty = quantity
                 print(f"🚨 급락장 - 전량 청산")
 
-            self.api.sell_overseas_stock(ticker, sell_qty, exchange_trading)
+            if self._place_order('sell', ticker, sell_qty, exchange_trading, current_price):
+                if sell_qty < quantity:
+                    self.pyramid_tracker.setdefault(ticker, {'remaining_qty': 0})['crash_taken'] = True
+                    self._save_pyramid_tracker()
+                else:
+                    self._clear_tracker(ticker)
             return
 
         # 추세 반전 감지 (데드크로스)
-        df = self.get_ohlcv(ticker, exchange, count=30)
-        if df is not None and len(df) >= 20:
-            df['MA5'] = df['close'].rolling(5).mean()
-            df['MA20'] = df['close'].rolling(20).mean()
-            latest = df.iloc[-1]
+        if ctx.has_bars(20):
+            latest = ctx.latest
 
             if pd.notna(latest['MA5']) and pd.notna(latest['MA20']):
                 if latest['MA5'] < latest['MA20'] and profit_rate > 0:
                     print(f"\n⚠️ 추세 반전! 익절 (수익률 {profit_rate:.2f}%)")
-                    self.api.sell_overseas_stock(ticker, quantity, exchange_trading)
+                    if self._place_order('sell', ticker, quantity, exchange_trading, current_price):
+                        self._clear_tracker(ticker)
                     return
 
         # ✅ 트레일링 스탑 - 발동 기준 하향 (+15% → +10%)
@@ -542,45 +677,45 @@ class OverseasTradingStrategy:
 
             if drawdown >= 3.0:
                 print(f"\n📉 트레일링 스탑! (최고 {peak:.2f}% → 현재 {profit_rate:.2f}%)")
-                self.api.sell_overseas_stock(ticker, quantity, exchange_trading)
+                self._place_order('sell', ticker, quantity, exchange_trading, current_price)
                 # ✅ 영구 저장 추가
                 self.sold_today[ticker] = {'profit_rate': profit_rate, 'reason': 'trailing_stop'}
                 self._save_sold_today()
-                if ticker in self.pyramid_tracker:
-                    del self.pyramid_tracker[ticker]
+                self._clear_tracker(ticker)
                 return
 
         # 피라미드 2차 매수
         if ticker in self.pyramid_tracker:
             tracker = self.pyramid_tracker[ticker]
-            remaining_qty = tracker['remaining_qty']
+            remaining_qty = tracker.get('remaining_qty', 0)
 
             if profit_rate >= 3.0 and remaining_qty > 0:
                 print(f"\n📈 피라미드 2차 매수! (수익률 {profit_rate:.2f}%)")
-                signals, _ = self.check_buy_signals(ticker, exchange)
+                if signals is None:
+                    signals, _ = self.check_buy_signals(ticker, exchange, ctx)
 
                 if signals >= 3:
                     second_buy = remaining_qty
-                    result = self.api.buy_overseas_stock(ticker, second_buy, exchange_trading)
+                    result = self._place_order('buy', ticker, second_buy, exchange_trading, current_price)
                     if result:
                         print(f"✅ 2차 추가매수 완료: {second_buy}주")
-                        del self.pyramid_tracker[ticker]
+                        tracker['remaining_qty'] = 0  # 분할 매수 완료 (익절 상태는 유지)
+                        self._save_pyramid_tracker()
 
         # 손절
-        if ticker in self.pyramid_tracker:
-            stop_loss_pct = self.pyramid_tracker[ticker].get('stop_loss_pct', 0.05)
+        if 'stop_loss_pct' in self.pyramid_tracker.get(ticker, {}):
+            stop_loss_pct = self.pyramid_tracker[ticker]['stop_loss_pct']
             stop_loss_threshold = -stop_loss_pct * 100
         else:
             stop_loss_threshold = -5.0 if regime != "crash" else -3.0
 
         if profit_rate <= stop_loss_threshold:
             print(f"\n🚨 손절! ({profit_rate:.2f}% <= {stop_loss_threshold:.2f}%)")
-            self.api.sell_overseas_stock(ticker, quantity, exchange_trading)
+            self._place_order('sell', ticker, quantity, exchange_trading, current_price)
             # ✅ 영구 저장
             self.sold_today[ticker] = {'profit_rate': profit_rate, 'reason': 'stop_loss'}
             self._save_sold_today()
-            if ticker in self.pyramid_tracker:
-                del self.pyramid_tracker[ticker]
+            self._clear_tracker(ticker)
             return
 
         # ✅ ATR 기반 동적 익절 목표 사용
@@ -590,21 +725,23 @@ class OverseasTradingStrategy:
         else:
             target_1, target_2 = 12.0, 20.0
 
-        # 1차 익절 (50% 매도)
-        if profit_rate >= target_1 and quantity > 1:
+        # 1차 익절 (50% 매도) - 보유 중 1회만 (전량 청산 시 초기화)
+        partial_taken = self.pyramid_tracker.get(ticker, {}).get('partial_taken', False)
+        if profit_rate >= target_1 and quantity > 1 and not partial_taken:
             sell_qty = int(quantity * 0.5)
             print(f"\n🎯 1차 익절! (+{target_1:.0f}%) - {sell_qty}주 매도")
-            self.api.sell_overseas_stock(ticker, sell_qty, exchange_trading)
+            if self._place_order('sell', ticker, sell_qty, exchange_trading, current_price):
+                self.pyramid_tracker.setdefault(ticker, {'remaining_qty': 0})['partial_taken'] = True
+                self._save_pyramid_tracker()
 
         # 2차 익절 (전량 매도)
         elif profit_rate >= target_2:
             print(f"\n🚀 2차 익절! (+{target_2:.0f}%) - 전량 매도")
-            self.api.sell_overseas_stock(ticker, quantity, exchange_trading)
+            self._place_order('sell', ticker, quantity, exchange_trading, current_price)
             # ✅ 영구 저장
             self.sold_today[ticker] = {'profit_rate': profit_rate, 'reason': '2nd_profit_take'}
             self._save_sold_today()
-            if ticker in self.pyramid_tracker:
-                del self.pyramid_tracker[ticker]
+            self._clear_tracker(ticker)
             if ticker in self.peak_profit:
                 del self.peak_profit[ticker]
 
@@ -619,6 +756,7 @@ if __name__ == "__main__":
 
     strategy = OverseasTradingStrategy()
     watchlist = get_all_us_stocks()
+    strategy.prefetch_indicators([(ticker, exchange) for ticker, _, exchange in watchlist])
 
     for ticker, name, exchange in watchlist:
         strategy.execute_strategy(ticker, name, exchange)
@@ -0,0 +1,177 @@
+# poll_scheduler.py
+"""
+종목별 적응형 스캔 주기
+- 모든 종목을 같은 15분 주기로 보는 대신 종목마다 다음 스캔 시각을 따로 관리
+  · 조용한 비보유 종목 → 드물게 (최대 MAX_INTERVAL)
+  · 변동성 큰 보유 종목 / 손절·익절선 근처 → 자주 (최소 MIN_INTERVAL)
+- 주기 판단 재료 (저장된 일봉 + 지표 메모 + 계좌 스냅샷 → 추가 API 호출 없음)
+  · ATR% (일봉 평균 변동폭 / 종가)
+  · 거래량 비율 (오늘 거래량 / 직전 20일 평균)
+  · 보유 여부, 현재 수익률과 손절/익절선 사이 거리 (%p)
+- 호출 용량 (capacity): 기준 주기(base) 동안 스캔할 종목 수 상한
+  → 관심종목이 늘어 예상 스캔 수가 용량을 넘으면 비보유 종목 주기를 비례해서 늘림
+  → 관심종목이 몇 배로 늘어도 API 사용량은 그대로 (보유 종목 주기는 유지)
+  → 단 종목별 주기는 MAX_INTERVAL까지만 늘어남 (기본값: 용량 60 x 4배 = 약 240종목까지 사용량 일정)
+
+사용 예:
+    scheduler = PollScheduler.domestic(strategy)
+    due = scheduler.due(watchlist)          # 지금 스캔할 종목
+    results = scanner.run(due)
+    scheduler.schedule(due)                 # 스캔한 종목 다음 시각 계산
+
+환경 변수:
+    POLL_MIN_INTERVAL / POLL_MAX_INTERVAL: 종목별 주기 하한/상한 (초, 기본 120 / 3600)
+    POLL_CAPACITY: 기준 주기(15분)당 스캔 종목 수 상한 (기본 60)
+"""
+import math
+import os
+import threading
+import time
+
+
+class PollScheduler:
+    BASE_INTERVAL = 900     # 활동도 1.0 종목 주기 (기존 CronJob 주기)
+    MIN_INTERVAL = int(os.getenv('POLL_MIN_INTERVAL', '120'))
+    MAX_INTERVAL = int(os.getenv('POLL_MAX_INTERVAL', '3600'))
+    CAPACITY = int(os.getenv('POLL_CAPACITY', '60'))
+
+    ATR_REFERENCE = 3.0     # ATR% 3% = 활동도 1.0
+    VOLUME_REFERENCE = 2.0  # 평소 거래량 2배 = 활동도 1.0
+    HELD_BOOST = 1.0        # 보유 종목 가산 (청산 판단 필요)
+    LEVEL_BOOST = 1.0       # 손절/익절선까지 거리가 하루 변동폭(ATR%) 이내면 가산
+    MIN_ACTIVITY = 0.25     # 활동도 하한 (주기 상한은 MAX_INTERVAL로 한 번 더 제한)
+
+    def __init__(self, profile_fn, base=BASE_INTERVAL, min_interval=MIN_INTERVAL,
+                 max_interval=MAX_INTERVAL, capacity=CAPACITY):
+        """
+        Args:
+            profile_fn: item → {'atr_pct', 'volume_ratio', 'held', 'level_distance'} (데이터 없으면 None)
+            base: 활동도 1.0 종목 주기 (초)
+            min_interval, max_interval: 종목별 주기 하한/상한 (초)
+            capacity: base 동안 스캔할 종목 수 상한 (None이면 제한 없음)
+        """
+        self.profile_fn = profile_fn
+        self.base = base
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.capacity = capacity
+        self.next_due = {}   # {종목: 다음 스캔 시각}
+        self.intervals = {}  # {종목: 마지막으로 계산한 주기 (초)}
+        self.natural = {}    # {종목: 용량 배율 적용 전 주기 (초)}
+        self.held = set()    # 마지막 계산 시 보유 종목
+        self._lock = threading.Lock()
+
+    @classmethod
+    def domestic(cls, strategy, **kwargs):
+        """국내 전략용 (item = (종목 코드, 종목명))"""
+        return cls(lambda item: strategy.poll_profile(item[0]), **kwargs)
+
+    @classmethod
+    def overseas(cls, strategy, **kwargs):
+        """해외 전략용 (item = (티커, 종목명, 거래소))"""
+        return cls(lambda item: strategy.poll_profile(item[0], item[2]), **kwargs)
+
+    def activity(self, profile):
+        """활동도 (1.0 = 기준 주기, 클수록 자주)"""
+        atr_pct = profile.get('atr_pct') or 0.0
+        volume_ratio = profile.get('volume_ratio') or 0.0
+        score = max(atr_pct / self.ATR_REFERENCE, volume_ratio / self.VOLUME_REFERENCE)
+
+        if profile.get('held'):
+            score += self.HELD_BOOST
+            distance = profile.get('level_distance')
+            if distance is not None and distance <= max(atr_pct, 1.0):
+                score += self.LEVEL_BOOST
+        return max(score, self.MIN_ACTIVITY)
+
+    def interval(self, profile, stretch=1.0):
+        """종목 주기 (초) - 프로필이 없으면 기준 주기
+
+        Args:
+            stretch: 비보유 종목 주기 배율 (용량 초과 시 > 1)
+        """
+        held = profile is not None and profile.get('held')
+        seconds = self.base / self.activity(profile) if profile is not None else self.base
+        if not held:
+            seconds *= stretch
+        return min(max(seconds, self.min_interval), self.max_interval)
+
+    def due(self, items, now=None):
+        """지금 스캔할 종목 (처음 보는 종목은 바로, 관심종목에서 빠진 종목은 기록 정리)
+
+        Args:
+            items: [(종목, 종목명, ...)]
+            now: 기준 시각 (기본 현재)
+        """
+        now = now or time.time()
+        current = {item[0] for item in items}
+        with self._lock:
+            for symbol in set(self.next_due) - current:
+                self.next_due.pop(symbol, None)
+                self.intervals.pop(symbol, None)
+                self.natural.pop(symbol, None)
+                self.held.discard(symbol)
+            return [item for item in items if self.next_due.get(item[0], 0) <= now]
+
+    def schedule(self, items, now=None):
+        """스캔한 종목 다음 스캔 시각 계산
+
+        비보유 종목은 예상 스캔 수가 용량을 넘으면 같은 배율로 주기를 늘림
+        """
+        now = now or time.time()
+        profiles = {}
+        for item in items:
+            try:
+                profiles[item[0]] = self.profile_fn(item)
+            except Exception as e:
+                print(f"⚠️ {item[1]} ({item[0]}) 스캔 주기 계산 실패: {e}")
+                profiles[item[0]] = None
+
+        with self._lock:
+            stretch = self._stretch(profiles)
+            for symbol, profile in profiles.items():
+                interval = self.interval(profile, stretch)
+                self.natural[symbol] = self.interval(profile)
+                self.intervals[symbol] = interval
+                self.next_due[symbol] = now + interval
+                if profile is not None and profile.get('held'):
+                    self.held.add(symbol)
+                else:
+                    self.held.discard(symbol)
+
+    def mark_due(self, symbols):
+        """다음 due()에서 바로 스캔 (예: 새로 보유/청산된 종목)"""
+        with self._lock:
+            for symbol in symbols:
+                self.next_due[symbol] = 0
+
+    def _stretch(self, profiles):
+        """비보유 종목 주기 배율 - base 동안 예상 스캔 수가 capacity 이하가 되도록"""
+        if not self.capacity:
+            return 1.0
+
+        # 이번에 계산하는 종목은 새 주기, 나머지는 기존 주기로 예상 스캔 수 합산
+        intervals = dict(self.natural)
+        for symbol, profile in profiles.items():
+            intervals[symbol] = self.interval(profile)
+        held = {symbol for symbol, profile in profiles.items() if profile and profile.get('held')}
+        held |= self.held - set(profiles)
+
+        fixed = sum(self.base / seconds for symbol, seconds in intervals.items() if symbol in held)
+        flexible = sum(self.base / seconds for symbol, seconds in intervals.items() if symbol not in held)
+        room = self.capacity - fixed
+        if flexible <= 0 or flexible <= room:
+            return 1.0
+        if room <= 0:
+            return math.inf  # 보유 종목만으로 용량 초과 → 비보유는 상한 주기
+        return flexible / room
+
+    def summary(self):
+        """주기 분포 (로그용)"""
+        with self._lock:
+            intervals = sorted(self.intervals.values())
+        if not intervals:
+            return "주기 계산 전"
+        scans = sum(self.base / seconds for seconds in intervals)
+        return (f"{len(intervals)}개 종목, 주기 {intervals[0] / 60:.0f}~{intervals[-1] / 60:.0f}분, "
+                f"{self.base // 60}분당 예상 스캔 {scans:.0f}개")
@@ -0,0 +1,89 @@
+# portfolio.py
+"""
+실행 단위 계좌 스냅샷
+- 실행 시작 시 잔고 1회 조회 → 보유 종목 수, 섹터 노출도, 예수금, 종목별 수익률은 로컬 계산
+- 내 주문이 성공하면 메모리에서 바로 반영 (수량, 매입평균가, 예수금)
+- 브로커 잔고와 다시 맞추는 경우 (reconcile)
+  · 처음 조회할 때 / 스냅샷이 max_age보다 오래됐을 때 (장시간 실행 프로세스)
+  · 주문 결과가 불확실할 때 (예외 발생 → 다음 조회 시 재동기화)
+  · refresh() 명시 호출 (실행 시작)
+"""
+import threading
+import time
+from eval_context import PortfolioView
+
+
+class Portfolio:
+    MAX_AGE = 15 * 60  # 스냅샷 최대 사용 시간 (초) - 전략 실행 주기와 동일
+
+    def __init__(self, fetch_fn, parse_fn, max_age=MAX_AGE):
+        """
+        Args:
+            fetch_fn: 잔고 조회 함수 (예: api.get_balance)
+            parse_fn: 응답 → PortfolioView 변환 (PortfolioView.from_domestic / from_overseas)
+            max_age: 스냅샷 최대 사용 시간 (초)
+        """
+        self._fetch = fetch_fn
+        self._parse = parse_fn
+        self.max_age = max_age
+        self.view = None
+        self.fetched_at = 0
+        self.stale = False  # 주문 결과 불확실 → 다음 조회 시 재동기화
+        self.balance_calls = 0
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """현재 스냅샷 (필요할 때만 브로커 잔고 재조회)"""
+        with self._lock:
+            expired = time.time() - self.fetched_at >= self.max_age
+            if self.view is not None and not self.stale and not expired:
+                return self.view
+        return self.refresh()
+
+    def refresh(self):
+        """브로커 잔고와 동기화 (실패하면 기존 스냅샷 유지)"""
+        view = self._parse(self._fetch())
+        with self._lock:
+            self.balance_calls += 1
+            if view.loaded:
+                self.view = view
+                self.fetched_at = time.time()
+                self.stale = False
+            elif self.view is None:
+                self.view = view  # 조회 실패 (loaded=False) - 호출부에서 매수 중단
+            else:
+                print("⚠️ 잔고 재조회 실패 - 이전 스냅샷 사용")
+            return self.view
+
+    def apply_fill(self, symbol, quantity, price):
+        """내 주문 체결 반영 (매수: quantity > 0, 매도: quantity < 0)
+
+        시장가/현재가 지정가 주문이라 체결가는 주문 시점 현재가로 추정
+        """
+        with self._lock:
+            if self.view is None:
+                return
+            view = self.view
+            holdings = {s: dict(info) for s, info in view.holdings.items()}
+            info = holdings.get(symbol, {'quantity': 0, 'profit_rate': 0.0, 'price': price, 'avg_price': 0.0})
+
+            new_qty = info['quantity'] + quantity
+            if quantity > 0 and new_qty > 0:
+                info['avg_price'] = (info['avg_price'] * info['quantity'] + price * quantity) / new_qty
+            info['quantity'] = new_qty
+            info['price'] = price
+            if info['avg_price']:
+                info['profit_rate'] = round((price / info['avg_price'] - 1) * 100, 2)
+
+            if new_qty > 0:
+                holdings[symbol] = info
+            else:
+                holdings.pop(symbol, None)
+
+            # 현금 ↔ 주식 이동 (총평가금액은 그대로)
+            self.view = PortfolioView(view.cash - price * quantity, view.total_assets, holdings)
+
+    def mark_stale(self):
+        """주문 결과 불확실 (예외 등) → 다음 snapshot()에서 재조회"""
+        with self._lock:
+            self.stale = True
@@ -0,0 +1,73 @@
+# position_sizing.py
+"""
+포지션 사이징 (순수 함수)
+- 계좌 평가액, 가격, ATR, 시장 상태만으로 수량/손절/목표가 계산 (API 호출 없음)
+- 실전 전략(calculate_position_size)과 백테스트가 같은 함수 사용
+- 스칼라 또는 NumPy 배열 입력 (배열이면 날짜/종목별 일괄 계산)
+
+규칙:
+    손절: 기본 5% (급락장 3%), ATR% < 2 → x0.8, ATR% > 5 → x1.5, 3~8%로 제한
+    목표: ATR% < 2 → +10/+18%, ATR% > 5 → +15/+25%, 그 외 +12/+20%
+    수량: 계좌 2% 리스크 / 손절 금액, 횡보장 50%, 한 종목 최대 10% (횡보장 5%)
+"""
+import numpy as np
+
+
+RISK_PER_TRADE = 0.02     # 1회 매매 리스크 (계좌 대비)
+LOW_VOLATILITY = 2.0      # ATR% 기준 (낮은 변동성)
+HIGH_VOLATILITY = 5.0     # ATR% 기준 (높은 변동성)
+BASE_STOP_LOSS = 0.05     # 기본 손절 비율
+CRASH_STOP_LOSS = 0.03    # 급락장 손절 비율
+MIN_STOP_LOSS = 0.03      # 손절 비율 하한
+MAX_STOP_LOSS = 0.08      # 손절 비율 상한
+MAX_POSITION = 0.10       # 한 종목 최대 비중 (횡보장은 절반)
+
+
+def size_position(account_balance, price, atr, regime="unknown", risk_per_trade=RISK_PER_TRADE,
+                  low_volatility=LOW_VOLATILITY, high_volatility=HIGH_VOLATILITY,
+                  base_stop_loss=BASE_STOP_LOSS, min_stop_loss=MIN_STOP_LOSS, max_stop_loss=MAX_STOP_LOSS,
+                  max_position=MAX_POSITION):
+    """포지션 사이징
+
+    Args:
+        account_balance: 계좌 평가액 (현금 + 보유 평가액)
+        price: 매수 가격
+        atr: ATR (가격 단위)
+        regime: 시장 상태 ("crash", "sideways", "trending", "unknown")
+        risk_per_trade ~ max_position: 규칙 상수 (기본값 = 실전 전략 값, 파라미터 스윕에서 변경)
+
+    Returns:
+        (수량, 손절 비율, 1차 목표 %, 2차 목표 %) - 입력이 배열이면 각 항목도 배열
+    """
+    balance = np.asarray(account_balance, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    atr = np.asarray(atr, dtype=np.float64)
+    regime = np.asarray(regime)
+    crash = regime == "crash"
+    sideways = regime == "sideways"
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        atr_pct = atr / price * 100
+    low = atr_pct < low_volatility    # NaN이면 보통 변동성
+    high = atr_pct > high_volatility
+
+    # 변동성 기반 손절
+    base_stop_loss_pct = np.where(crash, CRASH_STOP_LOSS, base_stop_loss)
+    stop_loss_pct = np.clip(base_stop_loss_pct * np.where(low, 0.8, np.where(high, 1.5, 1.0)),
+                            min_stop_loss, max_stop_loss)
+
+    # ATR 기반 동적 목표가
+    target_1 = np.where(low, 10.0, np.where(high, 15.0, 12.0))
+    target_2 = np.where(low, 18.0, np.where(high, 25.0, 20.0))
+
+    # 2% 리스크 기준 수량 → 횡보장 50% → 한 종목 최대 비중
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = np.floor(balance * risk_per_trade / (price * stop_loss_pct))
+        shares = np.where(sideways, np.floor(shares * 0.5), shares)
+        max_shares = np.floor(balance * np.where(sideways, max_position / 2, max_position) / price)
+    shares = np.nan_to_num(np.minimum(shares, max_shares), nan=0.0, posinf=0.0, neginf=0.0)
+    shares = np.maximum(shares, 0).astype(np.int64)
+
+    if shares.ndim == 0:
+        return int(shares), float(stop_loss_pct), float(target_1), float(target_2)
+    return shares, stop_loss_pct, target_1, target_2
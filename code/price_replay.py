@@ -0,0 +1,127 @@
+# price_replay.py
+"""
+KIS 실시간 시세 재생 서버 (테스트용, 로컬 WebSocket)
+- PriceStream이 실제 KIS 대신 접속 → 같은 구독 요청/응답/시세 프레임 형식으로 동작
+- 준비한 시세(또는 PriceStream record_path로 저장한 실제 프레임)를 구독한 종목만 순서대로 전송
+- 실제 장 없이 실시간 청산 엔진 반응 시간/동작 확인
+
+사용 예:
+    server = ReplayServer([("005930", 71000, 0.5), ("005930", 66000, -6.2)], interval=0.05)
+    url = server.start()
+    stream = PriceStream(engine.on_tick, url=url)
+"""
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+from price_stream import TR_ID, FIELD_CODE, FIELD_PRICE, FIELD_CHANGE_RATE, FIELD_COUNT, parse_frame
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+
+def make_frame(code, price, change_rate=0.0, hhmmss=None):
+    """시세 1건 → KIS 실시간 체결가 프레임 (나머지 필드는 0)"""
+    fields = ['0'] * FIELD_COUNT
+    fields[FIELD_CODE] = code
+    fields[1] = hhmmss or datetime.now().strftime('%H%M%S')  # 체결 시각
+    fields[FIELD_PRICE] = str(int(price))
+    fields[FIELD_CHANGE_RATE] = f"{change_rate:.2f}"
+    return f"0|{TR_ID}|001|{'^'.join(fields)}"
+
+
+class ReplayServer:
+    def __init__(self, ticks, interval=0.0, host="127.0.0.1", port=0):
+        """
+        Args:
+            ticks: 시세 프레임 문자열 또는 (종목코드, 현재가, 전일 대비율) 목록
+            interval: 프레임 사이 대기 (초)
+            host, port: 바인드 주소 (port=0이면 빈 포트 자동 선택)
+        """
+        self.frames = [tick if isinstance(tick, str) else make_frame(*tick) for tick in ticks]
+        self.interval = interval
+        self.host = host
+        self.port = port
+        self.sent = []  # (전송 시각, 종목코드, 현재가) - 반응 시간 측정용
+        self.done = threading.Event()
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """PriceStream(record_path=...)로 저장한 프레임 파일 재생"""
+        with open(path, encoding='utf-8') as f:
+            return cls([line.rstrip('\n') for line in f if line.strip()], **kwargs)
+
+    def start(self):
+        """백그라운드 스레드에서 서버 시작 → 접속 주소"""
+        if websockets is None:
+            raise RuntimeError("websockets 미설치 - pip install -r requirements.txt")
+
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._thread_main, args=(ready,), name="price-replay", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return f"ws://{self.host}:{self.port}"
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def _thread_main(self, ready):
+        asyncio.run(self._serve(ready))
+
+    async def _serve(self, ready):
+        self._loop = asyncio.get_running_loop()
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        ready.set()
+        await self._server.wait_closed()
+
+    async def _handler(self, ws, path=None):
+        """접속 1건: 구독 요청 응답 + 구독 종목 시세 재생"""
+        subscribed = set()
+        first = asyncio.Event()
+
+        async def read_requests():
+            async for message in ws:
+                request = json.loads(message)
+                header = request.get('header', {})
+                code = request.get('body', {}).get('input', {}).get('tr_key')
+                if header.get('tr_type') == '2':
+                    subscribed.discard(code)
+                    msg = "UNSUBSCRIBE SUCCESS"
+                else:
+                    subscribed.add(code)
+                    msg = "SUBSCRIBE SUCCESS"
+                await ws.send(json.dumps({
+                    "header": {"tr_id": TR_ID, "tr_key": code, "encrypt": "N"},
+                    "body": {"rt_cd": "0", "msg_cd": "OPSP0000", "msg1": msg}
+                }))
+                first.set()
+
+        reader = asyncio.ensure_future(read_requests())
+        try:
+            await asyncio.wait_for(first.wait(), 10)
+            await ws.send(json.dumps({"header": {"tr_id": "PINGPONG", "datetime": datetime.now().strftime('%Y%m%d%H%M%S')}}))
+
+            for frame in self.frames:
+                ticks = [tick for tick in parse_frame(frame) if tick[0] in subscribed]
+                if ticks:
+                    now = time.time()
+                    self.sent.extend((now, code, price) for code, price, _ in ticks)
+                    await ws.send(frame)
+                if self.interval:
+                    await asyncio.sleep(self.interval)
+            self.done.set()
+            await reader  # 클라이언트가 끊을 때까지 유지
+        except (asyncio.TimeoutError, websockets.ConnectionClosed):
+            pass
+        finally:
+            reader.cancel()
@@ -0,0 +1,251 @@
+# price_stream.py
+"""
+KIS 실시간 체결가 구독 (WebSocket, 국내주식 H0STCNT0)
+- 보유 종목만 구독 → 체결될 때마다 on_tick(종목코드, 현재가, 전일 대비율) 호출
+  → get_current_price 폴링 없이 가격 변화가 바로 들어옴
+- 백그라운드 스레드 하나에서 asyncio 루프로 수신 (전략 스레드 블로킹 없음)
+- 연결이 끊기면 접속키 재발급 후 재연결 + 구독 복구 (지수 백오프)
+- subscribe()로 구독 종목 교체 (보유 종목이 바뀔 때마다 차이만 등록/해제)
+- record_path를 주면 수신한 시세 프레임을 파일로 저장 → price_replay.ReplayServer로 재생
+
+KIS 실시간 프로토콜:
+    구독 요청: {"header": {"approval_key", "custtype", "tr_type": "1"(등록)/"2"(해제), ...},
+               "body": {"input": {"tr_id": "H0STCNT0", "tr_key": 종목코드}}}
+    시세 프레임: "0|H0STCNT0|건수|필드^필드^..." (건수만큼 레코드가 이어서 붙음)
+    PINGPONG: JSON으로 오는 연결 확인 → 같은 내용으로 응답
+
+사용 예:
+    stream = PriceStream(engine.on_tick, approval_key_fn=api.get_approval_key)
+    stream.start()
+    stream.subscribe(["005930", "000660"])
+"""
+import asyncio
+import json
+import threading
+from config import Config
+
+try:
+    import websockets
+except ImportError:  # requirements.txt 미설치 환경 - 실시간 청산만 비활성화
+    websockets = None
+
+
+TR_ID = "H0STCNT0"  # 국내주식 실시간 체결가
+
+# H0STCNT0 필드 위치 (^ 구분)
+FIELD_CODE = 0         # 종목코드
+FIELD_PRICE = 2        # 현재가
+FIELD_CHANGE_RATE = 5  # 전일 대비율 (%)
+FIELD_COUNT = 46       # 레코드당 필드 수
+
+
+def parse_frame(message):
+    """시세 프레임 → [(종목코드, 현재가, 전일 대비율)] (시세 프레임이 아니면 빈 리스트)"""
+    parts = message.split('|', 3)
+    if len(parts) < 4 or parts[0] != '0' or parts[1] != TR_ID:
+        return []
+
+    fields = parts[3].split('^')
+    try:
+        count = max(int(parts[2]), 1)
+    except ValueError:
+        count = 1
+    size = len(fields) // count or len(fields)
+
+    ticks = []
+    for start in range(0, size * count, size):
+        record = fields[start:start + size]
+        try:
+            ticks.append((record[FIELD_CODE], int(record[FIELD_PRICE]), float(record[FIELD_CHANGE_RATE])))
+        except (IndexError, ValueError):
+            print(f"⚠️ 실시간 시세 파싱 실패: {message[:80]}")
+    return ticks
+
+
+def subscribe_message(approval_key, code, tr_type="1"):
+    """구독 등록("1")/해제("2") 요청"""
+    return json.dumps({
+        "header": {
+            "approval_key": approval_key or "",
+            "custtype": "P",
+            "tr_type": tr_type,
+            "content-type": "utf-8"
+        },
+        "body": {"input": {"tr_id": TR_ID, "tr_key": code}}
+    })
+
+
+class PriceStream:
+    MAX_SYMBOLS = 40  # KIS 세션당 실시간 등록 한도 (41건) 이내
+    RECONNECT_DELAYS = (1, 2, 5, 10, 30)  # 재연결 대기 (초)
+
+    def __init__(self, on_tick, url=None, approval_key_fn=None, record_path=None):
+        """
+        Args:
+            on_tick: (종목코드, 현재가, 전일 대비율) 콜백 - 수신 스레드에서 호출되므로 빨리 반환해야 함
+            url: WebSocket 주소 (기본 Config.WS_URL)
+            approval_key_fn: 접속키 발급 함수 (예: api.get_approval_key, 재생 서버면 None)
+            record_path: 수신 프레임 저장 파일 (재생 테스트용, None이면 저장 안 함)
+        """
+        self.on_tick = on_tick
+        self.url = url or Config.WS_URL
+        self.approval_key_fn = approval_key_fn
+        self.record_path = record_path
+        self.symbols = set()      # 구독할 종목
+        self.subscribed = set()   # 현재 연결에 등록된 종목
+        self.connected = False
+        self.ticks = 0
+        self.reconnects = 0
+        self._approval_key = None
+        self._ws = None
+        self._loop = None
+        self._stop = None
+        self._thread = None
+        self._record = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """수신 스레드 시작 (websockets 미설치면 False)"""
+        if websockets is None:
+            print("❌ websockets 미설치 - 실시간 시세 구독 불가 (pip install -r requirements.txt)")
+            return False
+        if self._thread is not None and self._thread.is_alive():
+            return True
+
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._thread_main, args=(ready,), name="price-stream", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return True
+
+    def stop(self, timeout=5):
+        """연결 종료 + 수신 스레드 정리"""
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._shutdown)
+            except RuntimeError:
+                pass  # 이미 종료된 루프
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def subscribe(self, symbols):
+        """구독 종목 교체 (연결 중이면 바로 등록/해제, 아니면 다음 연결 시 반영)"""
+        symbols = sorted(set(symbols))
+        if len(symbols) > self.MAX_SYMBOLS:
+            print(f"⚠️ 실시간 구독 한도 초과 - {len(symbols)}개 중 {self.MAX_SYMBOLS}개만 구독")
+            symbols = symbols[:self.MAX_SYMBOLS]
+
+        with self._lock:
+            self.symbols = set(symbols)
+
+        loop = self._loop
+        if loop is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self._sync(), loop)
+            except RuntimeError:
+                pass
+
+    def _thread_main(self, ready):
+        asyncio.run(self._run(ready))
+
+    def _shutdown(self):
+        """루프 스레드에서 실행 - 종료 표시 + 연결 닫기 (수신 루프 종료)"""
+        self._stop.set()
+        if self._ws is not None:
+            asyncio.ensure_future(self._ws.close())
+
+    async def _run(self, ready):
+        """연결 → 구독 → 수신, 끊기면 재연결 (stop까지)"""
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        ready.set()
+
+        if self.record_path:
+            self._record = open(self.record_path, 'a', encoding='utf-8')
+
+        attempt = 0
+        try:
+            while not self._stop.is_set():
+                try:
+                    if self.approval_key_fn is not None:
+                        self._approval_key = await self._loop.run_in_executor(None, self.approval_key_fn)
+
+                    async with websockets.connect(self.url, ping_interval=None) as ws:
+                        self._ws = ws
+                        self.connected = True
+                        self.subscribed = set()
+                        attempt = 0
+                        print(f"📡 실시간 시세 연결: {self.url}")
+                        await self._sync()
+
+                        async for message in ws:
+                            await self._handle(ws, message)
+                except Exception as e:
+                    if not self._stop.is_set():
+                        print(f"⚠️ 실시간 시세 연결 끊김: {e}")
+                finally:
+                    self._ws = None
+                    self.connected = False
+
+                if self._stop.is_set():
+                    break
+
+                delay = self.RECONNECT_DELAYS[min(attempt, len(self.RECONNECT_DELAYS) - 1)]
+                attempt += 1
+                self.reconnects += 1
+                print(f"🔄 실시간 시세 재연결 대기 {delay}초")
+                try:
+                    await asyncio.wait_for(self._stop.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._record is not None:
+                self._record.close()
+                self._record = None
+            self._loop = None
+
+    async def _sync(self):
+        """구독 종목과 등록 상태 차이만 등록/해제"""
+        ws = self._ws
+        if ws is None:
+            return
+
+        with self._lock:
+            wanted = set(self.symbols)
+
+        for code in sorted(wanted - self.subscribed):
+            self.subscribed.add(code)
+            await ws.send(subscribe_message(self._approval_key, code, "1"))
+        for code in sorted(self.subscribed - wanted):
+            self.subscribed.discard(code)
+            await ws.send(subscribe_message(self._approval_key, code, "2"))
+
+    async def _handle(self, ws, message):
+        """수신 메시지 1건 처리 (시세 → 콜백, PINGPONG → 응답, 구독 응답 → 실패만 출력)"""
+        if message[:1] in ('0', '1'):
+            if self._record is not None:
+                self._record.write(message + "\n")
+            for code, price, change_rate in parse_frame(message):
+                self.ticks += 1
+                try:
+                    self.on_tick(code, price, change_rate)
+                except Exception as e:
+                    print(f"❌ 실시간 시세 처리 실패 ({code}): {e}")
+            return
+
+        try:
+            data = json.loads(message)
+        except ValueError:
+            print(f"⚠️ 알 수 없는 실시간 메시지: {message[:80]}")
+            return
+
+        header = data.get('header', {})
+        if header.get('tr_id') == 'PINGPONG':
+            await ws.pong(message.encode())
+            return
+
+        body = data.get('body', {})
+        if body.get('rt_cd') not in (None, '0'):
+            print(f"⚠️ 실시간 구독 실패 ({header.get('tr_key')}): {body.get('msg1')}")
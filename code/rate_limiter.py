@@ -0,0 +1,135 @@
+# rate_limiter.py
+"""
+KIS API 호출 속도 제한 (토큰 버킷)
+- 같은 APP_KEY를 쓰는 모든 프로세스/스레드가 PVC 위 상태 파일 하나를 공유
+- 엔드포인트 종류별 예산 (quotation=시세, order=주문/계좌)
+- 버스트 허용: 쉬고 있던 만큼 토큰이 쌓여서 연속 호출 가능
+- 우선순위 대기열: 같은 프로세스 안에서는 우선순위가 높은 요청(보유 종목 청산)이 스캔 요청보다 먼저 토큰 획득
+  · 호출부에서 with request_priority(PRIORITY_EXIT): 로 지정 (스레드별)
+"""
+import fcntl
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from config import ensure_data_dir
+
+
+PRIORITY_EXIT = 0    # 보유 종목 청산 (손절/급락/트레일링 스탑) + 그 판단에 필요한 시세
+PRIORITY_SCAN = 10   # 신규 진입 스캔 (기본값)
+
+_priority = threading.local()
+
+
+@contextmanager
+def request_priority(level):
+    """이 스레드의 API 호출 우선순위 지정 (숫자가 낮을수록 먼저)"""
+    previous = current_priority()
+    _priority.level = level
+    try:
+        yield
+    finally:
+        _priority.level = previous
+
+
+def current_priority():
+    return getattr(_priority, 'level', PRIORITY_SCAN)
+
+
+class TokenBucketLimiter:
+    def __init__(self, key, state_dir, budgets):
+        """
+        Args:
+            key: 예산을 공유할 키 (APP_KEY)
+            state_dir: 상태 파일 디렉토리 (PVC 경로, 없으면 임시 디렉토리)
+            budgets: {엔드포인트 종류: (초당 토큰, 버스트 크기)}
+        """
+        self.budgets = budgets
+        key_hash = hashlib.sha256((key or "").encode()).hexdigest()[:12]
+        self.state_file = os.path.join(ensure_data_dir(state_dir), f"kis_rate_{key_hash}.json")
+        self._fd = None
+        self._thread_lock = threading.Lock()
+        self._queues = {}  # 엔드포인트 종류별 대기열 [(우선순위, 순번)]
+        self._queue_cond = threading.Condition()
+        self._tickets = itertools.count()
+
+    def acquire(self, endpoint_class="quotation", priority=None):
+        """토큰 1개 획득 (부족하면 다음 토큰이 찰 때까지만 대기)
+
+        같은 프로세스 안의 대기 요청은 우선순위 → 도착 순서대로 한 건씩 토큰을 시도
+
+        Args:
+            priority: 우선순위 (없으면 request_priority로 지정한 스레드 우선순위)
+        """
+        ticket = (current_priority() if priority is None else priority, next(self._tickets))
+        with self._queue_cond:
+            queue = self._queues.setdefault(endpoint_class, [])
+            heapq.heappush(queue, ticket)
+
+        try:
+            while True:
+                with self._queue_cond:
+                    while queue[0] != ticket:  # 앞선 요청이 토큰을 받을 때까지 대기
+                        self._queue_cond.wait()
+
+                wait = self._try_acquire(endpoint_class)
+                if wait <= 0:
+                    return
+                time.sleep(wait)  # 그 사이 더 급한 요청이 오면 그 요청이 먼저
+        finally:
+            with self._queue_cond:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                self._queue_cond.notify_all()
+
+    def penalize(self, endpoint_class="quotation"):
+        """서버 측 속도 초과 응답 시 버킷 비우기 (다른 프로세스도 함께 감속)"""
+        with self._locked_state() as state:
+            state[endpoint_class] = {'tokens': 0.0, 'ts': time.time()}
+
+    def _try_acquire(self, endpoint_class):
+        """토큰 차감 시도 - 성공하면 0, 실패하면 대기해야 할 초 반환"""
+        rate, burst = self.budgets.get(endpoint_class, self.budgets['quotation'])
+
+        with self._locked_state() as state:
+            now = time.time()
+            bucket = state.get(endpoint_class, {'tokens': float(burst), 'ts': now})
+
+            # 경과 시간만큼 토큰 충전 (버스트 상한)
+            tokens = min(float(burst), bucket['tokens'] + max(0.0, now - bucket['ts']) * rate)
+
+            if tokens >= 1.0:
+                state[endpoint_class] = {'tokens': tokens - 1.0, 'ts': now}
+                return 0
+
+            state[endpoint_class] = {'tokens': tokens, 'ts': now}
+            return (1.0 - tokens) / rate
+
+    @contextmanager
+    def _locked_state(self):
+        """스레드 락 + 파일 락(flock) 안에서 상태 읽기/쓰기"""
+        with self._thread_lock:
+            if self._fd is None:
+                self._fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o644)
+
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                raw = os.read(self._fd, 4096)
+                try:
+                    state = json.loads(raw) if raw else {}
+                except ValueError:
+                    state = {}  # 깨진 상태 파일은 초기화
+
+                yield state
+
+                data = json.dumps(state).encode()
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                os.ftruncate(self._fd, 0)
+                os.write(self._fd, data)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
@@ -23,15 +23,20 @@ print(f"📊 감시 종목: {len(watchlist)}개\n")
 top_stocks = []
 print("💰 주요 종목 현재가 조회 중...\n")
 
-for code, name in watchlist[:10]:  # 상위 10개만 조회 (시간 절약)
-    try:
-        price = api.get_current_price(code)
-        if price:
-            price_int = int(price)
-            top_stocks.append((name, code, price_int))
-            print(f"  ✅ {name} ({code}): {price_int:,}원")
-    except Exception as e:
-        print(f"  ❌ {name} 조회 실패: {e}")
+quotes = {}
+try:
+    quotes = api.get_current_prices([code for code, _ in watchlist])  # 전체 일괄 조회 (멀티 시세)
+except Exception as e:
+    print(f"  ❌ 현재가 일괄 조회 실패: {e}")
+
+for code, name in watchlist:
+    quote = quotes.get(code)
+    if quote is None:
+        print(f"  ❌ {name} 조회 실패")
+        continue
+    if len(top_stocks) < 10:  # 알림에는 상위 10개만
+        top_stocks.append((name, code, quote['price']))
+    print(f"  ✅ {name} ({code}): {quote['price']:,}원")
 
 # 디스코드 알림
 notifier.notify_morning(
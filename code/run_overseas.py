@@ -5,6 +5,8 @@
 - 최적 실행 시간: 00:30 (장 시작 1시간 후)
 """
 from overseas_strategy import OverseasTradingStrategy
+from scanner import WatchlistScanner
+from scan_budget import ScanBudget
 from watchlist_us import get_all_us_stocks
 from datetime import datetime
 
@@ -20,24 +22,28 @@ watchlist = get_all_us_stocks()
 
 print(f"📊 총 {len(watchlist)}개 종목 분석 시작\n")
 
-# 각 종목 전략 실행
-success_count = 0
-error_count = 0
+# 💼 계좌 스냅샷 (실행당 잔고 1회 조회, 이후 체결은 로컬 반영)
+strategy.portfolio.refresh()
 
-for ticker, name, exchange in watchlist:
-    try:
-        strategy.execute_strategy(ticker, name, exchange)
-        success_count += 1
-    except Exception as e:
-        print(f"❌ {name} ({ticker}) 처리 실패: {e}")
-        error_count += 1
+# 🚀 동시 스캔 (보유 종목 먼저 → 1차 선별 후보만 수집/분석, 주문은 한 종목씩 순서대로)
+#    지표 일괄 계산(종목 x 봉 배열 한 번에)은 1차 선별 단계에서
+#    ⏱️ 주기 예산(시간/호출) 안에서 가치 높은 후보부터 - 소진 시 나머지는 다음 실행으로
+results = WatchlistScanner.overseas(strategy).run(watchlist, budget=ScanBudget.for_api(strategy.api))
 
-    print("\n" + "-" * 60 + "\n")
+# 성공 = 분석/주문까지 끝난 종목 (1차 선별 제외/예산 초과는 별도 집계)
+success_count = sum(1 for result in results
+                    if result.error is None and not result.skipped and not result.deferred)
+error_count = sum(1 for result in results if result.error is not None)
+total = len(results)  # 관심종목에 없는 보유 종목 포함
+skipped_count = sum(1 for result in results if result.skipped)
+deferred_count = sum(1 for result in results if result.deferred)
 
 print(f"\n{'='*60}")
 print(f"✅ 해외주식 전략 실행 완료")
 print(f"{'='*60}")
-print(f"  성공: {success_count}개")
+print(f"  성공: {success_count}/{total}개")
 print(f"  실패: {error_count}개")
+print(f"  1차 선별 제외: {skipped_count}개")
+print(f"  예산 초과로 다음 실행: {deferred_count}개")
 print(f"  완료 시간: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 print(f"{'='*60}\n")
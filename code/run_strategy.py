@@ -1,5 +1,7 @@
 # run_strategy.py
 from advanced_strategy import AdvancedTradingStrategy
+from scanner import WatchlistScanner
+from scan_budget import ScanBudget
 from watchlist import get_all_stocks
 from discord.discord_notifier import DiscordNotifier
 from datetime import datetime
@@ -22,35 +24,30 @@ def main():
 
     print(f"📊 분석 대상: {len(watchlist)}개 종목\n")
 
-    success_count = 0
-    error_count = 0
-    buy_signals = []
+    # 💰 현재가 일괄 조회 (멀티 시세, 종목별 조회 대신)
+    strategy.prefetch_prices([code for code, _ in watchlist])
 
-    for i, (code, name) in enumerate(watchlist, 1):
-        try:
-            print(f"\n{'=' * 60}")
-            print(f"[{i}/{len(watchlist)}] {name} ({code}) 분석 중...")
-            print(f"{'=' * 60}")
+    # 💼 계좌 스냅샷 (실행당 잔고 1회 조회, 이후 체결은 로컬 반영)
+    strategy.portfolio.refresh()
 
-            # 신호 체크
-            signals, _ = strategy.check_buy_signals(code)
+    # 🚀 동시 스캔 (보유 종목 먼저 → 1차 선별 후보만 수집/분석, 주문은 한 종목씩 순서대로)
+    #    지표 일괄 계산(종목 x 봉 배열 한 번에)은 1차 선별 단계에서
+    #    ⏱️ 주기 예산(시간/호출) 안에서 가치 높은 후보부터 - 소진 시 나머지는 다음 주기로
+    results = WatchlistScanner.domestic(strategy).run(watchlist, budget=ScanBudget.for_api(strategy.api))
 
-            # 전략 실행
-            strategy.execute_strategy(code, name)
+    # 성공 = 분석/주문까지 끝난 종목 (1차 선별 제외/예산 초과는 별도 집계)
+    success_count = sum(1 for result in results
+                        if result.error is None and not result.skipped and not result.deferred)
+    error_count = sum(1 for result in results if result.error is not None)
+    total = len(results)  # 관심종목에 없는 보유 종목 포함
+    skipped_count = sum(1 for result in results if result.skipped)
+    deferred_count = sum(1 for result in results if result.deferred)
 
-            # 강한 신호 기록
-            if signals >= 4:
-                buy_signals.append(f"{name} ({signals}/5)")
-
-            success_count += 1
-
-            # API 호출 간격 (과부하 방지)
-            if i < len(watchlist):
-                time.sleep(1)
-
-        except Exception as e:
-            print(f"❌ 에러 발생: {name} - {e}")
-            error_count += 1
+    # 강한 신호 기록
+    buy_signals = [
+        f"{result.name} ({result.signals}/5)"
+        for result in results if result.signals is not None and result.signals >= 4
+    ]
 
     # 실행 시간 계산
     duration = time.time() - start_time
@@ -59,8 +56,10 @@ def main():
     print("\n" + "=" * 60)
     print("📊 실행 결과 요약")
     print("=" * 60)
-    print(f"✅ 성공: {success_count}/{len(watchlist)} 종목")
-    print(f"❌ 실패: {error_count}/{len(watchlist)} 종목")
+    print(f"✅ 성공: {success_count}/{total} 종목")
+    print(f"❌ 실패: {error_count}/{total} 종목")
+    print(f"⏭️ 1차 선별 제외: {skipped_count}/{total} 종목")
+    print(f"⏳ 예산 초과로 다음 주기: {deferred_count}/{total} 종목")
     print(f"⏱️ 실행시간: {duration:.1f}초")
 
     if buy_signals:
@@ -76,7 +75,7 @@ def main():
     notifier.notify_end(
         script_name="run_strategy.py",
         success=success_count,
-        total=len(watchlist),
+        total=total,
         duration=duration
     )
 
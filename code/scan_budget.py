@@ -0,0 +1,149 @@
+# scan_budget.py
+"""
+스캔 주기 예산 (시간 + API 호출 수)
+- 변동성이 큰 날 관심종목 전체 스캔이 15분 주기를 넘기면
+  CronJob concurrencyPolicy: Forbid 때문에 다음 주기 전체가 건너뛰어짐
+  → 주기마다 시간/호출 예산 안에서 가치가 높은 종목부터 처리하고, 예산이 다 되면 새 종목 시작 중단
+- 처리 순서: 보유 종목(예산 무관) → 후보 종목 (최근 신호 점수 + 마지막 분석 후 경과 시간 순)
+- 예산 초과로 시작 못 한 종목은 deferred로 표시 → 다음 주기에 경과 시간 가산점으로 먼저 처리
+- ScanHistory: 종목별 최근 신호 점수 / 마지막 분석 시각 (PVC 저장, 실행 간 유지)
+
+환경 변수:
+    SCAN_DEADLINE: 주기당 시간 예산 (초, 기본 780 = 15분 주기 - Pod 시작/마무리 여유)
+    SCAN_MAX_CALLS: 주기당 API 호출 예산 (기본 0 = 제한 없음)
+"""
+import json
+import os
+import threading
+import time
+from config import Config, ensure_data_dir
+
+
+class ScanBudget:
+    DEADLINE = int(os.getenv('SCAN_DEADLINE', '780'))
+    MAX_CALLS = int(os.getenv('SCAN_MAX_CALLS', '0'))
+    RESERVE = 30           # 마감 전 여유 (초) - 이미 시작한 종목 수집/분석/주문 마무리 시간
+    CALLS_PER_SYMBOL = 4   # 종목당 예상 호출 수 초기값 (현재가/분봉/수급/일봉 갱신)
+
+    def __init__(self, deadline=DEADLINE, max_calls=MAX_CALLS, calls_fn=None, reserve=RESERVE):
+        """
+        Args:
+            deadline: 시간 예산 (초, None/0이면 제한 없음)
+            max_calls: API 호출 예산 (None/0이면 제한 없음)
+            calls_fn: () → 누적 API 호출 수 (예: lambda: api.calls)
+            reserve: 마감 전 여유 (초) - 이 시간 안으로 들어오면 새 종목 시작 안 함
+        """
+        self.deadline = deadline or None
+        self.max_calls = max_calls or None
+        self.calls_fn = calls_fn
+        self.reserve = reserve
+        self.started_at = None
+        self.calls_at_start = 0
+        self.started = 0    # 예산 안에서 시작한 종목 수
+        self.deferred = 0   # 예산 초과로 미룬 종목 수
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_api(cls, api, deadline=DEADLINE, max_calls=MAX_CALLS):
+        """KISApi 호출 수 기준 예산"""
+        return cls(deadline, max_calls, calls_fn=lambda: api.calls)
+
+    def start(self):
+        """주기 시작 시각/호출 수 기록"""
+        self.started_at = time.time()
+        self.calls_at_start = self.calls_fn() if self.calls_fn else 0
+        self.started = self.deferred = 0
+        return self
+
+    def elapsed(self):
+        return time.time() - self.started_at if self.started_at else 0.0
+
+    def calls_used(self):
+        return self.calls_fn() - self.calls_at_start if self.calls_fn else 0
+
+    def exhausted(self):
+        """시간 또는 호출 예산 소진 여부"""
+        if self.deadline is not None and self.elapsed() >= self.deadline - self.reserve:
+            return True
+        if self.max_calls is not None:
+            # 이미 시작한 종목 평균 호출 수만큼 남아 있어야 새 종목 시작
+            per_symbol = self.calls_used() / self.started if self.started else self.CALLS_PER_SYMBOL
+            return self.calls_used() + per_symbol > self.max_calls
+        return False
+
+    def try_start(self):
+        """종목 1개 시작 가능 여부 (가능하면 시작 수 집계, 아니면 미룬 수 집계)"""
+        with self._lock:
+            if self.exhausted():
+                self.deferred += 1
+                return False
+            self.started += 1
+            return True
+
+    def summary(self):
+        limits = []
+        if self.deadline is not None:
+            limits.append(f"{self.elapsed():.0f}/{self.deadline}초")
+        if self.max_calls is not None:
+            limits.append(f"호출 {self.calls_used()}/{self.max_calls}건")
+        return ", ".join(limits) or "제한 없음"
+
+
+class ScanHistory:
+    STALENESS_WEIGHT = 1.0  # 주기 1회 경과당 가산점 (신호 점수 단위)
+    STALENESS_CAP = 4       # 최대 가산 주기 수 (오래 안 본 종목이 강한 신호 종목을 밀어내지 않도록)
+
+    def __init__(self, path, interval=900):
+        """
+        Args:
+            path: 저장 파일 (JSON)
+            interval: 스캔 주기 (초) - 경과 시간을 주기 수로 환산
+        """
+        self.path = path
+        self.interval = interval
+        self.entries = self._load()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_market(cls, market, interval=900):
+        """공유 데이터 디렉토리의 시장별 기록"""
+        data_dir = ensure_data_dir(Config.DATA_DIR)
+        return cls(os.path.join(data_dir, f"scan_history_{market}.json"), interval)
+
+    def _load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"⚠️ 스캔 기록 로드 실패: {e}")
+        return {}
+
+    def save(self):
+        with self._lock:
+            entries = dict(self.entries)
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ 스캔 기록 저장 실패: {e}")
+
+    def record(self, symbol, score):
+        """전체 분석 완료 (신호 점수, 분석 시각)"""
+        with self._lock:
+            self.entries[symbol] = {'score': float(score), 'scanned_at': time.time()}
+
+    def priority(self, symbol, score=None):
+        """처리 우선순위 = 신호 점수 (이번 1차 점수, 없으면 최근 분석 점수) + 경과 가산점"""
+        with self._lock:
+            entry = self.entries.get(symbol)
+
+        if score is None:
+            score = entry['score'] if entry else 0.0
+        if entry is None:
+            cycles = self.STALENESS_CAP  # 한 번도 분석 안 한 종목
+        else:
+            cycles = min((time.time() - entry['scanned_at']) / self.interval, self.STALENESS_CAP)
+        return score + self.STALENESS_WEIGHT * cycles
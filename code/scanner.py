@@ -0,0 +1,351 @@
+# scanner.py
+"""
+관심종목 동시 스캐너 (보유 종목 우선 → 선별 → 수집 → 분석 → 주문 파이프라인)
+- 보유 종목 우선: 같은 계좌 스냅샷으로 보유 종목부터 평가/청산 판단
+  · 보유 종목 API 호출은 최우선 순위 (rate_limiter.PRIORITY_EXIT) → 스캔 호출보다 먼저 토큰 획득
+  · 신규 진입 주문은 보유 종목 처리가 모두 끝난 뒤에만 실행
+  → 손절/급락/트레일링 청산 지연이 관심종목 수가 아니라 보유 종목 수에 비례
+- 0단계 선별: 일괄 시세 + 저장된 일봉만으로 나머지 종목 1차 점수 계산 (일봉 갱신 없음)
+  → 점수 상위 후보만 아래 단계로 (일봉 갱신 포함 API 호출량이 관심종목 수가 아니라 후보 수에 비례)
+- 1단계 수집: I/O 스레드 풀에서 종목별 평가 스냅샷 생성 (일봉/현재가/분봉/수급)
+  · 여러 종목을 동시에 띄워도 실제 호출 속도는 KISApi 공유 토큰 버킷이 조절
+- 2단계 분석: 분석 워커 풀에서 시장 상태 + 매수 신호 계산 (주문/잔고 없음)
+- 3단계 주문: 단일 스레드 실행기가 한 종목씩 매매 결정/주문
+  → 계좌 스냅샷(portfolio.py)이 항상 직전 주문까지 반영된 상태
+- 수집이 끝난 종목부터 바로 분석/주문 (전체 수집 완료를 기다리지 않음)
+- 주기 예산 (scan_budget.py): 후보는 신호 점수 + 마지막 분석 후 경과 시간 순으로 수집 시작,
+  시간/호출 예산이 다 되면 남은 후보는 시작하지 않고 deferred로 표시 (보유 종목은 예산 무관)
+- 종목별 출력은 버퍼에 모았다가 주문 단계가 끝날 때 한 블록으로 출력 (로그 섞임 방지)
+
+사용 예:
+    scanner = WatchlistScanner.domestic(strategy)
+    results = scanner.run(get_all_stocks(), budget=ScanBudget.for_api(strategy.api))
+"""
+import sys
+import threading
+import traceback
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from rate_limiter import request_priority, PRIORITY_EXIT, PRIORITY_SCAN
+from scan_budget import ScanHistory
+
+
+class _ThreadOutput:
+    """스레드별 출력 버퍼 (버퍼가 지정된 스레드의 print만 모으고 나머지는 그대로 출력)"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            with self._lock:
+                return self.stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+    def capture(self, buffer, fn, *args):
+        """fn 실행 중 이 스레드의 출력을 buffer에 모음"""
+        self._local.buffer = buffer
+        try:
+            return fn(*args)
+        finally:
+            self._local.buffer = None
+
+    def emit(self, buffer):
+        """모은 출력을 한 번에 출력"""
+        with self._lock:
+            self.stream.write(''.join(buffer))
+            self.stream.flush()
+        buffer.clear()
+
+
+class ScanResult:
+    """종목 1개 스캔 결과"""
+
+    def __init__(self, item):
+        self.item = item          # (종목 코드/티커, 종목명, ...)
+        self.held = False         # 보유 종목 (선별 없이 최우선 처리)
+        self.screen_score = None  # 1차 선별 점수 (선별 미사용/계산 불가 시 None)
+        self.skipped = False      # 1차 선별에서 제외됨 (수집/분석/주문 안 함)
+        self.deferred = False     # 주기 예산 소진으로 다음 주기로 미룸
+        self.signals = None       # 매수 신호 점수 (분석 실패 시 None)
+        self.error = None         # 수집/분석 단계 예외
+        self.log = []             # 출력 버퍼
+
+    @property
+    def symbol(self):
+        return self.item[0]
+
+    @property
+    def name(self):
+        return self.item[1]
+
+    @property
+    def priority(self):
+        return PRIORITY_EXIT if self.held else PRIORITY_SCAN
+
+
+class WatchlistScanner:
+    IO_WORKERS = 8        # 동시 조회 수 (KISApi HTTP 풀 크기 이하)
+    ANALYSIS_WORKERS = 4  # 신호 계산 워커 수
+
+    def __init__(self, fetch_fn, analyze_fn, execute_fn,
+                 io_workers=IO_WORKERS, analysis_workers=ANALYSIS_WORKERS,
+                 screen_fn=None, prepare_fn=None, keep_fn=None, top_n=None, min_score=None,
+                 order_lock=None, history=None, item_fn=None):
+        """
+        Args:
+            fetch_fn: item → EvalContext (네트워크 조회, 계좌 없이)
+            analyze_fn: (item, ctx) → evaluate() 결과 (regime, regime_info, signals, details)
+            execute_fn: (item, ctx, evaluation) → 매매 결정/주문 (한 번에 하나씩만 호출)
+            io_workers: 수집 스레드 수
+            analysis_workers: 분석 스레드 수
+            screen_fn: item → 1차 선별 점수 (None이면 선별 없이 전체 분석)
+            prepare_fn: items → None (선별 전 일괄 준비, 예: 지표 일괄 계산)
+            keep_fn: () → 보유 종목 코드/티커 (선별 없이 가장 먼저 처리)
+            top_n: 선별 후보 최대 수
+            min_score: 선별 최소 점수 (이보다 낮으면 매수 기준 도달 불가)
+            order_lock: 주문 단계에서 잡을 락 (실시간 청산 엔진 등 다른 주문 경로와 직렬화)
+            history: ScanHistory (후보 처리 순서 = 신호 점수 + 경과 시간, None이면 1차 점수 순)
+            item_fn: 종목 코드/티커 → item (관심종목에 없는 보유 종목용, 기본: (코드, 코드))
+        """
+        self.fetch_fn = fetch_fn
+        self.analyze_fn = analyze_fn
+        self.execute_fn = execute_fn
+        self.io_workers = io_workers
+        self.analysis_workers = analysis_workers
+        self.screen_fn = screen_fn
+        self.prepare_fn = prepare_fn
+        self.keep_fn = keep_fn
+        self.top_n = top_n
+        self.min_score = min_score
+        self.order_lock = order_lock or nullcontext()
+        self.history = history
+        self.item_fn = item_fn or (lambda symbol: (symbol, symbol))
+
+    @classmethod
+    def domestic(cls, strategy, history=None, **kwargs):
+        """국내 전략용 (item = (종목 코드, 종목명))"""
+        return cls(
+            lambda item: strategy.build_context(item[0]),
+            lambda item, ctx: strategy.evaluate(item[0], ctx),
+            lambda item, ctx, evaluation: strategy.execute_strategy(
+                item[0], item[1], ctx=ctx, evaluation=evaluation
+            ),
+            screen_fn=lambda item: strategy.screen_score(item[0]),
+            prepare_fn=lambda items: strategy.prefetch_indicators([item[0] for item in items], screen=True),
+            keep_fn=lambda: strategy.get_portfolio().holdings,
+            top_n=strategy.SCREEN_TOP_N,
+            min_score=strategy.SCREEN_MIN_SCORE,
+            order_lock=strategy.trade_lock,
+            history=history or ScanHistory.for_market('domestic'),
+            **kwargs
+        )
+
+    @classmethod
+    def overseas(cls, strategy, history=None, **kwargs):
+        """해외 전략용 (item = (티커, 종목명, 거래소))"""
+        return cls(
+            lambda item: strategy.build_context(item[0], item[2]),
+            lambda item, ctx: strategy.evaluate(item[0], item[2], ctx),
+            lambda item, ctx, evaluation: strategy.execute_strategy(
+                item[0], item[1], item[2], ctx=ctx, evaluation=evaluation
+            ),
+            screen_fn=lambda item: strategy.screen_score(item[0], item[2]),
+            prepare_fn=lambda items: strategy.prefetch_indicators([(item[0], item[2]) for item in items], screen=True),
+            keep_fn=lambda: strategy.get_portfolio().holdings,
+            top_n=strategy.SCREEN_TOP_N,
+            min_score=strategy.SCREEN_MIN_SCORE,
+            history=history or ScanHistory.for_market('overseas'),
+            item_fn=lambda ticker: (ticker, ticker, strategy.pyramid_tracker.get(ticker, {}).get('exchange', 'NAS')),
+            **kwargs
+        )
+
+    def priority(self, result):
+        """후보 처리 우선순위 (높을수록 먼저 수집)"""
+        if self.history is None:
+            return result.screen_score if result.screen_score is not None else 0.0
+        return self.history.priority(result.symbol, result.screen_score)
+
+    def screen(self, results):
+        """1차 선별 - 점수 상위 top_n (min_score 이상)만 남김
+
+        Returns:
+            list[ScanResult]: 전체 분석할 결과 (처리 우선순위 순)
+        """
+        if self.screen_fn is None or not results:
+            return sorted(results, key=self.priority, reverse=True)
+
+        if self.prepare_fn is not None:
+            try:
+                self.prepare_fn([result.item for result in results])
+            except Exception as e:
+                print(f"⚠️ 1차 선별 준비 실패: {e}")
+
+        ranked = []
+        for result in results:
+            try:
+                result.screen_score = self.screen_fn(result.item)
+            except Exception as e:
+                print(f"⚠️ {result.name} ({result.symbol}) 1차 점수 계산 실패: {e}")
+            if result.screen_score is not None and (self.min_score is None or result.screen_score >= self.min_score):
+                ranked.append(result)
+
+        ranked.sort(key=self.priority, reverse=True)  # 동점이면 관심종목 순서
+        candidates = ranked[:self.top_n]
+        selected = {id(result) for result in candidates}
+
+        for result in results:
+            if id(result) not in selected:
+                result.skipped = True
+
+        print(f"🔎 1차 선별: 후보 {len(candidates)}/{len(results)}개 전체 분석 "
+              f"(기준 {self.min_score}점 이상 상위 {self.top_n}개)")
+        return candidates
+
+    def run(self, items, budget=None):
+        """관심종목 전체 스캔 (보유 종목 먼저)
+
+        Args:
+            items: [(종목 코드/티커, 종목명, ...)]
+            budget: ScanBudget (None이면 예산 없이 후보 전체 처리)
+
+        Returns:
+            list[ScanResult]: items 순서 + items에 없는 보유 종목 (1차 선별 제외 종목은 skipped=True, 예산 초과 종목은 deferred=True)
+        """
+        if budget is not None:
+            budget.start()
+        results = [ScanResult(item) for item in items]
+        keep = set(self.keep_fn()) if self.keep_fn else set()
+        # 관심종목에서 빠졌거나 이번 주기 대상이 아닌 보유 종목도 청산 판단 대상
+        listed = {result.symbol for result in results}
+        results += [ScanResult(self.item_fn(symbol)) for symbol in sorted(keep - listed)]
+        for result in results:
+            result.held = result.symbol in keep
+        holdings = [result for result in results if result.held]
+        others = [result for result in results if not result.held]
+
+        output = _ThreadOutput(sys.stdout)
+        io_pool = ThreadPoolExecutor(self.io_workers, thread_name_prefix="scan-io")
+        analysis_pool = ThreadPoolExecutor(self.analysis_workers, thread_name_prefix="scan-analysis")
+        order_pool = ThreadPoolExecutor(1, thread_name_prefix="scan-order")  # 주문은 항상 한 종목씩
+
+        print(f"💼 보유 종목 {len(holdings)}개 먼저 처리")
+        sys.stdout = output
+        try:
+            # 보유 종목 수집을 먼저 띄우고 나머지 종목 선별은 그 뒤에 (선별 중 일봉 갱신 호출도 보유 종목보다 뒤)
+            pending = {
+                io_pool.submit(self._stage, output, result, self.fetch_fn, result.item): (result, 'fetch', None)
+                for result in holdings
+            }
+            screen_log = []
+            pending[io_pool.submit(output.capture, screen_log, self.screen, others)] = (None, 'screen', None)
+
+            holdings_left = len(holdings)  # 처리 중인 보유 종목 수 (0이 되면 신규 진입 주문 시작)
+            deferred = []                  # 주문 단계 대기 (result, ctx, evaluation)
+            progress = {True: [0, len(holdings)], False: [0, 0]}  # 보유/후보별 [주문 단계 진입 수, 전체 수]
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result, stage, ctx = pending.pop(future)
+
+                    if stage == 'screen':
+                        try:
+                            candidates = future.result()
+                        except Exception as e:
+                            screen_log.append(f"❌ 1차 선별 실패: {e}\n")
+                            candidates = []
+                            for other in others:
+                                other.skipped = True
+                        output.emit(screen_log)
+                        progress[False][1] = len(candidates)
+                        for candidate in candidates:  # 우선순위 순으로 큐에 넣음 → 예산이 모자라면 뒤쪽부터 빠짐
+                            task = io_pool.submit(self._fetch_within, output, candidate, budget)
+                            pending[task] = (candidate, 'fetch', None)
+                        continue
+
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        result.error = e
+                        result.log.append(f"❌ 에러 발생: {result.name} ({result.symbol}) - {e}\n")
+                        result.log.append(traceback.format_exc())
+                        output.emit(result.log)
+                        holdings_left -= result.held
+                        continue
+
+                    if stage == 'fetch':
+                        if result.deferred:
+                            continue
+                        task = analysis_pool.submit(self._stage, output, result, self.analyze_fn, result.item, value)
+                        pending[task] = (result, 'analyze', value)
+                    elif stage == 'analyze':
+                        result.signals = value[2]
+                        if self.history is not None:
+                            self.history.record(result.symbol, result.signals)
+                        deferred.append((result, ctx, value))
+                    else:
+                        holdings_left -= result.held
+
+                # 주문 단계: 보유 종목은 바로, 신규 진입은 보유 종목이 모두 끝난 뒤
+                ready = [entry for entry in deferred if entry[0].held or holdings_left == 0]
+                for entry in ready:
+                    deferred.remove(entry)
+                    result, ctx, evaluation = entry
+                    count = progress[result.held]
+                    count[0] += 1
+                    label = f"[{'보유' if result.held else '후보'} {count[0]}/{count[1]}]"
+                    task = order_pool.submit(self._execute, output, result, ctx, evaluation, label)
+                    pending[task] = (result, 'execute', None)
+        finally:
+            sys.stdout = output.stream
+            io_pool.shutdown(wait=False, cancel_futures=True)
+            analysis_pool.shutdown(wait=False, cancel_futures=True)
+            order_pool.shutdown(wait=True)
+            if self.history is not None:
+                self.history.save()
+
+        self._report_deferred(results, budget)
+        return results
+
+    def _fetch_within(self, output, result, budget):
+        """후보 수집 단계 - 예산이 남아 있을 때만 시작 (소진 시 deferred 표시 후 건너뜀)"""
+        if budget is not None and not budget.try_start():
+            result.deferred = True
+            return None
+        return self._stage(output, result, self.fetch_fn, result.item)
+
+    def _report_deferred(self, results, budget):
+        """예산 초과로 미룬 종목 출력"""
+        deferred = [result for result in results if result.deferred]
+        if budget is None:
+            return
+        if not deferred:
+            print(f"⏱️ 주기 예산 내 완료 ({budget.summary()})")
+            return
+        names = ", ".join(f"{result.name}({result.symbol})" for result in deferred)
+        print(f"⏳ 주기 예산 소진 ({budget.summary()}) - {len(deferred)}개 후보 다음 주기로: {names}")
+
+    def _stage(self, output, result, fn, *args):
+        """수집/분석/주문 단계 실행 (종목 우선순위로 API 호출, 출력은 종목 버퍼로)"""
+        with request_priority(result.priority):
+            return output.capture(result.log, fn, *args)
+
+    def _execute(self, output, result, ctx, evaluation, label):
+        """주문 단계 (단일 스레드) - 종목 출력 블록을 이어서 출력"""
+        result.log.insert(0, f"\n{label} {result.name} ({result.symbol})\n")
+        try:
+            with self.order_lock:
+                self._stage(output, result, self.execute_fn, result.item, ctx, evaluation)
+        finally:
+            output.emit(result.log)
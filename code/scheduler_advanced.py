@@ -60,10 +60,13 @@ def execute_strategies():
         {"code": "035420", "name": "NAVER"}
     ]
 
+    strategy.prefetch_prices([stock['code'] for stock in watchlist])
+    strategy.prefetch_indicators([stock['code'] for stock in watchlist])
+    strategy.portfolio.refresh()
+
     for stock in watchlist:
         try:
             strategy.execute_strategy(stock['code'], stock['name'])
-            time.sleep(2)  # API 호출 간격
         except Exception as e:
             print(f"❌ 에러 발생: {stock['name']} - {e}")
 
@@ -8,12 +8,13 @@
 
 from watchlist import WATCHLIST
 from kis_api import KISApi
-import pandas as pd
+from bar_store import BarStore
 
 
 class SectorRotation:
     def __init__(self):
         self.api = KISApi()
+        self.bar_store = BarStore(self.api)
         self.sector_scores = {}
 
     def calculate_sector_strength(self):
@@ -24,36 +25,41 @@ class SectorRotation:
         """
         sector_scores = {}
 
+        # 섹터 대표 종목 현재가 일괄 조회 (멀티 시세)
+        quotes = self.api.get_current_prices(
+            [stock_code for stocks in WATCHLIST.values() for stock_code, _ in stocks[:3]]
+        )
+
         for sector, stocks in WATCHLIST.items():
             total_score = 0
             count = 0
 
             for stock_code, stock_name in stocks[:3]:  # 섹터 대표 3종목만
                 try:
-                    # 현재가 조회 (None 체크)
-                    current_price_str = self.api.get_current_price(stock_code)
-                    if current_price_str is None:
+                    # 현재가 (None 체크)
+                    quote = quotes.get(stock_code)
+                    if quote is None:
                         print(f"  ⚠️ {stock_name} 현재가 조회 실패 - 스킵")
                         continue
-                    current_price = int(current_price_str)
+                    current_price = quote['price']
 
-                    # 일봉 데이터 조회
-                    df = self._get_ohlcv(stock_code, count=20)
+                    # 일봉 데이터 (로컬 저장소, 배열)
+                    bars = self.bar_store.get(stock_code, count=20)
 
-                    if df is None or len(df) < 20:
+                    if bars is None or len(bars) < 20:
                         continue
 
                     # 5일 수익률
-                    price_5d = df['close'].iloc[-5]
+                    price_5d = bars.close[-5]
                     return_5d = (current_price - price_5d) / price_5d * 100
 
                     # 20일 수익률
-                    price_20d = df['close'].iloc[0]
+                    price_20d = bars.close[0]
                     return_20d = (current_price - price_20d) / price_20d * 100
 
                     # 거래량 증가율
-                    avg_volume = df['volume'].iloc[:15].mean()
-                    recent_volume = df['volume'].iloc[-5:].mean()
+                    avg_volume = bars.volume[:15].mean()
+                    recent_volume = bars.volume[-5:].mean()
                     volume_change = (recent_volume - avg_volume) / avg_volume * 100
 
                     # 점수 계산 (5일 60%, 20일 30%, 거래량 10%)
@@ -84,43 +90,6 @@ class SectorRotation:
 
         return sorted_sectors
 
-    def _get_ohlcv(self, stock_code, count=20):
-        """일봉 데이터 조회 (간소화 버전)"""
-        import requests
-
-        url = f"{self.api.config.BASE_URL}/uapi/domestic-stock/v1/quotations/inquire-daily-price"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.api.access_token}",
-            "appkey": self.api.config.APP_KEY,
-            "appsecret": self.api.config.APP_SECRET,
-            "tr_id": "FHKST01010400"
-        }
-
-        params = {
-            "fid_cond_mrkt_div_code": "J",
-            "fid_input_iscd": stock_code,
-            "fid_org_adj_prc": "0",
-            "fid_period_div_code": "D"
-        }
-
-        self.api._rate_limit()
-        res = requests.get(url, headers=headers, params=params)
-
-        if res.status_code == 200:
-            result = res.json()
-            data = result.get('output', [])
-
-            if data:
-                df = pd.DataFrame(data)
-                df = df.iloc[:count][::-1].reset_index(drop=True)
-                df['close'] = df['stck_clpr'].astype(int)
-                df['volume'] = df['acml_vol'].astype(int)
-                return df[['close', 'volume']]
-
-        return None
-
     def get_priority_sectors(self, top_n=3):
         """우선 투자 섹터 선정
 
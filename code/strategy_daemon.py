@@ -0,0 +1,424 @@
+# strategy_daemon.py
+"""
+전략 상주 실행 (CronJob 15분마다 새 Pod 대신)
+- 장 시간 동안 프로세스 하나가 계속 떠서 내부 스케줄로 스캔 주기 반복
+  · 이미지 Pull / pandas·ta·discord import / 토큰 발급 / 관심종목 구성 비용은 시작 시 1회
+  · 주기 사이에 시세 메모, keep-alive 연결, 지표 메모, pyramid_tracker / peak_profit 유지
+- 장 시간 인식: 장이 열려 있을 때만 주기 실행, 닫혀 있으면 다음 개장까지 대기
+- 상태 확인용 로컬 HTTP 엔드포인트
+  · /healthz : 루프가 살아 있으면 200 (마지막 하트비트가 오래되면 503)
+  · /metrics : Prometheus 텍스트 형식 지표 (주기 수, 소요 시간, 종목 수, API 호출 등)
+- 실시간 청산 (국내): 장 시간 동안 보유 종목 체결가 WebSocket 구독 → exit_engine이 틱마다 손절/익절 판단
+  · 스캔 주기가 끝날 때마다 보유 종목 기준으로 구독 종목 갱신
+- 적응형 스캔 주기 (poll_scheduler.py): POLL_TICK마다 깨어나 다음 스캔 시각이 된 종목만 스캔
+  · 종목별 주기는 ATR%, 거래량 비율, 보유 여부, 손절/익절선까지 거리로 결정 (조용한 종목은 드물게)
+
+사용법:
+    python strategy_daemon.py              # 국내 (09:00~15:30 KST)
+    python strategy_daemon.py overseas     # 해외 (23:30~06:00 KST)
+
+환경 변수:
+    STRATEGY_INTERVAL: 스캔 주기 (초, 기본 900 = 15분, 1분 미만도 가능) - 적응형이면 활동도 1.0 종목 주기
+    ADAPTIVE_POLLING: 종목별 적응형 스캔 주기 사용 여부 (기본 1)
+    POLL_TICK: 적응형일 때 스캔 대상 확인 주기 (초, 기본 60)
+    DAEMON_PORT: 상태 확인 포트 (기본 8080)
+    SCAN_MAX_CALLS: 주기당 API 호출 예산 (기본 0 = 제한 없음, 시간 예산은 주기 간격)
+    REALTIME_EXITS: 실시간 청산 사용 여부 (기본 1, 국내만)
+"""
+import importlib
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from discord.discord_notifier import DiscordNotifier
+from scanner import WatchlistScanner
+from scan_budget import ScanBudget, ScanHistory
+from poll_scheduler import PollScheduler
+from exit_engine import ExitEngine
+from price_stream import PriceStream
+
+
+# 장 시간 (한국 시간) - (시작, 종료, 세션 시작 요일)
+MARKET_HOURS = {
+    'domestic': ((9, 0), (15, 30), {0, 1, 2, 3, 4}),   # 평일
+    'overseas': ((23, 30), (6, 0), {0, 1, 2, 3, 4})    # 월~금 밤 시작 → 다음날 새벽 종료 (서머타임 미반영)
+}
+
+
+def session_start(market, now=None):
+    """현재 진행 중인 장 세션 시작 시각 (장이 닫혀 있으면 None)"""
+    now = now or datetime.now()
+    (open_h, open_m), (close_h, close_m), weekdays = MARKET_HOURS[market]
+
+    start = now.replace(hour=open_h, minute=open_m, second=0, microsecond=0)
+    end = now.replace(hour=close_h, minute=close_m, second=0, microsecond=0)
+    if end <= start:
+        # 자정을 넘기는 세션 (해외): 새벽이면 전날 밤에 시작한 세션
+        if now < end:
+            start -= timedelta(days=1)
+        end += timedelta(days=1)
+
+    if start.weekday() in weekdays and start <= now < end:
+        return start
+    return None
+
+
+def next_session_start(market, now=None):
+    """다음 장 세션 시작 시각"""
+    now = now or datetime.now()
+    (open_h, open_m), _, weekdays = MARKET_HOURS[market]
+    start = now.replace(hour=open_h, minute=open_m, second=0, microsecond=0)
+    if start <= now:
+        start += timedelta(days=1)
+    while start.weekday() not in weekdays:
+        start += timedelta(days=1)
+    return start
+
+
+class DaemonMetrics:
+    """상주 실행 상태 (/healthz, /metrics)"""
+
+    def __init__(self, market):
+        self.market = market
+        self.started_at = time.time()
+        self.heartbeat = time.time()
+        self.market_open = False
+        self.cycles = 0
+        self.cycle_errors = 0
+        self.last_cycle_at = 0.0
+        self.last_cycle_duration = 0.0
+        self.last_scanned = 0
+        self.last_skipped = 0
+        self.last_deferred = 0
+        self.last_due = 0
+        self.last_symbol_errors = 0
+        self.balance_calls = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.stream_connected = False
+        self.stream_ticks = 0
+        self.exit_triggers = 0
+        self.exit_orders = 0
+        self.exit_latency = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, value)
+            self.heartbeat = time.time()
+
+    def healthy(self, max_silence):
+        return time.time() - self.heartbeat <= max_silence
+
+    def render(self):
+        """Prometheus 텍스트 형식"""
+        with self._lock:
+            gauges = {
+                'strategy_uptime_seconds': time.time() - self.started_at,
+                'strategy_market_open': int(self.market_open),
+                'strategy_cycles_total': self.cycles,
+                'strategy_cycle_errors_total': self.cycle_errors,
+                'strategy_last_cycle_timestamp_seconds': self.last_cycle_at,
+                'strategy_last_cycle_duration_seconds': self.last_cycle_duration,
+                'strategy_last_cycle_symbols_scanned': self.last_scanned,
+                'strategy_last_cycle_symbols_skipped': self.last_skipped,
+                'strategy_last_cycle_symbols_deferred': self.last_deferred,
+                'strategy_last_cycle_symbols_due': self.last_due,
+                'strategy_last_cycle_symbol_errors': self.last_symbol_errors,
+                'strategy_balance_calls_total': self.balance_calls,
+                'strategy_market_data_hits_total': self.cache_hits,
+                'strategy_market_data_misses_total': self.cache_misses,
+                'strategy_stream_connected': int(self.stream_connected),
+                'strategy_stream_ticks_total': self.stream_ticks,
+                'strategy_exit_triggers_total': self.exit_triggers,
+                'strategy_exit_orders_total': self.exit_orders,
+                'strategy_exit_last_latency_seconds': self.exit_latency
+            }
+        label = f'{{market="{self.market}"}}'
+        return "".join(f"{name}{label} {value:.15g}\n" for name, value in gauges.items())
+
+
+class StrategyDaemon:
+    INTERVAL = int(os.getenv('STRATEGY_INTERVAL', '900'))  # 스캔 주기 (초)
+    PORT = int(os.getenv('DAEMON_PORT', '8080'))
+    IDLE_CHECK = 60  # 장 마감 중 확인 주기 (초) - 종료 신호에 빨리 반응하도록 상한
+    REALTIME_EXITS = os.getenv('REALTIME_EXITS', '1') == '1'
+    ADAPTIVE_POLLING = os.getenv('ADAPTIVE_POLLING', '1') == '1'
+    POLL_TICK = int(os.getenv('POLL_TICK', '60'))  # 적응형 스캔 대상 확인 주기 (초)
+
+    def __init__(self, market='domestic', interval=INTERVAL, port=PORT, realtime_exits=REALTIME_EXITS,
+                 adaptive_polling=ADAPTIVE_POLLING):
+        """
+        Args:
+            market: 'domestic' 또는 'overseas'
+            interval: 스캔 주기 (초)
+            port: /healthz, /metrics 포트 (None이면 HTTP 서버 없음)
+            realtime_exits: 보유 종목 실시간 체결가로 청산 판단 (국내만)
+            adaptive_polling: 종목별 적응형 스캔 주기 (False면 interval마다 전체 스캔)
+        """
+        self.market = market
+        self.interval = interval
+        self.port = port
+        self.metrics = DaemonMetrics(market)
+        self.notifier = DiscordNotifier(market=market)
+        self.stop_event = threading.Event()
+        self.session = None           # 진행 중인 장 세션 시작 시각
+        self.session_started_at = 0.0
+        self.session_cycles = 0
+        self.session_success = 0
+        self.session_total = 0
+
+        # 전략 객체는 한 번만 생성 (토큰, 세션, 시세/지표 메모, 피라미딩/최고 수익률 상태 유지)
+        if market == 'domestic':
+            from advanced_strategy import AdvancedTradingStrategy
+            self.strategy = AdvancedTradingStrategy()
+            self.scanner = WatchlistScanner.domestic(self.strategy, history=ScanHistory.for_market(market, interval))
+            self.scheduler = PollScheduler.domestic(self.strategy, base=interval) if adaptive_polling else None
+        else:
+            from overseas_strategy import OverseasTradingStrategy
+            self.strategy = OverseasTradingStrategy()
+            self.scanner = WatchlistScanner.overseas(self.strategy, history=ScanHistory.for_market(market, interval))
+            self.scheduler = PollScheduler.overseas(self.strategy, base=interval) if adaptive_polling else None
+
+        # 루프 간격: 적응형이면 짧게 깨어나 스캔 시각이 된 종목만, 아니면 interval마다 전체
+        self.cycle_interval = min(self.POLL_TICK, interval) if self.scheduler is not None else interval
+
+        # 실시간 청산 (국내 체결가 WebSocket → 틱마다 청산 판단)
+        self.exit_engine = None
+        self.price_stream = None
+        if market == 'domestic' and realtime_exits:
+            self.exit_engine = ExitEngine(self.strategy)
+            self.price_stream = PriceStream(self.exit_engine.on_tick, approval_key_fn=self.strategy.api.get_approval_key)
+
+    def load_watchlist(self):
+        """관심종목 (ConfigMap 변경 반영 위해 매 주기 다시 읽음)"""
+        if self.market == 'domestic':
+            import watchlist
+            return importlib.reload(watchlist).get_all_stocks()
+        import watchlist_us
+        return importlib.reload(watchlist_us).get_all_us_stocks()
+
+    def due_items(self, watchlist):
+        """이번 주기에 스캔할 종목 (적응형이면 스캔 시각이 된 종목만)"""
+        if self.scheduler is None:
+            self.strategy.portfolio.refresh()
+            return watchlist
+
+        # 잔고는 스냅샷 사용 (내 체결은 로컬 반영, max_age 지나면 재조회) - 짧은 주기마다 조회 안 함
+        holdings = set(self.strategy.get_portfolio().holdings)
+        self.scheduler.mark_due(holdings ^ self.scheduler.held)  # 새로 보유/청산된 종목은 바로
+        return self.scheduler.due(watchlist)
+
+    def run_cycle(self):
+        """스캔 1회 (잔고 스냅샷 → 일괄 시세 → 보유 종목 우선 스캔)
+
+        Returns:
+            bool: 스캔 여부 (적응형에서 스캔 시각이 된 종목이 없으면 False)
+        """
+        start = time.time()
+        watchlist = self.load_watchlist()
+        due = self.due_items(watchlist)
+        self.metrics.update(last_due=len(due))
+        if not due:
+            return False  # 스캔 시각이 된 종목 없음
+
+        print(f"\n{'=' * 60}")
+        print(f"🔁 스캔 주기 #{self.metrics.cycles + 1} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} "
+              f"({len(due)}/{len(watchlist)}개 종목)")
+        print(f"{'=' * 60}")
+
+        if self.market == 'domestic':
+            self.strategy.prefetch_prices([code for code, _ in due])
+
+        # 시간 예산 = 주기 간격 (다음 주기 시작 전에 끝나도록, 못 본 후보는 다음 주기에 먼저)
+        results = self.scanner.run(due, budget=ScanBudget.for_api(self.strategy.api, deadline=self.interval))
+        if self.scheduler is not None:
+            # 예산 초과로 미룬 종목은 스캔 시각 유지 → 다음 주기에 다시 대상
+            self.scheduler.schedule([result.item for result in results if not result.deferred])
+
+        errors = sum(1 for result in results if result.error is not None)
+        skipped = sum(1 for result in results if result.skipped)
+        deferred = sum(1 for result in results if result.deferred)
+        duration = time.time() - start
+        self.session_success += sum(1 for result in results
+                                    if result.error is None and not result.skipped and not result.deferred)
+        self.session_total += len(results)
+
+        market_data = self.strategy.market_data
+        self.metrics.update(
+            cycles=self.metrics.cycles + 1,
+            last_cycle_at=time.time(),
+            last_cycle_duration=duration,
+            last_scanned=len(results) - skipped - deferred,
+            last_skipped=skipped,
+            last_deferred=deferred,
+            last_symbol_errors=errors,
+            balance_calls=self.strategy.portfolio.balance_calls,
+            cache_hits=market_data.hits,
+            cache_misses=market_data.misses
+        )
+        print(f"\n⏱️ 주기 완료: {duration:.1f}초 (분석 {len(results) - skipped - deferred}개, "
+              f"선별 제외 {skipped}개, 다음 주기로 {deferred}개, 실패 {errors}개)")
+        if self.scheduler is not None:
+            print(f"🗓️ 적응형 스캔 주기: {self.scheduler.summary()}")
+
+        self.sync_realtime(watchlist)
+        return True
+
+    def sync_realtime(self, watchlist):
+        """실시간 청산 대상 = 현재 보유 종목 (주기 중 매수/매도 반영)"""
+        if self.exit_engine is None:
+            return
+        symbols = self.exit_engine.sync(self.strategy.get_portfolio(), names=dict(item[:2] for item in watchlist))
+        self.price_stream.subscribe(symbols)
+        print(f"📡 실시간 청산 감시: {len(symbols)}개 보유 종목")
+
+    def realtime_metrics(self):
+        """실시간 청산 지표 (/metrics)"""
+        if self.exit_engine is None:
+            return {}
+        return {
+            'stream_connected': self.price_stream.connected,
+            'stream_ticks': self.price_stream.ticks,
+            'exit_triggers': self.exit_engine.triggers,
+            'exit_orders': self.exit_engine.orders,
+            'exit_latency': self.exit_engine.last_latency
+        }
+
+    def open_session(self, start):
+        """장 시작 - 날짜가 바뀐 상태 초기화"""
+        self.session = start
+        self.session_started_at = time.time()
+        self.session_cycles = self.session_success = self.session_total = 0
+
+        self.strategy.sold_today = self.strategy._load_sold_today()  # 날짜 지난 기록은 비워짐
+        self.strategy.market_data.clear()                           # 전날 시세 메모 정리
+        self.notifier.notify_start(f"strategy_daemon.py ({self.market})")
+        print(f"\n🔔 장 세션 시작: {start.strftime('%Y-%m-%d %H:%M')}")
+
+        if self.price_stream is not None:
+            self.price_stream.start()  # 구독 종목은 첫 주기 후 보유 종목으로 등록
+
+    def close_session(self):
+        """장 마감 - 세션 요약 알림"""
+        if self.price_stream is not None:
+            self.price_stream.stop()
+        duration = time.time() - self.session_started_at
+        print(f"\n🔕 장 세션 종료: 주기 {self.session_cycles}회, {duration / 60:.0f}분")
+        self.notifier.notify_end(
+            script_name=f"strategy_daemon.py ({self.market}, {self.session_cycles}회)",
+            success=self.session_success,
+            total=self.session_total,
+            duration=duration
+        )
+        self.session = None
+
+    def run(self):
+        """장 시간 동안 주기 실행 (종료 신호까지)"""
+        server = self.start_http_server()
+        mode = f"적응형, {self.cycle_interval}초마다 확인" if self.scheduler is not None else "전체 스캔"
+        print(f"🚀 전략 상주 실행 시작 ({self.market}, 주기 {self.interval}초, {mode})")
+
+        try:
+            while not self.stop_event.is_set():
+                start = session_start(self.market)
+                self.metrics.update(market_open=start is not None)
+
+                if start is None:
+                    if self.session is not None:
+                        self.close_session()
+                    wait = (next_session_start(self.market) - datetime.now()).total_seconds()
+                    self.stop_event.wait(max(1.0, min(wait, self.IDLE_CHECK)))
+                    continue
+
+                if self.session != start:
+                    if self.session is not None:
+                        self.close_session()
+                    self.open_session(start)
+
+                cycle_start = time.time()
+                scanned = True
+                try:
+                    scanned = self.run_cycle()
+                except Exception as e:
+                    self.metrics.update(cycle_errors=self.metrics.cycle_errors + 1)
+                    print(f"❌ 스캔 주기 실패: {e}")
+                    print(traceback.format_exc())
+                    self.notifier.notify_error(location=f"strategy_daemon ({self.market})", error=str(e))
+                if scanned:
+                    self.session_cycles += 1
+
+                # 다음 주기까지 대기 (주기 시작 기준, 대기 중에도 하트비트 유지)
+                next_cycle = cycle_start + self.cycle_interval
+                while not self.stop_event.is_set() and time.time() < next_cycle:
+                    self.metrics.update(**self.realtime_metrics())
+                    self.stop_event.wait(min(self.IDLE_CHECK, max(0.0, next_cycle - time.time())))
+        finally:
+            if self.session is not None:
+                self.close_session()
+            if self.exit_engine is not None:
+                self.exit_engine.close()
+            if server is not None:
+                server.shutdown()
+            print("👋 전략 상주 실행 종료")
+
+    def stop(self, *_):
+        """종료 신호 (SIGTERM/SIGINT) - 진행 중인 주기는 마치고 종료"""
+        print("\n⏹️ 종료 신호 수신 - 현재 주기 완료 후 종료")
+        self.stop_event.set()
+
+    def start_http_server(self):
+        """/healthz, /metrics 서버 (백그라운드 스레드)"""
+        if not self.port:
+            return None
+
+        daemon = self
+        # 하트비트 허용 공백: 한 주기가 아무리 길어도 주기 간격 2배 + 여유
+        max_silence = max(2 * daemon.interval, 600) + daemon.IDLE_CHECK
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/healthz':
+                    ok = daemon.metrics.healthy(max_silence)
+                    self._send(200 if ok else 503, "ok\n" if ok else "stalled\n")
+                elif self.path == '/metrics':
+                    self._send(200, daemon.metrics.render(), "text/plain; version=0.0.4")
+                else:
+                    self._send(404, "not found\n")
+
+            def _send(self, status, body, content_type="text/plain"):
+                data = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass  # 프로브 요청 로그 생략
+
+        server = ThreadingHTTPServer(("0.0.0.0", self.port), Handler)
+        threading.Thread(target=server.serve_forever, name="daemon-http", daemon=True).start()
+        print(f"🩺 상태 확인: http://0.0.0.0:{self.port}/healthz, /metrics")
+        return server
+
+
+def main():
+    market = sys.argv[1] if len(sys.argv) > 1 else 'domestic'
+    if market not in MARKET_HOURS:
+        print(f"❌ 알 수 없는 시장: {market} (domestic 또는 overseas)")
+        sys.exit(1)
+
+    daemon = StrategyDaemon(market)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# sweep.py
+"""
+파라미터 스윕 (백테스트 최적화)
+- Backtester.DEFAULT_PARAMS (신호 기준/가중치, 손절 범위, 익절 목표, 포지션 수)를
+  그리드 또는 랜덤 탐색으로 바꿔 가며 백테스트
+- 지표 배열은 부모 프로세스에서 1회 계산 → .npy 파일로 기록
+  → 워커는 메모리 맵(읽기 전용)으로 공유 (설정마다 데이터 복사/재계산 없음)
+- 설정 1개 = Backtester.simulate 1회 (ProcessPoolExecutor, 코어 수만큼 병렬)
+- 결과는 샤프 비율 / MDD / 손익비 / 수익률 기준으로 정렬 → data/sweep_result_*.json
+
+사용 예:
+    python sweep.py --data snapshots/2024 --random 2000            # 기본 탐색 공간에서 2000개
+    python sweep.py --grid --rank profit_factor --min-trades 30   # 기본 탐색 공간 전체 그리드
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import numpy as np
+from backtest import Backtester, slice_window
+from bar_source import FileBarSource, StoreBarSource
+
+
+# 기본 탐색 공간 (리스트 = 후보 값, (하한, 상한) = 랜덤 탐색 시 구간에서 추출)
+DEFAULT_SPACE = {
+    'rsi_low': [25.0, 30.0, 35.0],
+    'rsi_high': [65.0, 70.0, 75.0],
+    'volume_ratio': [1.0, 1.2, 1.5, 2.0],
+    'buy_signals': [2.0, 3.0],
+    'base_stop_loss': [0.04, 0.05, 0.06],
+    'max_stop_loss': [0.06, 0.08, 0.10],
+    'partial_target': [8.0, 10.0, 12.0, 15.0],
+    'final_target': [15.0, 20.0, 25.0, 30.0],
+    'max_positions': [5, 10, 15]
+}
+
+# 정렬 기준 (True = 클수록 좋음)
+RANK_KEYS = {
+    'sharpe': True,
+    'profit_factor': True,
+    'total_return': True,
+    'mdd': False
+}
+
+ARRAY_KEYS = Backtester.ARRAY_KEYS
+
+
+def grid(space):
+    """탐색 공간 전체 조합 (리스트 값만)"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def sample(space, count, seed=0):
+    """랜덤 탐색 (리스트 → 후보 중 선택, (하한, 상한) → 구간 균등 추출, 정수 구간은 정수)"""
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(count):
+        config = {}
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                lo, hi = values
+                config[key] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+            else:
+                config[key] = rng.choice(values)
+        configs.append(config)
+    return configs
+
+
+def share(data, directory):
+    """prepare() 결과를 디렉토리에 기록 (배열은 .npy, 종목 목록은 JSON)"""
+    os.makedirs(directory, exist_ok=True)
+    for key in ARRAY_KEYS:
+        np.save(os.path.join(directory, f"{key}.npy"), np.ascontiguousarray(data[key]))
+    with open(os.path.join(directory, 'symbols.json'), 'w', encoding='utf-8') as f:
+        json.dump({'codes': data['codes'], 'names': data['names']}, f, ensure_ascii=False)
+    return directory
+
+
+def load_shared(directory):
+    """share()로 기록한 데이터 (배열은 읽기 전용 메모리 맵)"""
+    with open(os.path.join(directory, 'symbols.json'), 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for key in ARRAY_KEYS:
+        data[key] = np.load(os.path.join(directory, f"{key}.npy"), mmap_mode='r')
+    return data
+
+
+_shared = None  # 워커 프로세스별 공유 데이터
+
+
+def _init_worker(directory):
+    global _shared
+    _shared = load_shared(directory)
+
+
+def _run_config(params, initial_cash, window=None):
+    """워커: 설정 1개 백테스트 → 성과 지표
+
+    Args:
+        window: (시작, 끝) 날짜 인덱스 - 해당 구간만 시뮬레이션 (None이면 전체)
+    """
+    try:
+        data = _shared if window is None else slice_window(_shared, *window)
+        backtester = Backtester(initial_cash=initial_cash, params=params, verbose=False)
+        return backtester.simulate(data).metrics(), None
+    except Exception as e:
+        return None, str(e)
+
+
+def run_pool(data, tasks, initial_cash=30000000, workers=None):
+    """prepare() 결과를 공유하고 작업 목록을 병렬 실행
+
+    Args:
+        data: Backtester.prepare() 결과
+        tasks: [(설정, 날짜 구간 또는 None)]
+        workers: 프로세스 수 (기본: CPU 코어 수)
+
+    Returns:
+        작업 순서대로 성과 지표 리스트 (실패한 작업은 None)
+    """
+    workers = workers or os.cpu_count() or 1
+    shared_dir = tempfile.mkdtemp(prefix='sweep_')
+    metrics = [None] * len(tasks)
+    failed = 0
+    started = time.time()
+    try:
+        share(data, shared_dir)
+        print(f"🚀 {len(tasks)}개 작업 x {len(data['codes'])}개 종목 x 최대 {len(data['dates'])}일 "
+              f"({workers}개 프로세스)")
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared_dir,)) as executor:
+            futures = {executor.submit(_run_config, params, initial_cash, window): i
+                       for i, (params, window) in enumerate(tasks)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                result, error = future.result()
+                if error:
+                    failed += 1
+                    print(f"⚠️ 설정 실패 {tasks[i][0]}: {error}")
+                metrics[i] = result
+
+                if done % 100 == 0 or done == len(futures):
+                    elapsed = time.time() - started
+                    print(f"  진행: {done}/{len(futures)} ({elapsed:.0f}초, 작업당 {elapsed / done:.2f}초)")
+    finally:
+        shutil.rmtree(shared_dir, ignore_errors=True)
+
+    print(f"✅ 완료: {len(tasks) - failed}개 성공, {failed}개 실패 ({time.time() - started:.0f}초)")
+    return metrics
+
+
+def rank(results, key='sharpe', min_trades=0):
+    """성과 순 정렬 (동점이면 MDD 작은 순), 매도 거래가 min_trades 미만인 설정 제외"""
+    descending = RANK_KEYS[key]
+    results = [r for r in results if r['metrics']['trades'] >= min_trades]
+    return sorted(results, key=lambda r: ((-1 if descending else 1) * r['metrics'][key], r['metrics']['mdd']))
+
+
+class ParameterSweep:
+    def __init__(self, stock_codes, start_date, end_date, source=None,
+                 initial_cash=30000000, workers=None):
+        """
+        Args:
+            stock_codes: [(code, name), ...]
+            start_date, end_date: 백테스트 기간 (YYYYMMDD)
+            source: 일봉 공급자 (BarSource, 기본: 로컬 일봉 저장소)
+            initial_cash: 초기 자본
+            workers: 프로세스 수 (기본: CPU 코어 수)
+        """
+        self.stock_codes = stock_codes
+        self.start_date = start_date
+        self.end_date = end_date
+        self.source = source
+        self.initial_cash = initial_cash
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, configs):
+        """설정 목록 백테스트 (병렬)
+
+        Returns:
+            [{'params': 설정, 'metrics': 성과 지표}] (실패한 설정 제외)
+        """
+        print(f"📊 지표 계산 중... ({len(self.stock_codes)}개 종목, {self.start_date} ~ {self.end_date})")
+        data = Backtester(self.initial_cash, self.source, verbose=False).prepare(
+            self.stock_codes, self.start_date, self.end_date
+        )
+        if data is None:
+            print("❌ 데이터가 없습니다. 스윕을 종료합니다.")
+            return []
+
+        metrics = run_pool(data, [(params, None) for params in configs], self.initial_cash, self.workers)
+        return [{'params': params, 'metrics': m} for params, m in zip(configs, metrics) if m is not None]
+
+    @staticmethod
+    def save(results, key='sharpe', directory='data'):
+        """정렬된 결과를 JSON 파일로 저장"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        filename = os.path.join(directory, f"sweep_result_{timestamp}.json")
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump({'rank_by': key, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {filename}")
+        return filename
+
+
+def print_top(results, key='sharpe', top=20):
+    """상위 설정 출력 (기본값과 다른 파라미터만)"""
+    print(f"\n🏆 상위 {min(top, len(results))}개 ({key} 기준)")
+    for i, result in enumerate(results[:top], 1):
+        m = result['metrics']
+        changed = {k: v for k, v in result['params'].items() if Backtester.DEFAULT_PARAMS.get(k) != v}
+        print(f"  {i:>3}. 샤프 {m['sharpe']:5.2f} | MDD {m['mdd']:5.1f}% | 손익비 {m['profit_factor']:5.2f} | "
+              f"수익률 {m['total_return']:+7.2f}% | 거래 {m['trades']:>4}회 | {changed}")
+
+
+if __name__ == "__main__":
+    from watchlist import get_all_stocks
+
+    parser = argparse.ArgumentParser(description="백테스트 파라미터 스윕")
+    parser.add_argument('--data', help="기록 파일 디렉토리 (생략하면 로컬 일봉 저장소)")
+    parser.add_argument('--days', type=int, default=730, help="백테스트 기간 (최근 N일, 기본 730)")
+    parser.add_argument('--grid', action='store_true', help="기본 탐색 공간 전체 그리드")
+    parser.add_argument('--random', type=int, default=500, help="랜덤 탐색 설정 수 (기본 500)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="프로세스 수 (기본 CPU 코어 수)")
+    parser.add_argument('--rank', choices=sorted(RANK_KEYS), default='sharpe')
+    parser.add_argument('--min-trades', type=int, default=10, help="매도 거래 수 하한 (기본 10)")
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    end_date = datetime.now().strftime('%Y%m%d')
+    start_date = (datetime.now() - timedelta(days=args.days)).strftime('%Y%m%d')
+    source = FileBarSource(args.data) if args.data else StoreBarSource()
+    configs = grid(DEFAULT_SPACE) if args.grid else sample(DEFAULT_SPACE, args.random, args.seed)
+
+    sweep = ParameterSweep(get_all_stocks(), start_date, end_date, source=source, workers=args.workers)
+    ranked = rank(sweep.run(configs), args.rank, args.min_trades)
+    print_top(ranked, args.rank, args.top)
+    ParameterSweep.save(ranked, args.rank)
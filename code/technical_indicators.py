@@ -1,8 +1,6 @@
 # technical_indicators.py
 from kis_api import KISApi
-import pandas as pd
-import ta
-import requests
+import indicators
 
 
 class TechnicalAnalysis:
@@ -19,45 +17,7 @@ class TechnicalAnalysis:
             period: 기간 (D: 일봉, W: 주봉, M: 월봉)
             count: 조회할 데이터 개수
         """
-        url = f"{self.api.config.BASE_URL}/uapi/domestic-stock/v1/quotations/inquire-daily-price"
-
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {self.api.access_token}",
-            "appkey": self.api.config.APP_KEY,
-            "appsecret": self.api.config.APP_SECRET,
-            "tr_id": "FHKST01010400"
-        }
-
-        params = {
-            "fid_cond_mrkt_div_code": "J",
-            "fid_input_iscd": stock_code,
-            "fid_org_adj_prc": "0",
-            "fid_period_div_code": period
-        }
-
-        self.api._rate_limit()
-        res = requests.get(url, headers=headers, params=params)  # 수정된 부분
-
-        if res.status_code == 200:
-            data = res.json()['output']
-
-            # 최신 데이터가 먼저 오므로 역순으로 정렬
-            df = pd.DataFrame(data)
-            df = df.iloc[:count][::-1].reset_index(drop=True)
-
-            # 컬럼명 변경 및 타입 변환
-            df['date'] = pd.to_datetime(df['stck_bsop_date'])
-            df['open'] = df['stck_oprc'].astype(int)
-            df['high'] = df['stck_hgpr'].astype(int)
-            df['low'] = df['stck_lwpr'].astype(int)
-            df['close'] = df['stck_clpr'].astype(int)
-            df['volume'] = df['acml_vol'].astype(int)
-
-            return df[['date', 'open', 'high', 'low', 'close', 'volume']]
-        else:
-            print("❌ 데이터 조회 실패:", res.text)
-            return None
+        return self.api.get_ohlcv_bars(stock_code, period=period, count=count, as_frame=True)
 
     def calculate_indicators(self, stock_code):
         """
@@ -77,25 +37,24 @@ class TechnicalAnalysis:
             print("❌ 데이터를 가져올 수 없습니다.")
             return
 
+        close = df['close'].to_numpy()
+
         # 이동평균선 계산
-        df['MA5'] = ta.trend.sma_indicator(df['close'], window=5)
-        df['MA20'] = ta.trend.sma_indicator(df['close'], window=20)
-        df['MA60'] = ta.trend.sma_indicator(df['close'], window=60)
+        df['MA5'] = indicators.sma(close, 5)
+        df['MA20'] = indicators.sma(close, 20)
+        df['MA60'] = indicators.sma(close, 60)
 
         # RSI 계산
-        df['RSI'] = ta.momentum.rsi(df['close'], window=14)
+        df['RSI'] = indicators.rsi(close, 14)
 
         # MACD 계산
-        macd = ta.trend.MACD(df['close'])
-        df['MACD'] = macd.macd()
-        df['MACD_signal'] = macd.macd_signal()
-        df['MACD_diff'] = macd.macd_diff()
+        df['MACD'], df['MACD_signal'], df['MACD_diff'] = indicators.macd(close)
 
         # 최근 데이터 출력
         latest = df.iloc[-1]
 
         print(f"📅 날짜: {latest['date'].strftime('%Y-%m-%d')}")
-        print(f"💰 종가: {latest['close']:,}원\n")
+        print(f"💰 종가: {latest['close']:,.0f}원\n")
 
         print("📈 이동평균선:")
         print(f"  - MA5:  {latest['MA5']:,.0f}원")
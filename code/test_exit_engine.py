@@ -0,0 +1,213 @@
+# test_exit_engine.py
+"""
+실시간 청산 엔진(exit_engine.py) 검증 스크립트
+- 로컬 재생 서버(price_replay.py) → PriceStream → ExitEngine → _manage_position → sell_stock
+- 실제 KIS 접속/주문 없음 (주문은 기록만 하는 API 객체 사용)
+- 손절 / 1차 익절(보유 중 1회, 스캔 주기와 공유) / 급락 청산(부분 청산 1회)이 틱 수신 후 1초 안에 주문되는지 확인
+"""
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from advanced_strategy import AdvancedTradingStrategy
+from eval_context import PortfolioView
+from exit_engine import ExitEngine
+from indicators import IndicatorMemo
+from market_data import MarketDataCache, OHLCVBars
+from portfolio import Portfolio
+from price_replay import ReplayServer, make_frame
+from price_stream import PriceStream, parse_frame
+from trading_journal import TradingJournal
+
+
+class RecordingApi:
+    """주문 기록만 하는 API (잔고는 고정 응답)"""
+
+    def __init__(self, holdings):
+        self.holdings = holdings
+        self.orders = []
+
+    def get_balance(self):
+        return {
+            'output1': [{'pdno': code, 'hldg_qty': str(qty), 'evlu_pfls_rt': '0', 'prpr': str(int(avg)),
+                         'pchs_avg_pric': str(avg)} for code, (qty, avg) in self.holdings.items()],
+            'output2': [{'dnca_tot_amt': '10000000', 'tot_evlu_amt': '20000000'}]
+        }
+
+    def sell_stock(self, stock_code, quantity, price=0):
+        self.orders.append((time.time(), 'sell', stock_code, quantity))
+        return {'rt_cd': '0'}
+
+    def buy_stock(self, stock_code, quantity, price=0):
+        self.orders.append((time.time(), 'buy', stock_code, quantity))
+        return {'rt_cd': '0'}
+
+
+class QuietNotifier:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class FixedBars:
+    """저장된 일봉 대신 횡보 일봉 반환 (급락/추세 판단이 틱 가격에만 좌우되도록)"""
+
+    def __init__(self, closes):
+        self.closes = closes
+
+    def get(self, symbol, count=100):
+        close = np.full(count, float(self.closes[symbol]))
+        close += np.tile([-50.0, 50.0], count)[:count]
+        date = pd.bdate_range('2024-01-02', periods=count).strftime('%Y%m%d').astype(np.int64).to_numpy()
+        return OHLCVBars(date, close, close + 100, close - 100, close, np.full(count, 100000))
+
+
+def make_strategy(holdings, closes):
+    strategy = object.__new__(AdvancedTradingStrategy)
+    strategy.api = RecordingApi(holdings)
+    strategy.notifier = QuietNotifier()
+    strategy.journal = TradingJournal(os.path.join(tempfile.mkdtemp(), 'journal.json'))
+    strategy.current_buy_id = {}
+    strategy.pyramid_tracker = {}
+    strategy.sold_today = {}
+    strategy._save_sold_today = lambda: None
+    strategy._save_pyramid_tracker = lambda: None
+    strategy.peak_profit = {}
+    strategy.price_codes = []
+    strategy._price_lock = threading.Lock()
+    strategy.market_data = MarketDataCache()
+    strategy.bar_store = FixedBars(closes)
+    strategy.indicators = IndicatorMemo()
+    strategy.minute_ma = {}
+    strategy.portfolio = Portfolio(strategy.api.get_balance, PortfolioView.from_domestic)
+    strategy.trade_lock = threading.RLock()
+    return strategy
+
+
+def test_parse_frame():
+    """단건/다건 프레임 파싱"""
+    print("\n" + "=" * 60)
+    print("🧾 시세 프레임 파싱")
+    print("=" * 60)
+
+    assert parse_frame(make_frame("005930", 71000, -1.25)) == [("005930", 71000, -1.25)]
+    single = make_frame("000660", 120000, 2.5).split('|')[3]
+    double = f"0|H0STCNT0|002|{make_frame('005930', 71000, 0.5).split('|')[3]}^{single}"
+    assert parse_frame(double) == [("005930", 71000, 0.5), ("000660", 120000, 2.5)]
+    assert parse_frame('{"header": {"tr_id": "PINGPONG"}}') == []
+    print("  ✅ 파싱 확인")
+
+
+def test_replay_exits():
+    """재생 서버 틱 → 청산 주문 (반응 시간 포함)"""
+    print("\n" + "=" * 60)
+    print("⚡ 실시간 청산 (재생 서버)")
+    print("=" * 60)
+
+    holdings = {"005930": (10, 70000.0), "000660": (4, 100000.0), "035420": (3, 200000.0)}
+    closes = {"005930": 70000, "000660": 100000, "035420": 200000}
+    strategy = make_strategy(holdings, closes)
+    strategy.pyramid_tracker["005930"] = {'remaining_qty': 0, 'stop_loss_pct': 0.04,
+                                          'profit_target_1': 12.0, 'profit_target_2': 20.0}
+    strategy.portfolio.refresh()
+
+    engine = ExitEngine(strategy, names={"005930": "삼성전자", "000660": "SK하이닉스", "035420": "NAVER"})
+    engine.COOLDOWN = 0.2
+
+    ticks = [
+        ("005930", 69500, -0.7), ("000660", 104000, 4.0), ("035420", 201000, 0.5),
+        ("005930", 67100, -4.1),   # -4.14% → 손절 (-4%)
+        ("000660", 112500, 12.5),  # +12.5% → 1차 익절 2주
+        ("000660", 113000, 13.0),  # 1차 익절은 1회만
+        ("000660", 113500, 13.5),
+        ("035420", 187000, -6.5),  # 전일 대비 -6.5% → 급락 청산
+        ("005930", 66000, -5.7),   # 이미 청산 → 무시
+    ]
+    server = ReplayServer(ticks, interval=0.3)
+    url = server.start()
+
+    stream = PriceStream(engine.on_tick, url=url)
+    stream.start()
+    stream.subscribe(engine.sync(strategy.get_portfolio()))
+
+    server.done.wait(10)
+    time.sleep(0.5)
+    stream.stop()
+    server.stop()
+    engine.close()
+
+    orders = [(side, code, qty) for _, side, code, qty in strategy.api.orders]
+    expected = [('sell', '005930', 10), ('sell', '000660', 2), ('sell', '035420', 3)]
+    print(f"  주문: {orders}")
+    print(f"  기대 주문: {expected}")
+    assert orders == expected
+
+    # 조건 틱 전송 → 주문까지 걸린 시간
+    for sent_at, code, price in server.sent:
+        for ordered_at, _, order_code, _ in strategy.api.orders:
+            if order_code == code and ordered_at >= sent_at and ordered_at - sent_at < 0.3:
+                print(f"  ⏱️ {code} {price:,}원 틱 → 주문 {(ordered_at - sent_at) * 1000:.0f}ms")
+    print(f"  남은 보유: {dict(strategy.get_portfolio().holdings)}")
+    assert engine.last_latency < 1.0
+    print("  ✅ 청산 주문 / 반응 시간 확인")
+
+
+def test_partial_exit_once():
+    """1차 익절은 보유 중 1회 (스캔 주기 반복 + 실시간 엔진이 pyramid_tracker 상태 공유)"""
+    print("\n" + "=" * 60)
+    print("🎯 1차 익절 1회 (스캔 주기 + 실시간 엔진)")
+    print("=" * 60)
+
+    strategy = make_strategy({"000660": (8, 100000.0)}, {"000660": 100000})
+    strategy.portfolio.refresh()
+    engine = ExitEngine(strategy)
+    engine.sync(strategy.get_portfolio())
+
+    for _ in range(3):  # +13% 유지된 채 스캔 3회
+        with strategy.trade_lock:
+            ctx = strategy.build_tick_context("000660", 113000)
+            quantity, profit_rate = ctx.portfolio.position("000660", 113000)
+            strategy._manage_position("000660", "SK하이닉스", quantity, profit_rate, "sideways", ctx, signals=0)
+    engine.close()
+
+    orders = [(side, code, qty) for _, side, code, qty in strategy.api.orders]
+    print(f"  주문: {orders}")
+    assert orders == [('sell', '000660', 4)]
+    assert strategy.pyramid_tracker["000660"]['partial_taken']
+    engine.sync(strategy.get_portfolio())
+    assert engine.check("000660", 113000) is None  # 실시간 엔진도 재익절 안 함
+    print("  ✅ 1차 익절 1회 확인")
+
+
+def test_crash_exit_once():
+    """급락 부분 청산(수익 +8% 이상 50%)은 보유 중 1회 - 급락 틱이 계속 들어와도 남은 물량 유지"""
+    print("\n" + "=" * 60)
+    print("🚨 급락 부분 청산 1회 (실시간 엔진)")
+    print("=" * 60)
+
+    strategy = make_strategy({"000660": (64, 100000.0)}, {"000660": 100000})
+    strategy.portfolio.refresh()
+    engine = ExitEngine(strategy)
+    engine.COOLDOWN = 0
+    engine.sync(strategy.get_portfolio())
+
+    for _ in range(6):  # +10% 수익 중 전일 대비 -6% 틱 반복
+        engine.on_tick("000660", 110000, -6.0)
+        time.sleep(0.2)
+    engine.close()
+
+    orders = [(side, code, qty) for _, side, code, qty in strategy.api.orders]
+    print(f"  주문: {orders}")
+    assert orders == [('sell', '000660', 32)]
+    assert strategy.pyramid_tracker["000660"]['crash_taken']
+    assert engine.check("000660", 110000, -6.0) is None
+    print("  ✅ 급락 부분 청산 1회 확인")
+
+
+if __name__ == "__main__":
+    test_parse_frame()
+    test_replay_exits()
+    test_partial_exit_once()
+    test_crash_exit_once()
+    print("\n✅ 모든 테스트 통과")
@@ -0,0 +1,238 @@
+# test_indicators.py
+"""
+NumPy 지표(indicators.py) 검증 스크립트
+- 같은 데이터로 ta 라이브러리 결과와 비교 (NaN 위치 + 값)
+- 임의 생성 데이터 (API 호출 없음) 여러 길이로 검사
+- 여러 종목 일괄 계산(2차원, 길이 다름)이 종목별 계산과 같은지 확인
+- 스트리밍 지표(indicator_stream.py)가 봉 추가/수정마다 compute_all 마지막 값과 같은지 확인
+- 계산 속도 비교
+"""
+import time
+import numpy as np
+import pandas as pd
+import ta
+import os
+import tempfile
+import indicators
+from indicator_stream import StreamingIndicators, save_streams, load_streams
+from market_data import OHLCVBars
+
+
+def make_bars(n, seed=0):
+    """임의 일봉 생성 (랜덤 워크)"""
+    rng = np.random.default_rng(seed)
+    close = 50000 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n))
+    volume = rng.integers(100000, 1000000, n)
+    date = pd.bdate_range('2022-01-03', periods=n).strftime('%Y%m%d').astype(np.int64).to_numpy()
+    return OHLCVBars(date, open_.round(), high.round(), low.round(), close.round(), volume)
+
+
+def head(bars, n):
+    """처음 n개 봉"""
+    return OHLCVBars(bars.date[:n], bars.open[:n], bars.high[:n],
+                     bars.low[:n], bars.close[:n], bars.volume[:n])
+
+
+def ta_reference(bars):
+    """기존 전략 코드와 같은 방식으로 ta 계산"""
+    df = bars.to_frame()
+    macd = ta.trend.MACD(df['close'])
+    bb = ta.volatility.BollingerBands(df['close'])
+
+    result = {
+        'MA5': df['close'].rolling(5).mean(),
+        'MA20': df['close'].rolling(20).mean(),
+        'RSI': ta.momentum.rsi(df['close'], window=14),
+        'MACD': macd.macd(),
+        'MACD_signal': macd.macd_signal(),
+        'MACD_hist': macd.macd_diff(),
+        'BB_upper': bb.bollinger_hband(),
+        'BB_middle': bb.bollinger_mavg(),
+        'BB_lower': bb.bollinger_lband(),
+        'ATR': ta.volatility.average_true_range(df['high'], df['low'], df['close'], window=14)
+    }
+    if len(df) >= 28:  # ta ADX는 28봉 미만이면 예외
+        result['ADX'] = ta.trend.ADXIndicator(df['high'], df['low'], df['close'], window=14).adx()
+    return {key: series.to_numpy(dtype=np.float64) for key, series in result.items()}
+
+
+def test_matches_ta():
+    """ta와 값 비교"""
+    print("\n" + "=" * 60)
+    print("📊 ta 라이브러리 결과 비교")
+    print("=" * 60)
+
+    failures = 0
+    for n in [14, 20, 26, 28, 30, 35, 60, 100, 500]:
+        for seed in range(3):
+            bars = make_bars(n, seed)
+            expected = ta_reference(bars)
+            actual = indicators.compute_all(bars)
+
+            for key, want in expected.items():
+                got = actual[key]
+                same_nan = np.array_equal(np.isnan(want), np.isnan(got))
+                close = np.allclose(want, got, rtol=1e-9, atol=1e-9, equal_nan=True)
+                if not (same_nan and close):
+                    failures += 1
+                    print(f"  ❌ {key} 불일치 (봉 {n}개, seed {seed})")
+                    print(f"     ta:    {want[-5:]}")
+                    print(f"     numpy: {got[-5:]}")
+
+    if failures == 0:
+        print("  ✅ 전체 일치")
+    assert failures == 0, f"{failures}개 불일치"
+
+
+def test_batch():
+    """길이가 다른 종목들을 한 번에 계산해도 종목별 계산과 같은 값"""
+    print("\n" + "=" * 60)
+    print("🧮 일괄 계산 (종목 x 봉) 비교")
+    print("=" * 60)
+
+    bars_list = [make_bars(n, seed) for seed, n in enumerate([14, 20, 30, 60, 100, 27, 100])]
+    batch = indicators.compute_batch(indicators.stack(bars_list))
+
+    failures = 0
+    for row_idx, bars in enumerate(bars_list):
+        single = indicators.compute_all(bars)
+        values = indicators.unstack(batch, row_idx, len(bars))
+        for key, want in single.items():
+            got = values[key]
+            if not np.allclose(want, got, rtol=1e-9, atol=1e-9, equal_nan=True):
+                failures += 1
+                print(f"  ❌ {key} 불일치 (봉 {len(bars)}개)")
+
+    memo = indicators.IndicatorMemo()
+    results = memo.get_many({f"{i:06d}": bars for i, bars in enumerate(bars_list)})
+    assert results["000002"] is memo.get("000002", bars_list[2])
+
+    if failures == 0:
+        print("  ✅ 전체 일치")
+    assert failures == 0, f"{failures}개 불일치"
+
+
+def test_stream():
+    """봉 추가/현재 봉 수정마다 스트리밍 값 == 전체 재계산 마지막 값, 저장 후 복원"""
+    print("\n" + "=" * 60)
+    print("🔁 스트리밍 지표 비교")
+    print("=" * 60)
+
+    failures = 0
+    bars = make_bars(80, seed=7)
+    stream = StreamingIndicators()
+
+    for i in range(len(bars)):
+        # 장중: 시가로 먼저 들어온 뒤 종가로 수정
+        stream.push(int(bars.date[i]), bars.open[i], bars.open[i], bars.open[i], bars.open[i], 0)
+        stream.push(int(bars.date[i]), bars.open[i], bars.high[i], bars.low[i], bars.close[i], bars.volume[i])
+
+        expected = indicators.row(indicators.compute_all(head(bars, i + 1)), -1)
+        for key, want in expected.items():
+            got = stream.value[key]
+            if not np.allclose(want, got, rtol=1e-9, atol=1e-9, equal_nan=True):
+                failures += 1
+                print(f"  ❌ {key} 불일치 (봉 {i + 1}개): {want} vs {got}")
+
+    # 저장 → 복원 후 다음 봉도 같은 값
+    path = os.path.join(tempfile.mkdtemp(), 'streams.json')
+    save_streams({'005930': StreamingIndicators.from_bars(head(bars, len(bars) - 1))}, path)
+    restored = load_streams(path)['005930']
+    restored.push(int(bars.date[-1]), bars.open[-1], bars.high[-1], bars.low[-1], bars.close[-1], bars.volume[-1])
+    for key, want in stream.value.items():
+        if not np.allclose(want, restored.value[key], rtol=1e-12, atol=1e-12, equal_nan=True):
+            failures += 1
+            print(f"  ❌ {key} 복원 후 불일치")
+
+    if failures == 0:
+        print("  ✅ 전체 일치 (봉 추가/수정/저장 복원)")
+    assert failures == 0, f"{failures}개 불일치"
+
+
+def test_speed():
+    """30봉 기준 계산 시간 비교"""
+    print("\n" + "=" * 60)
+    print("⏱️ 계산 속도 (30봉 x 200회)")
+    print("=" * 60)
+
+    bars = make_bars(30)
+
+    start = time.perf_counter()
+    for _ in range(200):
+        ta_reference(bars)
+    ta_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(200):
+        indicators.compute_all(bars)
+    np_time = time.perf_counter() - start
+
+    print(f"  ta + pandas: {ta_time * 1000 / 200:.2f}ms/회")
+    print(f"  numpy:       {np_time * 1000 / 200:.2f}ms/회 ({ta_time / np_time:.1f}배)")
+
+    # 관심종목 90개: 종목별 반복 vs 일괄 계산
+    bars_list = [make_bars(60, seed) for seed in range(90)]
+
+    start = time.perf_counter()
+    for bars in bars_list:
+        indicators.compute_all(bars)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indicators.compute_batch(indicators.stack(bars_list))
+    batch_time = time.perf_counter() - start
+
+    print(f"  90종목 반복: {loop_time * 1000:.1f}ms")
+    print(f"  90종목 일괄: {batch_time * 1000:.1f}ms ({loop_time / batch_time:.1f}배)")
+
+
+def test_memo():
+    """같은 봉이면 재사용, 마지막 봉(종가/거래량/고가/저가)이 바뀌면 재계산"""
+    print("\n" + "=" * 60)
+    print("🧠 지표 메모 테스트")
+    print("=" * 60)
+
+    memo = indicators.IndicatorMemo()
+    bars = make_bars(30)
+
+    first = memo.get("005930", bars)
+    assert memo.get("005930", bars) is first
+
+    changed = bars.close.copy()
+    changed[-1] += 100
+    bars2 = OHLCVBars(bars.date, bars.open, bars.high, bars.low, changed, bars.volume)
+    revised = memo.get("005930", bars2)
+    assert revised is not first
+
+    # 종가가 같아도 거래량/고가/저가가 바뀌면 재계산
+    volume = bars.volume.copy()
+    volume[-1] += 1000
+    high = bars.high.copy()
+    high[-1] += 50
+    for bars4 in (OHLCVBars(bars.date, bars.open, bars.high, bars.low, bars.close, volume),
+                  OHLCVBars(bars.date, bars.open, high, bars.low, bars.close, bars.volume)):
+        expected = indicators.compute_all(bars4)
+        for key, values in memo.get("005930", bars4).items():
+            assert np.allclose(values, expected[key], rtol=1e-9, atol=1e-9, equal_nan=True), key
+
+    # 오늘 봉만 바뀐 경우 스트리밍 갱신 결과 == 전체 재계산
+    for price in (bars.close[-1] - 300, bars.close[-1] + 500):
+        changed = bars.close.copy()
+        changed[-1] = price
+        bars3 = OHLCVBars(bars.date, bars.open, bars.high, bars.low, changed, bars.volume)
+        expected = indicators.compute_all(bars3)
+        for key, values in memo.get("005930", bars3).items():
+            assert np.allclose(values, expected[key], rtol=1e-9, atol=1e-9, equal_nan=True), key
+    print("  ✅ 메모 동작 확인 (오늘 봉 수정 포함)")
+
+
+if __name__ == "__main__":
+    test_matches_ta()
+    test_batch()
+    test_stream()
+    test_memo()
+    test_speed()
+    print("\n✅ 모든 테스트 통과")
@@ -0,0 +1,94 @@
+# token_store.py
+"""
+KIS 접근 토큰 공유 저장소
+- PVC(trading-journal-pvc)에 저장 → CronJob 파드가 새로 떠도 재사용
+- 파일 락으로 동시에 시작한 프로세스 중 하나만 발급, 나머지는 대기 후 재사용
+- 응답의 expires_in 기준으로 만료 직전에 미리 갱신
+"""
+import fcntl
+import hashlib
+import json
+import os
+import time
+from config import ensure_data_dir
+
+
+class TokenStore:
+    REFRESH_MARGIN = 30 * 60  # 만료 30분 전부터 갱신
+
+    def __init__(self, key, store_dir):
+        """
+        Args:
+            key: 토큰을 공유할 키 (APP_KEY)
+            store_dir: 저장 디렉토리 (PVC 경로, 없으면 임시 디렉토리)
+        """
+        key_hash = hashlib.sha256((key or "").encode()).hexdigest()[:12]
+        self.token_file = os.path.join(ensure_data_dir(store_dir), f"kis_token_{key_hash}.json")
+        self.lock_file = self.token_file + ".lock"
+
+    def is_fresh(self, data):
+        """갱신 시점 전인지 확인"""
+        return bool(data) and time.time() < data.get('expires_at', 0) - self.REFRESH_MARGIN
+
+    def load(self):
+        """저장된 토큰 읽기 (없거나 깨졌으면 None)"""
+        try:
+            with open(self.token_file, 'r') as f:
+                data = json.load(f)
+            if data.get('token') and data.get('expires_at'):
+                return data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ 토큰 파일 읽기 실패: {e}")
+        return None
+
+    def get(self, issue_fn):
+        """유효한 토큰 반환 (필요하면 락을 잡고 한 번만 발급)
+
+        Args:
+            issue_fn: 새 토큰 발급 함수 → (token, expires_in) 또는 None
+
+        Returns:
+            dict: {'token', 'issued_at', 'expires_at', 'reused'} 또는 None
+        """
+        data = self.load()
+        if self.is_fresh(data):
+            return dict(data, reused=True)
+
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # 다른 프로세스가 발급 중이면 대기
+            try:
+                # 대기하는 동안 다른 프로세스가 갱신했는지 재확인
+                data = self.load()
+                if self.is_fresh(data):
+                    return dict(data, reused=True)
+
+                issued = issue_fn()
+                if issued is None:
+                    # 발급 실패 시 아직 만료 전인 기존 토큰이라도 사용
+                    if data and time.time() < data['expires_at']:
+                        return dict(data, reused=True)
+                    return None
+
+                token, expires_in = issued
+                now = time.time()
+                data = {
+                    'token': token,
+                    'issued_at': now,
+                    'expires_at': now + expires_in
+                }
+                self._save(data)
+                return dict(data, reused=False)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self, data):
+        """임시 파일에 쓰고 교체 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록)"""
+        tmp_file = f"{self.token_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.token_file)
+        except Exception as e:
+            print(f"⚠️ 토큰 파일 저장 실패: {e}")